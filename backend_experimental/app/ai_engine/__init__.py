@@ -2,14 +2,31 @@
 AI処理エンジンモジュール
 
 手術動画から動作を解析するためのAI処理エンジン
+検出器はMediaPipe等の重い依存を持つため、属性アクセス時に遅延インポートする
 """
 
-from .processors.skeleton_detector import HandSkeletonDetector
-from .processors.tool_detector import ToolDetector
-from .processors.video_analyzer import VideoAnalyzer
+from importlib import import_module
+
+_LAZY_EXPORTS = {
+    "HandSkeletonDetector": ".processors.skeleton_detector",
+    "ToolDetector": ".processors.tool_detector",
+    "VideoAnalyzer": ".processors.video_analyzer",
+}
 
 __all__ = [
     "HandSkeletonDetector",
     "ToolDetector", 
     "VideoAnalyzer"
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        value = getattr(import_module(_LAZY_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -2,14 +2,31 @@
 AI処理プロセッサー群
 
 各種検出・解析処理を行うモジュール
+検出器はMediaPipe等の重い依存を持つため、属性アクセス時に遅延インポートする
 """
 
-from .skeleton_detector import HandSkeletonDetector
-from .tool_detector import ToolDetector
-from .video_analyzer import VideoAnalyzer
+from importlib import import_module
+
+_LAZY_EXPORTS = {
+    "HandSkeletonDetector": ".skeleton_detector",
+    "ToolDetector": ".tool_detector",
+    "VideoAnalyzer": ".video_analyzer",
+}
 
 __all__ = [
     "HandSkeletonDetector",
     "ToolDetector",
     "VideoAnalyzer"
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        value = getattr(import_module(_LAZY_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -7,11 +7,23 @@
 
 import cv2
 import numpy as np
-from typing import Generator, Tuple, Optional, List
+from typing import Generator, Tuple, Optional, List, Dict, Sequence
 from pathlib import Path
 import logging
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 
+# decord（任意）: 抽出対象フレームをまとめてデコードする高速バックエンド
+try:
+    import decord
+    DECORD_AVAILABLE = True
+except ImportError:
+    DECORD_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 
@@ -33,18 +45,29 @@ class VideoInfo:
 class FrameExtractor:
     """動画フレーム抽出クラス"""
 
-    def __init__(self, video_path: str, target_fps: int = 5):
+    BACKENDS = ("opencv", "decord", "cuda")
+    DECORD_BATCH_SIZE = 16  # decordで1回にデコードするフレーム数
+
+    def __init__(self, video_path: str, target_fps: int = 5, backend: str = "opencv"):
         """
         初期化
 
         Args:
             video_path: 動画ファイルパス
             target_fps: 抽出するフレームレート（デフォルト5fps）
+            backend: デコードバックエンド（"opencv"、"decord" または "cuda"。
+                     利用できない場合はopencvにフォールバック）
         """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unsupported backend: {backend}")
+
         self.video_path = Path(video_path)
         self.target_fps = target_fps
+        self.backend = backend
         self.cap = None
+        self._vr = None
         self.video_info = None
+        self._next_frame: Optional[int] = None  # 次のread()で得られるフレーム番号（不明ならNone）
 
         if not self.video_path.exists():
             raise FileNotFoundError(f"Video file not found: {video_path}")
@@ -58,6 +81,7 @@ class FrameExtractor:
 
         if not self.cap.isOpened():
             raise ValueError(f"Cannot open video file: {self.video_path}")
+        self._next_frame = 0
 
         # 動画情報を取得
         width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
@@ -76,17 +100,57 @@ class FrameExtractor:
 
         logger.info(f"Video loaded: {self.video_info}")
 
+        if self.backend == "decord":
+            self._initialize_decord()
+        elif self.backend == "cuda" and not self._cuda_decode_available():
+            logger.warning("cv2.cudacodec is not available, falling back to OpenCV backend")
+            self.backend = "opencv"
+
+    @staticmethod
+    def _cuda_decode_available() -> bool:
+        """NVDECによるGPUデコード（CUDA版OpenCVのcudacodec）が使えるか"""
+        try:
+            return hasattr(cv2, "cudacodec") and cv2.cuda.getCudaEnabledDeviceCount() > 0
+        except cv2.error:
+            return False
+
+    def _initialize_decord(self):
+        """decordのVideoReaderを初期化（未インストール時はOpenCVを使用）"""
+        if not DECORD_AVAILABLE:
+            logger.warning("decord is not installed, falling back to OpenCV backend")
+            self.backend = "opencv"
+            return
+
+        self._vr = decord.VideoReader(
+            str(self.video_path),
+            ctx=decord.cpu(0),
+            num_threads=max(1, (os.cpu_count() or 2) // 2)
+        )
+
+    @staticmethod
+    def _from_decord(frame: np.ndarray, color: str = "BGR") -> np.ndarray:
+        """decordのRGBフレームを指定の色順に合わせる（その場で変換）"""
+        if color == "BGR":
+            cv2.cvtColor(frame, cv2.COLOR_RGB2BGR, dst=frame)
+        return frame
+
     def get_info(self) -> VideoInfo:
         """動画情報を取得"""
         return self.video_info
 
-    def extract_frames_generator(self) -> Generator[Tuple[int, np.ndarray], None, None]:
+    def extract_frames_generator(self, color: str = "BGR") -> Generator[Tuple[int, np.ndarray], None, None]:
         """
         フレームを順次抽出するジェネレータ
 
+        Args:
+            color: 出力する色順（"BGR" または "RGB"。MediaPipe等へ渡す場合は"RGB"）
+
         Yields:
             (frame_number, frame): フレーム番号とフレーム画像
         """
+        if color not in ("BGR", "RGB"):
+            raise ValueError(f"Unsupported color order: {color}")
+
         if not self.cap or not self.cap.isOpened():
             self._initialize_capture()
 
@@ -95,26 +159,128 @@ class FrameExtractor:
         if frame_skip < 1:
             frame_skip = 1
 
+        if self._vr is not None:
+            yield from self._extract_frames_decord(frame_skip, color)
+            return
+        if self.backend == "cuda":
+            yield from self._extract_frames_cuda(frame_skip, color)
+            return
+
         frame_count = 0
         extracted_count = 0
 
         self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)  # 最初に戻る
+        self._next_frame = None
 
         while True:
-            ret, frame = self.cap.read()
-
-            if not ret:
-                break
-
             # 指定のフレームレートに合わせてフレームを抽出
             if frame_count % frame_skip == 0:
+                # 抽出対象はread()（grab+retrieve）の1回の呼び出しで取得
+                ret, frame = self.cap.read()
+                if not ret:
+                    break
+                if color == "RGB":
+                    # デコード直後のバッファをその場で変換（追加の画像確保なし）
+                    cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=frame)
                 yield (frame_count, frame)
                 extracted_count += 1
+            elif not self.cap.grab():
+                # 読み飛ばすフレームはgrab()でデコーダを進めるのみ（画像の取り出しなし）
+                break
 
             frame_count += 1
 
         logger.info(f"Extracted {extracted_count} frames from {frame_count} total frames")
 
+    def _extract_frames_decord(self,
+                               frame_skip: int,
+                               color: str) -> Generator[Tuple[int, np.ndarray], None, None]:
+        """decordで抽出対象フレームのみをバッチ単位でデコード（シーク・読み飛ばしはC++側）"""
+        indices = list(range(0, len(self._vr), frame_skip))
+
+        for start in range(0, len(indices), self.DECORD_BATCH_SIZE):
+            batch_indices = indices[start:start + self.DECORD_BATCH_SIZE]
+            batch = self._vr.get_batch(batch_indices).asnumpy()
+            for frame_number, frame in zip(batch_indices, batch):
+                yield (frame_number, self._from_decord(frame, color))
+
+        logger.info(f"Extracted {len(indices)} frames from {len(self._vr)} total frames (decord)")
+
+    def _extract_frames_cuda(self,
+                             frame_skip: int,
+                             color: str) -> Generator[Tuple[int, np.ndarray], None, None]:
+        """
+        NVDEC（cv2.cudacodec）でGPUデコードし、抽出対象フレームのみホストへ転送
+
+        cudacodecのリーダーは先頭からの順次読み出しのみのため、呼び出しごとに生成する
+        """
+        reader = cv2.cudacodec.createVideoReader(str(self.video_path))
+        frame_count = 0
+        extracted_count = 0
+
+        while True:
+            if frame_count % frame_skip == 0:
+                ret, gpu_frame = reader.nextFrame()
+                if not ret:
+                    break
+                frame = gpu_frame.download()
+                if frame.shape[2] == 4:
+                    # cudacodecの既定出力はBGRA
+                    frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2RGB if color == "RGB" else cv2.COLOR_BGRA2BGR)
+                elif color == "RGB":
+                    cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=frame)
+                yield (frame_count, frame)
+                extracted_count += 1
+            elif not reader.grab():
+                break
+
+            frame_count += 1
+
+        logger.info(f"Extracted {extracted_count} frames from {frame_count} total frames (cuda)")
+
+    def extract_frames_threaded(self,
+                                queue_size: int = 4,
+                                color: str = "BGR") -> Generator[Tuple[int, np.ndarray], None, None]:
+        """
+        デコードをバックグラウンドスレッドで先行させるフレーム抽出ジェネレータ
+
+        cv2のデコードはGILを解放するため、呼び出し側の推論と並行して
+        次のフレームを読み進められる（prefetchを参照）。イテレーション中は同じインスタンスの
+        他の抽出メソッドを呼ばないこと（VideoCaptureを共有しているため）
+
+        Args:
+            queue_size: 先読みするフレーム数の上限
+            color: 出力する色順（"BGR" または "RGB"）
+
+        Yields:
+            (frame_number, frame): フレーム番号とフレーム画像
+        """
+        yield from prefetch(self.extract_frames_generator(color), maxsize=queue_size)
+
+    def extract_batches(self,
+                        batch_size: int = 16,
+                        color: str = "BGR") -> Generator[List[Tuple[int, np.ndarray]], None, None]:
+        """
+        間引き抽出したフレームをbatch_size枚ずつまとめて返すジェネレータ
+
+        YOLO等のバッチ推論（ToolDetector.detect_batch）に渡す用途
+
+        Args:
+            batch_size: 1バッチのフレーム数
+            color: 出力する色順（"BGR" または "RGB"）
+
+        Yields:
+            [(frame_number, frame), ...]: 最大batch_size件のフレーム（最後のバッチは端数）
+        """
+        batch: List[Tuple[int, np.ndarray]] = []
+        for item in self.extract_frames_generator(color):
+            batch.append(item)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
     def extract_all_frames(self, max_frames: Optional[int] = None) -> List[Tuple[int, np.ndarray]]:
         """
         全フレームを抽出してリストで返す
@@ -156,12 +322,62 @@ class FrameExtractor:
             logger.warning(f"Time {time_seconds}s exceeds video duration")
             return None
 
-        # 指定フレームに移動
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+        if self._vr is not None:
+            return self._from_decord(self._vr[frame_number].asnumpy())
+
+        # 直前の読み出しの続きならシークを省略（キーフレームからの再デコードを避ける）
+        if frame_number != self._next_frame:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
         ret, frame = self.cap.read()
+        self._next_frame = frame_number + 1 if ret else None
 
         return frame if ret else None
 
+    def get_frames_at(self, frame_numbers: Sequence[int]) -> Dict[int, np.ndarray]:
+        """
+        複数のフレーム番号のフレームをまとめて取得
+
+        フレーム番号を昇順に並べ、先頭に1回だけシークした後は
+        grab()で前方に読み進め、対象フレームのみデコード結果を取り出す。
+
+        Args:
+            frame_numbers: フレーム番号のリスト（順不同・重複可）
+
+        Returns:
+            {frame_number: frame}: 取得できたフレーム
+        """
+        if not self.cap or not self.cap.isOpened():
+            self._initialize_capture()
+
+        targets = sorted({n for n in frame_numbers if 0 <= n < self.video_info.total_frames})
+        frames: Dict[int, np.ndarray] = {}
+        if not targets:
+            return frames
+
+        if self._vr is not None:
+            batch = self._vr.get_batch(targets).asnumpy()
+            return {n: self._from_decord(frame) for n, frame in zip(targets, batch)}
+
+        pos = targets[0]
+        if pos != self._next_frame:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, pos)
+        self._next_frame = None
+
+        for target in targets:
+            while pos < target:
+                if not self.cap.grab():
+                    return frames
+                pos += 1
+
+            ret, frame = self.cap.read()
+            if not ret:
+                return frames
+            frames[target] = frame
+            pos += 1
+
+        self._next_frame = pos
+        return frames
+
     def extract_keyframes(self, interval_seconds: float = 1.0) -> List[Tuple[float, np.ndarray]]:
         """
         キーフレームを定期間隔で抽出
@@ -172,18 +388,38 @@ class FrameExtractor:
         Returns:
             [(time, frame), ...]: 時刻とフレームのリスト
         """
-        keyframes = []
-        time = 0.0
+        # 加算の繰り返しによる誤差の蓄積を避けるため i * interval で時刻を生成
+        # （arangeは浮動小数点の丸めで終端をわずかに含むことがあるため除外する）
+        times = np.arange(0.0, self.video_info.duration, interval_seconds)
+        times = times[times < self.video_info.duration].tolist()
 
-        while time < self.video_info.duration:
-            frame = self.extract_frame_at_time(time)
-            if frame is not None:
-                keyframes.append((time, frame))
-            time += interval_seconds
+        # 時刻ごとにシークせず、先頭から1回の前方読み進めでまとめて取得
+        keyframes = self.extract_frames_at_times(times)
 
         logger.info(f"Extracted {len(keyframes)} keyframes")
         return keyframes
 
+    def extract_frames_at_times(self, times: Sequence[float]) -> List[Tuple[float, np.ndarray]]:
+        """
+        複数の時刻のフレームをまとめて抽出
+
+        extract_frame_at_timeを繰り返し呼ぶ場合と異なり、時刻ごとのシーク
+        （キーフレームからの再デコード）を行わず、get_frames_atで前方に読み進める。
+
+        Args:
+            times: 時刻（秒）のリスト
+
+        Returns:
+            [(time, frame), ...]: 取得できた時刻とフレームのリスト（入力順）
+        """
+        frame_numbers = [int(t * self.video_info.fps) for t in times]
+        if any(n >= self.video_info.total_frames for n in frame_numbers):
+            logger.warning("Some requested times exceed video duration")
+
+        frames = self.get_frames_at(frame_numbers)
+
+        return [(t, frames[n]) for t, n in zip(times, frame_numbers) if n in frames]
+
     def save_frames(self, output_dir: Path, prefix: str = "frame"):
         """
         抽出したフレームを画像ファイルとして保存
@@ -194,9 +430,20 @@ class FrameExtractor:
         """
         output_dir.mkdir(parents=True, exist_ok=True)
 
-        for frame_num, frame in self.extract_frames_generator():
-            filename = output_dir / f"{prefix}_{frame_num:06d}.jpg"
-            cv2.imwrite(str(filename), frame)
+        # JPEGエンコードはGILを解放するため、デコードと並行して複数スレッドで書き出す。
+        # read()は毎回新しいバッファを返すのでフレームのコピーは不要。
+        # 書き出し待ちのフレームがメモリに溜まり過ぎないよう、未完了数を制限する
+        max_workers = os.cpu_count() or 4
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for frame_num, frame in self.extract_frames_generator():
+                filename = output_dir / f"{prefix}_{frame_num:06d}.jpg"
+                pending.append(pool.submit(cv2.imwrite, str(filename), frame))
+                if len(pending) >= max_workers * 2:
+                    pending.popleft().result()
+
+            for future in pending:
+                future.result()
 
         logger.info(f"Frames saved to {output_dir}")
 
@@ -205,6 +452,7 @@ class FrameExtractor:
         if self.cap:
             self.cap.release()
             self.cap = None
+        self._vr = None
 
     def __enter__(self):
         return self
@@ -213,6 +461,63 @@ class FrameExtractor:
         self.release()
 
 
+def prefetch(iterable, maxsize: int = 4) -> Generator:
+    """
+    イテレータの要素をバックグラウンドスレッドで先行して取り出すジェネレータ
+
+    デコード（CPU）と推論（GPU/C++）のように、生成側と消費側が
+    GILを解放する処理同士であれば両者を重ねて実行できる。
+    例: for batch in prefetch(extractor.extract_batches()): detector.detect_batch(...)
+
+    Args:
+        iterable: 先読みする反復可能オブジェクト
+        maxsize: 先読みする要素数の上限
+
+    Yields:
+        iterableの要素（順序は保持）
+    """
+    item_queue: "queue.Queue" = queue.Queue(maxsize=maxsize)
+    stop_event = threading.Event()
+    end_of_stream = object()
+    errors: List[BaseException] = []
+
+    def put(item) -> bool:
+        # 消費側が途中で終了した場合に備え、停止要求を確認しながら待つ
+        while not stop_event.is_set():
+            try:
+                item_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+        except Exception as e:
+            errors.append(e)
+        finally:
+            put(end_of_stream)
+
+    producer = threading.Thread(target=produce, name="frame-prefetch-producer", daemon=True)
+    producer.start()
+
+    try:
+        while True:
+            item = item_queue.get()
+            if item is end_of_stream:
+                break
+            yield item
+    finally:
+        stop_event.set()
+        producer.join()
+
+    if errors:
+        raise errors[0]
+
+
 def extract_frames_from_video(
     video_path: str,
     target_fps: int = 5,
@@ -272,18 +272,12 @@ class GazeAnalyzer:
         # マスク生成
         heat_mask = sal_enhanced > 0.1
 
-        # オーバーレイ
-        overlay = frame.copy().astype(np.float32)
-        heatmap_f = heatmap.astype(np.float32)
-
-        for i in range(3):
-            overlay[..., i] = np.where(
-                heat_mask,
-                frame[..., i] * (1 - alpha) + heatmap_f[..., i] * alpha,
-                frame[..., i]
-            )
-
-        return overlay.astype(np.uint8)
+        # オーバーレイ（uint8のままOpenCVで合成し、マスク部分のみ置き換える）
+        blended = cv2.addWeighted(frame, 1 - alpha, heatmap, alpha, 0)
+        overlay = frame.copy()
+        cv2.copyTo(blended, heat_mask.astype(np.uint8), overlay)
+
+        return overlay
 
     def create_gaze_plot(
         self,
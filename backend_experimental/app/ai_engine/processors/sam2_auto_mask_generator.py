@@ -82,7 +82,8 @@ class SAM2AutoMaskGenerator:
             cv2.CHAIN_APPROX_SIMPLE
         )
 
-        masks = []
+        # 面積で先に絞り込み、残った輪郭のマスクを1つの (N, H, W) 配列にまとめて確保
+        kept = []
         for i, contour in enumerate(contours):
             # 面積計算
             area = cv2.contourArea(contour)
@@ -90,12 +91,16 @@ class SAM2AutoMaskGenerator:
             # 小さすぎる領域は除外
             if area < self.min_mask_area:
                 continue
+            kept.append((i, contour, area))
+
+        mask_stack = np.zeros((len(kept), height, width), dtype=np.uint8)
 
+        masks = []
+        for (i, contour, area), mask in zip(kept, mask_stack):
             # バウンディングボックス
             x, y, w, h = cv2.boundingRect(contour)
 
-            # マスク生成
-            mask = np.zeros((height, width), dtype=np.uint8)
+            # マスク生成（mask_stackの1枚に直接描画）
             cv2.drawContours(mask, [contour], -1, 255, -1)
 
             # 中心座標
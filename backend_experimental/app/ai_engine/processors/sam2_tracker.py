@@ -15,11 +15,16 @@ import torch
 from typing import Dict, List, Any, Optional, Tuple
 import logging
 from pathlib import Path
-from collections import deque
 import base64
+import functools
+import importlib
+import importlib.util
+import threading
 from io import BytesIO
 from PIL import Image
 
+from .tip_kernels import tip_from_contour, TIP_FOUND, TIP_OUTSIDE_BBOX
+
 # SAM2のインポート
 try:
     from sam2.build_sam import build_sam2_video_predictor
@@ -30,6 +35,66 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# init_state中にSAM2のフレームローダーを差し替えるため、同時実行を防ぐ
+_INIT_STATE_LOCK = threading.Lock()
+
+# 共有Predictorの初回ロードを1スレッドに限定（同じモデルを同時に2回構築しない）
+_PREDICTOR_LOCK = threading.Lock()
+
+
+@functools.lru_cache(maxsize=4)
+def _load_predictor(
+    config_path: str,
+    checkpoint_path: str,
+    device: str,
+    autocast_dtype: torch.dtype,
+    use_compile: bool,
+    input_size: int
+):
+    """SAM2 Video Predictorを構築（引数ごとにキャッシュし、トラッカー間で共有）
+
+    推論状態はinference_stateとしてトラッカーごとに持つため、Predictor本体は共有できる
+    """
+    # 入力解像度は設定ファイルの値をHydraのオーバーライドで差し替える
+    predictor = build_sam2_video_predictor(
+        config_path, checkpoint_path, device=device,
+        hydra_overrides_extra=[f"++model.image_size={input_size}"]
+    )
+
+    if device == "cuda":
+        # 画像エンコーダの畳み込みをcuDNNのNHWCカーネルで実行
+        predictor.image_encoder.to(memory_format=torch.channels_last)
+
+        if use_compile:
+            _compile_image_encoder(predictor, device, autocast_dtype)
+
+    return predictor
+
+
+def _compile_image_encoder(predictor, device: str, autocast_dtype: torch.dtype) -> None:
+    """画像エンコーダをtorch.compile（reduce-overhead: カーネル融合 + CUDA Graph）
+
+    ウォームアップで1回実行してコンパイルとCUDA Graphのキャプチャを済ませる。
+    Tritonが無い環境（Windowsなど）やコンパイルに失敗した場合は通常実行のまま続行する
+    """
+    if importlib.util.find_spec("triton") is None:
+        logger.info("Triton not available, skipping torch.compile of SAM2 image encoder")
+        return
+
+    compiled_encoder = torch.compile(predictor.image_encoder, mode="reduce-overhead", dynamic=False)
+    image_size = predictor.image_size
+    dummy = torch.zeros(1, 3, image_size, image_size, device=device)
+
+    try:
+        with torch.inference_mode(), torch.autocast(device, dtype=autocast_dtype):
+            compiled_encoder(dummy.contiguous(memory_format=torch.channels_last))
+    except Exception as e:
+        logger.warning(f"torch.compile of SAM2 image encoder failed, using eager mode: {e}")
+        return
+
+    predictor.image_encoder = compiled_encoder
+    logger.info("SAM2 image encoder compiled with torch.compile (reduce-overhead)")
+
 
 class SAM2Tracker:
     """SAM2 Video Tracker
@@ -41,11 +106,30 @@ class SAM2Tracker:
     - Real-time Ready: Efficient Frame Pruning対応
     """
 
+    # SAM2のフレーム前処理の正規化パラメータ（sam2.utils.misc.load_video_framesと同じ）
+    IMG_MEAN = (0.485, 0.456, 0.406)
+    IMG_STD = (0.229, 0.224, 0.225)
+
+    # SAM2標準の入力解像度と、VRAMが少ないGPUで使う入力解像度
+    DEFAULT_INPUT_SIZE = 1024
+    LOW_VRAM_INPUT_SIZE = 512
+    LOW_VRAM_GB = 8.0
+
+    # 回転BBoxを計算しない場合の検出結果の値
+    _NO_ROTATED_INFO = {"rotated_bbox": None, "rotation_angle": None, "area_reduction": None}
+
+    # 軌跡リングバッファの長さと、検出結果に含める直近の点数
+    TRAJECTORY_LENGTH = 50
+    TRAJECTORY_TAIL = 10
+
     def __init__(self,
                  model_type: str = "small",  # "tiny", "small", "base_plus", "large"
                  checkpoint_path: Optional[str] = None,
                  config_path: Optional[str] = None,
-                 device: str = "cuda"):
+                 device: str = "cuda",
+                 use_compile: bool = True,
+                 input_size: Optional[int] = None,
+                 compute_rotated: bool = True):
         """
         初期化
 
@@ -54,6 +138,10 @@ class SAM2Tracker:
             checkpoint_path: モデルチェックポイントのパス
             config_path: 設定ファイルのパス
             device: 使用デバイス ("cuda" 推奨 for RTX 3060, "cpu" フォールバック)
+            use_compile: CUDA使用時に画像エンコーダをtorch.compileする（Tritonが必要）
+            input_size: SAM2の入力解像度（32の倍数、512/768/1024）。
+                Noneの場合はVRAM 8GB未満のGPUで512、それ以外は1024
+            compute_rotated: 検出結果に回転BBoxを含める（Falseの場合はNone）
         """
         if not SAM2_AVAILABLE:
             raise RuntimeError(
@@ -61,7 +149,11 @@ class SAM2Tracker:
                 "Please install: pip install sam2"
             )
 
+        if input_size is not None and (input_size <= 0 or input_size % 32 != 0):
+            raise ValueError(f"input_size must be a positive multiple of 32, got {input_size}")
+
         # GPU自動検出とフォールバック
+        vram_gb = None
         if device == "cuda" and not torch.cuda.is_available():
             logger.warning("CUDA not available, falling back to CPU")
             device = "cpu"
@@ -75,23 +167,61 @@ class SAM2Tracker:
 
         self.model_type = model_type
         self.device = device
+        self.autocast_dtype = self._select_autocast_dtype(device)
+        self.use_compile = use_compile
+        self.compute_rotated = compute_rotated
+        self.input_size = input_size if input_size is not None else self._select_input_size(vram_gb)
         self.predictor = None
         self.inference_state = None
 
         # トラッキング状態
         self.tracked_instruments: List[Dict[str, Any]] = []
-        self.trajectories: Dict[int, deque] = {}
+        self._inst_by_id: Dict[int, Dict[str, Any]] = {}  # obj_id -> tracked_instrumentsの要素
+        # 軌跡: 器具ごとの (TRAJECTORY_LENGTH, 2) リングバッファと書き込み位置（追加した点の総数）
+        self._traj_buf: Dict[int, np.ndarray] = {}
+        self._traj_head: Dict[int, int] = {}
         self.current_frame_idx = 0
 
         # detect_batch用の器具ID管理
         self.instrument_ids: List[int] = []
 
-        # 参照マスク（One-Shot Learning用）
-        self.reference_masks: Dict[int, np.ndarray] = {}
+        # detect_batch用のマスク転送バッファ（ピン留めメモリ、フレーム間で再利用）
+        self._d2h_buffer: Optional[torch.Tensor] = None
+
+        # propagate_in_video用のCUDAストリーム（共有Predictorを使う他のトラッカーと並行実行）
+        self._stream: Optional[torch.cuda.Stream] = torch.cuda.Stream() if device == "cuda" else None
+
+        # 参照マスク（One-Shot Learning用）: obj_id -> (np.packbitsで1画素1bitに詰めたマスク, (H, W))
+        self.reference_masks: Dict[int, Tuple[np.ndarray, Tuple[int, int]]] = {}
 
         # SAM2モデルのロード
         self._load_sam2_model(checkpoint_path, config_path)
 
+    @staticmethod
+    def _select_autocast_dtype(device: str) -> torch.dtype:
+        """推論時のautocast精度を選択
+
+        SM86（RTX 30系）ではFP16とBF16のTensor Core性能は同じで、FP16の方がカーネルが揃っている。
+        BF16非対応のGPU（SM80未満）もFP16。CPUのautocastはBF16のみ対応
+        """
+        if device != "cuda":
+            return torch.bfloat16
+
+        capability = torch.cuda.get_device_capability()
+        if capability < (8, 0) or capability == (8, 6) or not torch.cuda.is_bf16_supported():
+            return torch.float16
+        return torch.bfloat16
+
+    @classmethod
+    def _select_input_size(cls, vram_gb: Optional[float]) -> int:
+        """入力解像度の自動選択
+
+        画像エンコーダはメモリ帯域律速のため、VRAMの少ない（帯域も狭い）GPUでは512に下げる
+        """
+        if vram_gb is not None and vram_gb < cls.LOW_VRAM_GB:
+            return cls.LOW_VRAM_INPUT_SIZE
+        return cls.DEFAULT_INPUT_SIZE
+
     def _load_sam2_model(self, checkpoint_path: Optional[str], config_path: Optional[str]) -> None:
         """SAM2モデルをロード"""
         try:
@@ -127,16 +257,30 @@ class SAM2Tracker:
 
             logger.info(f"Loading SAM2 {self.model_type} model from {checkpoint_path}")
 
-            # SAM2 Video Predictor構築
-            self.predictor = build_sam2_video_predictor(
-                config_path,
-                str(checkpoint_path),
-                device=self.device
+            # 活性化メモリは解像度の2乗に比例
+            activation_ratio = (self.input_size / self.DEFAULT_INPUT_SIZE) ** 2
+            logger.info(
+                f"SAM2 input size: {self.input_size}px "
+                f"(activation memory x{activation_ratio:.2f} vs {self.DEFAULT_INPUT_SIZE}px)"
             )
 
+            # 同じモデル・デバイスのPredictorはインスタンス間で共有（重みを重複してロードしない）
+            with _PREDICTOR_LOCK:
+                self.predictor = _load_predictor(
+                    config_path,
+                    str(checkpoint_path.resolve()),
+                    self.device,
+                    self.autocast_dtype,
+                    self.use_compile,
+                    self.input_size
+                )
+
             if self.device == "cuda":
                 allocated_mb = torch.cuda.memory_allocated() / 1024**2
-                logger.info(f"SAM2 {self.model_type} loaded on GPU: {allocated_mb:.1f}MB VRAM allocated")
+                logger.info(
+                    f"SAM2 {self.model_type} loaded on GPU: {allocated_mb:.1f}MB VRAM allocated, "
+                    f"autocast={self.autocast_dtype}"
+                )
             else:
                 logger.info(f"SAM2 {self.model_type} loaded on CPU")
 
@@ -144,6 +288,69 @@ class SAM2Tracker:
             logger.error(f"Failed to load SAM2 model: {e}")
             raise
 
+    def _propagation_stream(self) -> torch.cuda.StreamContext:
+        """propagate_in_videoを実行するストリームのコンテキスト（CPUでは何もしない）
+
+        Predictorを共有する複数のトラッカーが、それぞれのストリームで並行してGPUを使えるようにする
+        """
+        if self._stream is not None:
+            # init_stateなどデフォルトストリームに積んだ処理の完了を待ってから実行
+            self._stream.wait_stream(torch.cuda.current_stream())
+        return torch.cuda.stream(self._stream)
+
+    def _preprocess_frames(self, frames: List[np.ndarray]) -> torch.Tensor:
+        """フレーム列をSAM2の入力テンソルに変換
+
+        SAM2のJPEGフォルダ読み込みと同じく、正方形へリサイズ・RGB化・正規化する
+
+        Args:
+            frames: BGRフレームのリスト
+
+        Returns:
+            (N, 3, image_size, image_size) float32テンソル（self.device上）
+        """
+        image_size = self.predictor.image_size
+        images = torch.empty(len(frames), 3, image_size, image_size, dtype=torch.float32, device=self.device)
+
+        # 1フレームずつ転送し、全フレームのuint8配列をまとめて保持しない
+        for i, frame in enumerate(frames):
+            resized = cv2.resize(frame, (image_size, image_size), interpolation=cv2.INTER_AREA)
+            rgb = cv2.cvtColor(resized, cv2.COLOR_BGR2RGB)
+            images[i] = torch.from_numpy(rgb).to(self.device).permute(2, 0, 1)
+
+        mean = torch.tensor(self.IMG_MEAN, dtype=torch.float32, device=self.device)[:, None, None]
+        std = torch.tensor(self.IMG_STD, dtype=torch.float32, device=self.device)[:, None, None]
+        images.div_(255.0).sub_(mean).div_(std)
+        return images
+
+    def _init_state_from_frames(self, frames: List[np.ndarray]) -> Dict[str, Any]:
+        """メモリ上のフレーム列からinference stateを作成（JPEGの保存・再読込なし）
+
+        SAM2のinit_stateはMP4かJPEGフォルダのパスしか受け付けないため、
+        init_stateが使うフレームローダーを前処理済みテンソルを返す関数に一時的に差し替える
+
+        Args:
+            frames: BGRフレームのリスト
+
+        Returns:
+            SAM2のinference state
+        """
+        images = self._preprocess_frames(frames)
+        video_height, video_width = frames[0].shape[:2]
+
+        def load_frames_from_memory(*args, **kwargs):
+            return images, video_height, video_width
+
+        predictor_module = importlib.import_module(type(self.predictor).init_state.__module__)
+
+        with _INIT_STATE_LOCK:
+            original_loader = predictor_module.load_video_frames
+            predictor_module.load_video_frames = load_frames_from_memory
+            try:
+                return self.predictor.init_state(video_path="<in-memory>", async_loading_frames=False)
+            finally:
+                predictor_module.load_video_frames = original_loader
+
     def _decode_mask(self, mask_b64: str) -> np.ndarray:
         """base64エンコードされたマスクをデコード
 
@@ -157,22 +364,23 @@ class SAM2Tracker:
             # base64デコード
             mask_bytes = base64.b64decode(mask_b64)
 
-            # PNG画像として読み込み
-            image = Image.open(BytesIO(mask_bytes))
-
-            # numpy配列に変換（グレースケール）
-            mask_array = np.array(image.convert('L'))
+            # PNGをOpenCVでグレースケールとしてデコード（PILより速い）
+            mask_array = cv2.imdecode(np.frombuffer(mask_bytes, np.uint8), cv2.IMREAD_GRAYSCALE)
+            if mask_array is None:
+                # OpenCVで読めない形式はPILにフォールバック
+                mask_array = np.array(Image.open(BytesIO(mask_bytes)).convert('L'))
 
             # バイナリマスクに変換（0 or 1）
-            mask_binary = (mask_array > 0).astype(np.uint8)
+            _, mask_binary = cv2.threshold(mask_array, 0, 1, cv2.THRESH_BINARY)
 
-            logger.debug(f"Decoded mask shape: {mask_binary.shape}, non-zero pixels: {np.sum(mask_binary)}")
+            logger.debug(f"Decoded mask shape: {mask_binary.shape}, non-zero pixels: {np.count_nonzero(mask_binary)}")
             return mask_binary
 
         except Exception as e:
             logger.error(f"Failed to decode mask from base64: {e}")
             raise ValueError(f"Invalid mask data: {e}")
 
+    @torch.inference_mode()
     def initialize_from_frames(
         self,
         frames: List[np.ndarray],
@@ -193,12 +401,9 @@ class SAM2Tracker:
         logger.info(f"Initializing SAM2 tracker with {len(frames)} frames, {len(instruments)} instruments")
 
         # SAM2のinference state初期化
-        with torch.inference_mode(), torch.autocast(self.device, dtype=torch.bfloat16):
+        with torch.autocast(self.device, dtype=self.autocast_dtype):
             # フレームリストから inference state を作成
-            self.inference_state = self.predictor.init_state(
-                video_path=frames,  # SAM2はフレームリストも受け入れ可能
-                async_loading_frames=False
-            )
+            self.inference_state = self._init_state_from_frames(frames)
 
             # 各器具について初期プロンプトを追加（Frame 0）
             for idx, instrument in enumerate(instruments):
@@ -207,14 +412,17 @@ class SAM2Tracker:
                 sel_type = selection.get("type")
 
                 # 器具情報を保存
-                self.tracked_instruments.append({
+                inst_info = {
                     "id": obj_id,
                     "name": instrument.get("name", f"instrument_{obj_id}"),
                     "color": instrument.get("color", "#00FF00")
-                })
+                }
+                self.tracked_instruments.append(inst_info)
+                self._inst_by_id[obj_id] = inst_info
 
-                # 軌跡デキュー初期化
-                self.trajectories[obj_id] = deque(maxlen=50)
+                # 軌跡リングバッファ初期化
+                self._traj_buf[obj_id] = np.zeros((self.TRAJECTORY_LENGTH, 2), dtype=np.int32)
+                self._traj_head[obj_id] = 0
 
                 if sel_type == "mask":
                     # マスク選択（最も正確）
@@ -228,7 +436,7 @@ class SAM2Tracker:
                         mask = self._decode_mask(mask_b64)
 
                         # 参照マスクとして保存（One-Shot Learning）
-                        self.reference_masks[obj_id] = mask
+                        self._store_reference_mask(obj_id, mask)
 
                         # SAM2にマスクプロンプトを追加
                         _, out_obj_ids, out_mask_logits = self.predictor.add_new_mask(
@@ -291,6 +499,7 @@ class SAM2Tracker:
 
         logger.info(f"SAM2 tracker initialized successfully with {len(self.tracked_instruments)} instruments")
 
+    @torch.inference_mode()
     def initialize_instruments(
         self,
         instruments: List[Dict[str, Any]],
@@ -305,7 +514,7 @@ class SAM2Tracker:
         """
         logger.info(f"Initializing {len(instruments)} instruments for SAM2")
 
-        with torch.inference_mode(), torch.autocast(self.device, dtype=torch.bfloat16):
+        with torch.autocast(self.device, dtype=self.autocast_dtype):
             for idx, instrument in enumerate(instruments):
                 obj_id = idx
                 self.instrument_ids.append(obj_id)
@@ -327,11 +536,12 @@ class SAM2Tracker:
                 # マスクがあれば使用（高精度）
                 mask = instrument.get("mask")
                 if mask is not None:
-                    self.reference_masks[obj_id] = mask
+                    self._store_reference_mask(obj_id, mask)
                     logger.debug(f"Instrument {idx} reference mask stored")
 
         logger.info(f"Initialized {len(self.instrument_ids)} instruments")
 
+    @torch.inference_mode()
     def track_all_frames(self) -> List[Dict[str, Any]]:
         """全フレームで器具を追跡
 
@@ -354,34 +564,40 @@ class SAM2Tracker:
 
         logger.info("Starting SAM2 video propagation...")
 
-        with torch.inference_mode(), torch.autocast(self.device, dtype=torch.bfloat16):
+        with torch.autocast(self.device, dtype=self.autocast_dtype), \
+                self._propagation_stream():
             # SAM2のメモリバンク機構で全フレームに伝播
             for frame_idx, object_ids, masks in self.predictor.propagate_in_video(self.inference_state):
                 frame_detections = []
 
                 for obj_id, mask_logits in zip(object_ids, masks):
-                    # マスクlogitsを2値マスクに変換
-                    mask = (mask_logits > 0.0).cpu().numpy().squeeze()
+                    # 2値化とBBox計算はデバイス上で行い、BBox部分のマスクだけCPUへ転送
+                    cropped = self._crop_mask_on_device(mask_logits)
 
-                    if mask.sum() == 0:
+                    if cropped is None:
                         logger.debug(f"Frame {frame_idx}, obj {obj_id}: Empty mask, skipping")
                         continue
 
-                    # マスクからBBoxを計算
-                    bbox = self._compute_bbox_from_mask(mask)
+                    # 輪郭抽出・BBoxを1回だけ計算し、以下の処理で共有（座標はフレーム全体基準）
+                    mask, offset = cropped
+                    mask_info = self._analyze_mask(mask, offset)
+                    bbox = mask_info["bbox"]
 
                     # 先端点を検出
-                    tip_point = self._detect_instrument_tip(mask, bbox)
+                    tip_point = self._detect_instrument_tip(mask, bbox, mask_info)
 
-                    # Rotated BBox計算
-                    rotated_info = self._compute_rotated_bbox(mask)
+                    # Rotated BBox計算（_analyze_mask()の輪郭・BBoxを再利用）
+                    if self.compute_rotated:
+                        rotated_info = self._compute_rotated_bbox(mask, mask_info)
+                    else:
+                        rotated_info = self._NO_ROTATED_INFO
 
                     # 軌跡に追加
                     centroid = self._get_bbox_center(bbox)
-                    self.trajectories[obj_id].append(centroid)
+                    self._append_trajectory(obj_id, centroid)
 
                     # 器具情報を検索
-                    inst_info = next((inst for inst in self.tracked_instruments if inst["id"] == obj_id), None)
+                    inst_info = self._inst_by_id.get(obj_id)
                     if not inst_info:
                         logger.warning(f"Instrument info not found for obj_id={obj_id}")
                         continue
@@ -395,7 +611,7 @@ class SAM2Tracker:
                         "confidence": 0.95,  # SAM2は高信頼度
                         "track_id": obj_id,
                         "color": inst_info["color"],
-                        "trajectory": list(self.trajectories[obj_id])[-10:],
+                        "trajectory": self._recent_trajectory(obj_id),
                         "tip_point": list(tip_point) if tip_point else None,
                         "tip_confidence": 0.95 if tip_point else 0.0
                     })
@@ -414,135 +630,236 @@ class SAM2Tracker:
     def _compute_bbox_from_mask(self, mask: np.ndarray) -> List[int]:
         """マスクからBBoxを計算
 
+        行・列ごとのanyで範囲を求める（画素座標の配列を作らない）
+
         Args:
             mask: バイナリマスク (H, W)
 
         Returns:
             [x1, y1, x2, y2]
         """
-        if mask.sum() == 0:
+        rows = np.any(mask, axis=1)
+        if not rows.any():
             return [0, 0, 0, 0]
+        cols = np.any(mask, axis=0)
 
-        y_coords, x_coords = np.where(mask > 0)
-        x1, y1 = int(x_coords.min()), int(y_coords.min())
-        x2, y2 = int(x_coords.max()), int(y_coords.max())
+        y1 = int(rows.argmax())
+        y2 = int(len(rows) - 1 - rows[::-1].argmax())
+        x1 = int(cols.argmax())
+        x2 = int(len(cols) - 1 - cols[::-1].argmax())
 
         return [x1, y1, x2, y2]
 
-    def _compute_rotated_bbox(self, mask: np.ndarray) -> Dict[str, Any]:
+    def _crop_mask_on_device(self, mask_logits: torch.Tensor) -> Optional[Tuple[np.ndarray, Tuple[int, int]]]:
+        """マスクlogitsの2値化とBBox計算をデバイス上で行い、BBox部分だけをCPUへ転送
+
+        フレーム全体のマスクを転送せず、同期もBBoxインデックスの取得1回にまとめる
+
+        Args:
+            mask_logits: SAM2の出力logits (1, H, W) または (H, W)
+
+        Returns:
+            (BBoxで切り出したboolマスク, (x1, y1)オフセット)、空マスクはNone
+        """
+        mask = (mask_logits > 0.0).squeeze()
+        rows = mask.any(dim=1).to(torch.uint8)
+        cols = mask.any(dim=0).to(torch.uint8)
+
+        # flip後のargmaxは末尾側から最初に見つかった位置
+        is_nonempty, y1, y2_from_end, x1, x2_from_end = torch.stack([
+            rows.max().long(),
+            rows.argmax(),
+            rows.flip(0).argmax(),
+            cols.argmax(),
+            cols.flip(0).argmax()
+        ]).tolist()
+
+        if not is_nonempty:
+            return None
+
+        y2 = rows.shape[0] - 1 - y2_from_end
+        x2 = cols.shape[0] - 1 - x2_from_end
+
+        cropped = mask[y1:y2 + 1, x1:x2 + 1].cpu().numpy()
+        return cropped, (x1, y1)
+
+    def _masks_to_host(self, mask_logits: torch.Tensor) -> np.ndarray:
+        """1フレーム分の全オブジェクトのマスクlogitsを2値化し、まとめてCPUへ転送
+
+        CUDAではピン留めバッファへ非同期コピーし、同期はフレームごとに1回だけ行う。
+        バッファは次のフレームで上書きされるため、保持する場合は呼び出し側でコピーすること
+
+        Args:
+            mask_logits: (N, 1, H, W) のlogits
+
+        Returns:
+            (N, H, W) のboolマスク
+        """
+        masks = (mask_logits > 0.0).to(torch.uint8).reshape(-1, *mask_logits.shape[-2:])
+
+        if masks.device.type != "cuda":
+            return masks.numpy().view(np.bool_)
+
+        if self._d2h_buffer is None or self._d2h_buffer.shape != masks.shape:
+            self._d2h_buffer = torch.empty(masks.shape, dtype=torch.uint8, pin_memory=True)
+
+        self._d2h_buffer.copy_(masks, non_blocking=True)
+        torch.cuda.current_stream().synchronize()
+        return self._d2h_buffer.numpy().view(np.bool_)
+
+    def _analyze_mask(self, mask: np.ndarray, offset: Tuple[int, int] = (0, 0)) -> Dict[str, Any]:
+        """BBox・先端検出・回転BBoxが共通で使うマスクの走査結果を計算
+
+        Args:
+            mask: バイナリマスク (H, W)。切り出したマスクの場合はoffsetを指定
+            offset: 切り出し位置 (x, y)。輪郭・BBoxはこの分ずらした座標で返す
+
+        Returns:
+            {
+                "binary": uint8マスク（0 or 1、入力と同じ範囲）,
+                "offset": (x, y),
+                "contours": 外側輪郭のリスト,
+                "largest_contour": 面積最大の輪郭（空マスクはNone）,
+                "centroid": 重心 (x, y) float（空マスクはNone）,
+                "principal_axis": 主軸の単位ベクトル（5画素未満はNone）,
+                "bbox": [x1, y1, x2, y2]
+            }
+        """
+        if mask.dtype == np.bool_:
+            mask_binary = np.ascontiguousarray(mask).view(np.uint8)
+        else:
+            mask_binary = (mask > 0).astype(np.uint8)
+
+        contours, _ = cv2.findContours(
+            mask_binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE, offset=offset
+        )
+
+        # 画像モーメントを1回の走査で求め、重心・主軸をまとめて計算
+        # （画素座標の配列を作らずに、中心モーメントから共分散行列が得られる）
+        ox, oy = offset
+        moments = cv2.moments(mask_binary, binaryImage=True)
+        area = moments["m00"]
+        centroid = None
+        principal_axis = None
+
+        # BBoxは行・列のanyで求める（(N, 2) 座標の軸ごとのmin/maxより速い）
+        x1, y1, x2, y2 = self._compute_bbox_from_mask(mask_binary)
+
+        if area > 0:
+            centroid = (moments["m10"] / area + ox, moments["m01"] / area + oy)
+            if area >= 5:
+                cov = np.array([
+                    [moments["mu20"], moments["mu11"]],
+                    [moments["mu11"], moments["mu02"]]
+                ]) / area
+                principal_axis = self._compute_principal_axis(cov)
+
+        return {
+            "binary": mask_binary,
+            "offset": offset,
+            "contours": contours,
+            "largest_contour": max(contours, key=cv2.contourArea) if contours else None,
+            "centroid": centroid,
+            "principal_axis": principal_axis,
+            "bbox": [x1 + ox, y1 + oy, x2 + ox, y2 + oy]
+        }
+
+    @staticmethod
+    def _compute_principal_axis(cov: np.ndarray) -> np.ndarray:
+        """画素座標の2x2共分散行列から主軸（第1主成分）を計算
+
+        向きはcv2.PCAComputeに合わせ、絶対値の大きい成分（同程度ならy成分）を正にする
+
+        Args:
+            cov: (x, y) 座標の2x2共分散行列
+
+        Returns:
+            主軸の単位ベクトル (x, y)
+        """
+        _, eigenvectors = np.linalg.eigh(cov)
+        axis = eigenvectors[:, -1]
+
+        key = axis[1] if abs(axis[1]) >= abs(axis[0]) - 1e-6 else axis[0]
+        return -axis if key < 0 else axis
+
+    def _compute_rotated_bbox(self, mask: np.ndarray, mask_info: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """回転BBoxを計算
 
         Args:
             mask: バイナリマスク
+            mask_info: _analyze_mask()の結果（省略時はここで計算）
 
         Returns:
             {
-                "rotated_bbox": [[x, y], ...],  # 4点の座標
+                "rotated_bbox": [[x, y], ...],  # 4点の整数座標
                 "rotation_angle": float,
                 "area_reduction": float  # 通常BBoxとの面積比
             }
         """
-        mask_binary = (mask > 0).astype(np.uint8) * 255
-        contours, _ = cv2.findContours(mask_binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if mask_info is None:
+            mask_info = self._analyze_mask(mask)
+        largest_contour = mask_info["largest_contour"]
 
-        if not contours:
+        if largest_contour is None:
             return {
                 "rotated_bbox": [[0, 0], [0, 0], [0, 0], [0, 0]],
                 "rotation_angle": 0.0,
                 "area_reduction": 0.0
             }
 
-        largest_contour = max(contours, key=cv2.contourArea)
         rotated_rect = cv2.minAreaRect(largest_contour)
         box_points = cv2.boxPoints(rotated_rect)
 
         # 通常のBBoxと比較
-        normal_bbox = self._compute_bbox_from_mask(mask)
+        normal_bbox = mask_info["bbox"]
         normal_area = (normal_bbox[2] - normal_bbox[0]) * (normal_bbox[3] - normal_bbox[1])
         rotated_area = rotated_rect[1][0] * rotated_rect[1][1]
 
         area_reduction = 1.0 - (rotated_area / normal_area) if normal_area > 0 else 0.0
 
         return {
-            "rotated_bbox": box_points.tolist(),
+            "rotated_bbox": box_points.round().astype(np.int32).tolist(),
             "rotation_angle": float(rotated_rect[2]),
             "area_reduction": float(area_reduction)
         }
 
-    def _detect_instrument_tip(self, mask: np.ndarray, bbox: List[int]) -> Optional[Tuple[int, int]]:
+    def _detect_instrument_tip(
+        self,
+        mask: np.ndarray,
+        bbox: List[int],
+        mask_info: Optional[Dict[str, Any]] = None
+    ) -> Optional[Tuple[int, int]]:
         """器具の先端点を検出（PCA + 輪郭解析）
 
         Args:
             mask: バイナリマスク
             bbox: [x1, y1, x2, y2]
+            mask_info: _analyze_mask()の結果（省略時はここで計算）
 
         Returns:
             (x, y) 先端座標、失敗時はNone
         """
-        if mask.sum() == 0:
-            return None
-
         try:
-            # 輪郭抽出
-            mask_binary = (mask > 0).astype(np.uint8) * 255
-            contours, _ = cv2.findContours(mask_binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-            if not contours:
+            # 輪郭抽出（空マスクは輪郭なし）
+            if mask_info is None:
+                mask_info = self._analyze_mask(mask)
+            contour = mask_info["largest_contour"]
+
+            # 主軸・重心は_analyze_mask()で画素座標から計算済み
+            principal_axis = mask_info["principal_axis"]
+            if contour is None or principal_axis is None:
                 return None
 
-            contour = max(contours, key=cv2.contourArea)
-
-            # PCAで主軸を計算
-            y_coords, x_coords = np.where(mask > 0)
-            if len(x_coords) < 5:
-                return None
+            cx, cy = (int(v) for v in mask_info["centroid"])
 
-            coords = np.column_stack([x_coords, y_coords])
-            mean, eigenvectors = cv2.PCACompute(coords.astype(np.float32), mean=None)
-            principal_axis = eigenvectors[0]
-
-            # 重心計算
-            moments = cv2.moments(mask_binary)
-            if moments["m00"] == 0:
-                return None
-
-            cx = int(moments["m10"] / moments["m00"])
-            cy = int(moments["m01"] / moments["m00"])
-
-            # 輪郭上で主軸方向の最遠点を検出
-            max_dist = -1
-            tip_point = None
-
-            for pt in contour:
-                pt_coord = pt[0]
-                rel_pos = pt_coord - np.array([cx, cy])
-                projection = np.dot(rel_pos, principal_axis)
-
-                if projection > 0 and projection > max_dist:
-                    max_dist = projection
-                    tip_point = tuple(pt_coord)
-
-            # フォールバック: 負の方向も確認
-            if tip_point is None:
-                for pt in contour:
-                    pt_coord = pt[0]
-                    rel_pos = pt_coord - np.array([cx, cy])
-                    projection = np.dot(rel_pos, principal_axis)
-
-                    if projection < 0 and abs(projection) > max_dist:
-                        max_dist = abs(projection)
-                        tip_point = tuple(pt_coord)
+            # 輪郭上で主軸方向の最遠点を検出（射影・BBox判定はカーネルで1回の走査）
+            tx, ty, status = tip_from_contour(contour, (cx, cy), principal_axis, bbox)
 
             # BBox内に存在するか確認
-            if tip_point is not None:
-                x1, y1, x2, y2 = bbox
-                tx, ty = tip_point
-
-                if x1 <= tx <= x2 and y1 <= ty <= y2:
-                    return tip_point
-                else:
-                    logger.debug(f"Tip point ({tx}, {ty}) outside bbox {bbox}, using centroid")
-                    return (cx, cy)
+            if status == TIP_FOUND:
+                return (tx, ty)
+            if status == TIP_OUTSIDE_BBOX:
+                logger.debug(f"Tip point ({tx}, {ty}) outside bbox {bbox}, using centroid")
 
             # フォールバック: 重心
             return (cx, cy)
@@ -551,6 +868,7 @@ class SAM2Tracker:
             logger.warning(f"Tip detection error: {e}, using bbox center")
             return self._get_bbox_center(bbox)
 
+    @torch.inference_mode()
     def detect_batch(
         self,
         frames: List[np.ndarray],
@@ -583,103 +901,83 @@ class SAM2Tracker:
                 ]
             }
         """
-        from app.utils.temp_frame_storage import TemporaryFrameStorage
-
         logger.info(f"SAM2 detect_batch: {len(frames)} frames, {len(instruments)} instruments")
 
-        # 解析IDを生成（タイムスタンプベース）
-        import time
-        analysis_id = f"sam2_{int(time.time() * 1000)}"
+        # SAM2初期化（フレームはメモリ上から直接渡す）
+        logger.info("Initializing SAM2 Video Predictor")
+        self.inference_state = self._init_state_from_frames(frames)
+        logger.info("SAM2 inference state initialized")
 
-        # 一時フレームストレージ作成
-        storage = TemporaryFrameStorage(analysis_id)
+        # 器具を登録
+        self.initialize_instruments(instruments, frames[0])
+        logger.info(f"Initialized {len(self.instrument_ids)} instruments")
 
-        try:
-            # JPEG保存
-            logger.info(f"Saving {len(frames)} frames as JPEG (quality=95)")
-            jpeg_dir = storage.save_frames(frames, quality=95, parallel=True)
-            logger.info(f"JPEG folder created: {jpeg_dir}")
-
-            # SAM2初期化
-            logger.info("Initializing SAM2 Video Predictor")
-            self.inference_state = self.predictor.init_state(
-                video_path=str(jpeg_dir),
-                async_loading_frames=False
-            )
-            logger.info("SAM2 inference state initialized")
-
-            # 器具を登録
-            self.initialize_instruments(instruments, frames[0])
-            logger.info(f"Initialized {len(self.instrument_ids)} instruments")
-
-            # SAM2で全フレームを処理（propagate_in_videoは一度に全フレーム処理）
-            logger.info(f"Running SAM2 propagation on {len(frames)} frames...")
-            results = []
-
-            # propagate_in_videoはイテレータを返す（各フレームごと）
-            with torch.inference_mode(), torch.autocast(self.device, dtype=torch.bfloat16):
-                for frame_idx, object_ids, mask_logits in self.predictor.propagate_in_video(
-                    self.inference_state
-                ):
-                    frame_detections = []
-
-                    # 各器具について処理
-                    for inst_id in self.instrument_ids:
-                        try:
-                            # 該当器具のマスクを取得
-                            if inst_id in object_ids:
-                                obj_idx = list(object_ids).index(inst_id)
-                                mask_logit = mask_logits[obj_idx]
-
-                                # logitsを2値マスクに変換
-                                mask = (mask_logit > 0.0).cpu().numpy().squeeze()
-
-                                if mask.sum() == 0:
-                                    logger.debug(f"Frame {frame_idx} instrument {inst_id}: empty mask")
-                                    continue
-
-                                # マスク → BBox変換
-                                bbox = self._mask_to_bbox(mask)
-
-                                if bbox is not None:
-                                    # 回転BBox計算
-                                    rotated_bbox = self._get_rotated_bbox(mask)
-
-                                    # Tip検出
-                                    tip_point = self._detect_instrument_tip(mask, bbox)
-                                    tip_confidence = 0.9 if tip_point is not None else 0.0
-
-                                    # 信頼度計算（マスク面積ベース）
-                                    confidence = float(np.sum(mask)) / (mask.shape[0] * mask.shape[1])
-
-                                    frame_detections.append({
-                                        "bbox": bbox,
-                                        "mask": mask,
-                                        "confidence": confidence,
-                                        "rotated_bbox": rotated_bbox,
-                                        "tip_point": tip_point,
-                                        "tip_confidence": tip_confidence
-                                    })
-
-                        except Exception as e:
-                            logger.warning(f"Frame {frame_idx} instrument {inst_id} error: {e}")
-                            continue
-
-                    results.append({
-                        "frame_number": frame_idx,
-                        "detections": frame_detections
-                    })
+        # SAM2で全フレームを処理（propagate_in_videoは一度に全フレーム処理）
+        logger.info(f"Running SAM2 propagation on {len(frames)} frames...")
+        results = []
 
-            logger.info(f"SAM2 batch detection completed: {len(results)} frames")
+        # propagate_in_videoはイテレータを返す（各フレームごと）
+        with torch.autocast(self.device, dtype=self.autocast_dtype), \
+                self._propagation_stream():
+            for frame_idx, object_ids, mask_logits in self.predictor.propagate_in_video(
+                self.inference_state
+            ):
+                frame_detections = []
 
-            return {
-                "instrument_data": results
-            }
+                # logitsを2値マスクに変換（全器具分を1回で転送）
+                host_masks = self._masks_to_host(mask_logits)
+                id_to_idx = {int(obj_id): i for i, obj_id in enumerate(object_ids)}
+
+                # 各器具について処理
+                for inst_id in self.instrument_ids:
+                    try:
+                        # 該当器具のマスクを取得（転送バッファは再利用されるためコピー）
+                        obj_idx = id_to_idx.get(inst_id)
+                        if obj_idx is not None:
+                            mask = host_masks[obj_idx].copy()
+
+                            if not mask.any():
+                                logger.debug(f"Frame {frame_idx} instrument {inst_id}: empty mask")
+                                continue
+
+                            # 2値化・輪郭抽出・BBoxを1回だけ計算し、以下の処理で共有
+                            mask_info = self._analyze_mask(mask)
+                            bbox = mask_info["bbox"]
+
+                            if bbox is not None:
+                                # 回転BBox計算（_analyze_mask()の輪郭を再利用）
+                                rotated_bbox = self._get_rotated_bbox(mask, mask_info) if self.compute_rotated else None
+
+                                # Tip検出
+                                tip_point = self._detect_instrument_tip(mask, bbox, mask_info)
+                                tip_confidence = 0.9 if tip_point is not None else 0.0
+
+                                # 信頼度計算（マスク面積ベース）
+                                confidence = np.count_nonzero(mask) / mask.size
+
+                                frame_detections.append({
+                                    "bbox": bbox,
+                                    "mask": mask,
+                                    "confidence": confidence,
+                                    "rotated_bbox": rotated_bbox,
+                                    "tip_point": tip_point,
+                                    "tip_confidence": tip_confidence
+                                })
 
-        finally:
-            # 一時フォルダクリーンアップ
-            logger.info("Cleaning up temporary JPEG files")
-            storage.cleanup(ignore_errors=True)
+                    except Exception as e:
+                        logger.warning(f"Frame {frame_idx} instrument {inst_id} error: {e}")
+                        continue
+
+                results.append({
+                    "frame_number": frame_idx,
+                    "detections": frame_detections
+                })
+
+        logger.info(f"SAM2 batch detection completed: {len(results)} frames")
+
+        return {
+            "instrument_data": results
+        }
 
     def _mask_to_bbox(self, mask: np.ndarray) -> Optional[List[int]]:
         """マスクからBBoxを計算
@@ -690,50 +988,34 @@ class SAM2Tracker:
         Returns:
             [x1, y1, x2, y2] or None
         """
-        if mask is None or mask.sum() == 0:
+        if mask is None:
             return None
 
-        # マスクの座標を取得
-        coords = np.argwhere(mask > 0.5)
+        if mask.dtype != np.bool_:
+            mask = mask > 0.5
 
-        if len(coords) == 0:
+        if not mask.any():
             return None
 
-        # BBox計算
-        y_coords = coords[:, 0]
-        x_coords = coords[:, 1]
-
-        x1 = int(x_coords.min())
-        y1 = int(y_coords.min())
-        x2 = int(x_coords.max())
-        y2 = int(y_coords.max())
+        return self._compute_bbox_from_mask(mask)
 
-        return [x1, y1, x2, y2]
-
-    def _get_rotated_bbox(self, mask: np.ndarray) -> List[List[int]]:
+    def _get_rotated_bbox(self, mask: np.ndarray, mask_info: Optional[Dict[str, Any]] = None) -> List[List[int]]:
         """マスクから回転BBoxを計算
 
         Args:
             mask: セグメンテーションマスク (H, W)
+            mask_info: _analyze_mask()の結果（省略時はここで計算）
 
         Returns:
             [[x1,y1], [x2,y2], [x3,y3], [x4,y4]]
         """
-        if mask.sum() == 0:
-            return [[0, 0], [0, 0], [0, 0], [0, 0]]
-
         try:
-            # バイナリマスクに変換
-            mask_binary = (mask > 0).astype(np.uint8) * 255
-
-            # 輪郭抽出
-            contours, _ = cv2.findContours(
-                mask_binary,
-                cv2.RETR_EXTERNAL,
-                cv2.CHAIN_APPROX_SIMPLE
-            )
+            # 輪郭抽出（空マスクは輪郭なし）
+            if mask_info is None:
+                mask_info = self._analyze_mask(mask)
+            largest_contour = mask_info["largest_contour"]
 
-            if not contours:
+            if largest_contour is None:
                 # フォールバック: 通常のBBox
                 bbox = self._mask_to_bbox(mask)
                 if bbox is None:
@@ -745,20 +1027,11 @@ class SAM2Tracker:
                     [bbox[0], bbox[3]]
                 ]
 
-            # 最大輪郭を取得
-            largest_contour = max(contours, key=cv2.contourArea)
-
             # 回転矩形を計算
             rect = cv2.minAreaRect(largest_contour)
 
-            # 4点の座標を取得
-            box_points = cv2.boxPoints(rect)
-            box_points = np.intp(box_points)
-
-            # リスト形式に変換
-            rotated_bbox = [[int(pt[0]), int(pt[1])] for pt in box_points]
-
-            return rotated_bbox
+            # 4点の座標を取得し、整数座標のリスト形式に変換
+            return cv2.boxPoints(rect).round().astype(np.int32).tolist()
 
         except Exception as e:
             logger.warning(f"Rotated bbox calculation failed: {e}, using regular bbox")
@@ -776,3 +1049,41 @@ class SAM2Tracker:
         """BBoxの中心座標を計算"""
         x1, y1, x2, y2 = bbox
         return ((x1 + x2) // 2, (y1 + y2) // 2)
+
+    def _store_reference_mask(self, obj_id: int, mask: np.ndarray):
+        """参照マスクを1画素1bitに詰めて保存
+
+        参照マスクは初期化時に1回書き込み、再初期化時などにまれに読むだけなので、
+        展開のコストより保持するメモリ（uint8の1/8）を優先する
+        """
+        mask = np.asarray(mask)
+        self.reference_masks[obj_id] = (np.packbits(mask > 0, axis=-1), mask.shape)
+
+    def get_reference_mask(self, obj_id: int) -> Optional[np.ndarray]:
+        """保存した参照マスクを (H, W) のuint8マスク（0 or 1）として返す（未登録はNone）"""
+        if obj_id not in self.reference_masks:
+            return None
+        packed, (_, width) = self.reference_masks[obj_id]
+        return np.unpackbits(packed, axis=-1, count=width)
+
+    def _append_trajectory(self, obj_id: int, point: Tuple[int, int]):
+        """軌跡のリングバッファに点を追加（古い点は上書き）"""
+        head = self._traj_head[obj_id]
+        self._traj_buf[obj_id][head % self.TRAJECTORY_LENGTH] = point
+        self._traj_head[obj_id] = head + 1
+
+    def _recent_trajectory(self, obj_id: int) -> List[List[int]]:
+        """軌跡の直近TRAJECTORY_TAIL点を古い順に返す
+
+        Returns:
+            [[x, y], ...]
+        """
+        buf = self._traj_buf[obj_id]
+        head = self._traj_head[obj_id]
+        size = self.TRAJECTORY_LENGTH
+        n = min(head, self.TRAJECTORY_TAIL)
+
+        start = (head - n) % size
+        if start + n <= size:
+            return buf[start:start + n].tolist()
+        return buf[start:].tolist() + buf[:start + n - size].tolist()
@@ -244,12 +244,12 @@ class SAM2TrackerVideo:
                     if isinstance(sel_data, str):
                         # Base64デコード
                         mask_bytes = base64.b64decode(sel_data)
-                        # PILで画像として読み込み
-                        mask_image = Image.open(BytesIO(mask_bytes))
-                        # numpy配列に変換（グレースケール）
-                        mask = np.array(mask_image.convert('L'), dtype=np.uint8)
+                        # OpenCVでグレースケールとしてデコード（読めない形式はPIL）
+                        mask = cv2.imdecode(np.frombuffer(mask_bytes, np.uint8), cv2.IMREAD_GRAYSCALE)
+                        if mask is None:
+                            mask = np.array(Image.open(BytesIO(mask_bytes)).convert('L'), dtype=np.uint8)
                         # バイナリマスク（0 or 255 → 0 or 1）
-                        mask = (mask > 127).astype(np.uint8)
+                        _, mask = cv2.threshold(mask, 127, 1, cv2.THRESH_BINARY)
                         logger.info(f"[SAM2 Video API] Decoded mask shape: {mask.shape}")
                     else:
                         # すでにnumpy配列の場合（後方互換性）
@@ -310,7 +310,7 @@ class SAM2TrackerVideo:
                             mask_logits = out_mask_logits[i].cpu().numpy()
                             temp_mask = mask_logits > 0.0  # 仮マスク（閾値0で全領域）
 
-                            if temp_mask.sum() > 0:
+                            if temp_mask.any():
                                 # マスクの次元を確認して2次元に変換
                                 temp_mask_2d = temp_mask.squeeze() if temp_mask.ndim > 2 else temp_mask
                                 y_coords, x_coords = np.where(temp_mask_2d)
@@ -351,7 +351,7 @@ class SAM2TrackerVideo:
                         masks[obj_id] = mask
 
                         # 🆕 Phase 4: 次フレーム用に中心座標を保存
-                        if use_dynamic and mask.sum() > 0:
+                        if use_dynamic and mask.any():
                             # マスクの次元を確認して2次元に変換
                             mask_2d = mask.squeeze() if mask.ndim > 2 else mask
                             y_coords, x_coords = np.where(mask_2d)
@@ -416,7 +416,7 @@ class SAM2TrackerVideo:
                 mask = masks[obj_id]
 
                 # マスクから情報を抽出
-                if mask.sum() == 0:
+                if not mask.any():
                     # 空のマスク
                     if is_first_inst and frame_idx < 5:  # 最初の5フレームのみログ
                         logger.info(f"[DEBUG] Frame {frame_idx}: Empty mask (sum=0) before normalization, shape={mask.shape}, dtype={mask.dtype}")
@@ -433,8 +433,9 @@ class SAM2TrackerVideo:
                 elif mask.ndim > 4:
                     raise ValueError(f"[SAM2 Video API] Unexpected mask dimension: {mask.ndim}, shape={mask.shape}")
 
-                # 正規化後に再度空マスクチェック
-                if mask.sum() == 0:
+                # 正規化後に再度空マスクチェック（画素数は信頼度計算でも使う）
+                mask_area = np.count_nonzero(mask)
+                if mask_area == 0:
                     # 正規化後も空のマスク
                     if is_first_inst and frame_idx < 5:
                         logger.info(f"[DEBUG] Frame {frame_idx}: Empty mask (sum=0) after normalization, original_shape={original_shape}, normalized_shape={mask.shape}")
@@ -443,7 +444,6 @@ class SAM2TrackerVideo:
                 # 🆕 最小面積フィルタ（ノイズ除去）
                 from app.core.config import settings
                 min_area = settings.SAM2_MIN_MASK_AREA
-                mask_area = mask.sum()
                 if mask_area < min_area:
                     if is_first_inst and frame_idx < 5:
                         logger.info(f"[QUALITY] Frame {frame_idx}: Small mask filtered (area={mask_area} < {min_area})")
@@ -453,24 +453,22 @@ class SAM2TrackerVideo:
                 if frame_idx < 3 and is_first_inst:
                     if original_shape != mask.shape:
                         logger.info(f"[DEBUG] Frame {frame_idx}: Normalized mask: {original_shape} → {mask.shape}")
-                    logger.info(f"[DEBUG] Frame {frame_idx}: Mask info - shape={mask.shape}, dtype={mask.dtype}, sum={mask.sum()}, min={mask.min()}, max={mask.max()}")
+                    logger.info(f"[DEBUG] Frame {frame_idx}: Mask info - shape={mask.shape}, dtype={mask.dtype}, sum={mask_area}, min={mask.min()}, max={mask.max()}")
 
-                # 重心計算
-                y_coords, x_coords = np.where(mask)
-
-                # 空配列チェック（念のため）
-                if len(x_coords) == 0 or len(y_coords) == 0:
-                    continue
-                center_x = float(np.mean(x_coords))
-                center_y = float(np.mean(y_coords))
+                # 重心・BBox計算（列・行ごとの画素数から求め、座標配列を作らない）
+                col_counts = np.count_nonzero(mask, axis=0)
+                row_counts = np.count_nonzero(mask, axis=1)
+                center_x = float(col_counts @ np.arange(len(col_counts))) / mask_area
+                center_y = float(row_counts @ np.arange(len(row_counts))) / mask_area
 
                 # バウンディングボックス
-                x_min, x_max = float(x_coords.min()), float(x_coords.max())
-                y_min, y_max = float(y_coords.min()), float(y_coords.max())
+                cols = col_counts > 0
+                rows = row_counts > 0
+                x_min, x_max = float(cols.argmax()), float(len(cols) - 1 - cols[::-1].argmax())
+                y_min, y_max = float(rows.argmax()), float(len(rows) - 1 - rows[::-1].argmax())
 
                 # 🆕 改善された信頼度計算（手術器具最適化版）
                 # マスクの品質に基づいた信頼度スコア（0.0～1.0）
-                mask_area = mask.sum()
                 bbox_width = x_max - x_min
                 bbox_height = y_max - y_min
                 bbox_area = bbox_width * bbox_height
@@ -564,24 +562,25 @@ class SAM2TrackerVideo:
         return np.array([center], dtype=np.float32)
 
     def _mask_to_bbox(self, mask: np.ndarray) -> List[float]:
-        """マスクからBBoxを抽出"""
-        if mask.sum() == 0:
+        """マスクからBBoxを抽出（行・列ごとのanyで範囲を求め、座標配列を作らない）"""
+        rows = np.any(mask, axis=1)
+        if not rows.any():
             return [0, 0, 0, 0]
+        cols = np.any(mask, axis=0)
 
-        y_coords, x_coords = np.where(mask)
-        x_min, x_max = float(x_coords.min()), float(x_coords.max())
-        y_min, y_max = float(y_coords.min()), float(y_coords.max())
+        x_min, x_max = float(cols.argmax()), float(len(cols) - 1 - cols[::-1].argmax())
+        y_min, y_max = float(rows.argmax()), float(len(rows) - 1 - rows[::-1].argmax())
 
         return [x_min, y_min, x_max, y_max]
 
     def _calculate_mask_center(self, mask: np.ndarray) -> List[float]:
         """マスクの中心を計算"""
-        if mask.sum() == 0:
+        if not mask.any():
             return [0.0, 0.0]
 
-        y_coords, x_coords = np.where(mask)
-        center_x = float(np.mean(x_coords))
-        center_y = float(np.mean(y_coords))
+        area = np.count_nonzero(mask)
+        center_x = float(np.count_nonzero(mask, axis=0) @ np.arange(mask.shape[1])) / area
+        center_y = float(np.count_nonzero(mask, axis=1) @ np.arange(mask.shape[0])) / area
 
         return [center_x, center_y]
 
@@ -9,6 +9,8 @@ SAM (Segment Anything Model) 一本化実装
 """
 
 import cv2
+import contextlib
+import importlib.util
 import numpy as np
 from typing import Dict, List, Any, Optional, Tuple
 import logging
@@ -18,6 +20,9 @@ import base64
 from io import BytesIO
 from PIL import Image
 
+from .frame_extractor import prefetch
+from .tip_kernels import tip_from_contour, TIP_FOUND, TIP_OUTSIDE_BBOX
+
 # SAMのインポート
 try:
     from segment_anything import sam_model_registry, SamPredictor, SamAutomaticMaskGenerator
@@ -26,8 +31,34 @@ except ImportError:
     SAM_AVAILABLE = False
     logging.error("SAM library not available. Please install: pip install segment-anything")
 
+# MobileSAM（任意）: 画像エンコーダをTinyViTに置き換えたSAM（model_type="vit_t"）。
+# プロンプトエンコーダ・マスクデコーダはSAMと同じなのでSamPredictorでそのまま使える
+try:
+    from mobile_sam import sam_model_registry as mobile_sam_model_registry
+    MOBILE_SAM_AVAILABLE = True
+except ImportError:
+    MOBILE_SAM_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# BBox精緻化のノイズ除去（Opening）に使うカーネル
+_MORPH_KERNEL = np.ones((3, 3), np.uint8)
+
+# detect_batchで画像エンコーダに一度に入力する既定のフレーム数
+# （torch.compile時はこの枚数と1枚の2つの形状をロード時にコンパイルする）
+DEFAULT_ENCODER_BATCH_SIZE = 4
+
+# auto_detect_instrumentsの自動マスク生成の設定
+# 上位数個しか採用しないので、既定（32x32点・64点ずつ）よりグリッドを粗くし、1回のデコードで多くの点を処理する
+_AUTO_MASK_GENERATOR_PARAMS = {
+    "points_per_side": 16,
+    "points_per_batch": 128,
+    "pred_iou_thresh": 0.85,
+    "stability_score_thresh": 0.9,
+    "crop_n_layers": 0,
+    "min_mask_region_area": 400,
+}
+
 
 class SAMTrackerUnified:
     """SAM一本化トラッカー
@@ -42,15 +73,17 @@ class SAMTrackerUnified:
                  model_type: str = "vit_h",
                  checkpoint_path: Optional[str] = None,
                  device: str = "cuda",
-                 use_mock: bool = False):
+                 use_mock: bool = False,
+                 use_compile: bool = True):
         """
         初期化
 
         Args:
-            model_type: SAMモデルタイプ ("vit_h" 推奨, "vit_l", "vit_b")
+            model_type: SAMモデルタイプ ("vit_h" 推奨, "vit_l", "vit_b", "vit_t": MobileSAM・要mobile_sam)
             checkpoint_path: モデルチェックポイントのパス
             device: 使用デバイス ("cuda" 推奨 for RTX 3060, "cpu" フォールバック)
             use_mock: Trueの場合、SAMモデルをロードせずダミー結果を返す
+            use_compile: CUDA使用時に画像エンコーダをtorch.compileする（デバッグ時はFalse）
         """
         self.use_mock = use_mock
 
@@ -96,9 +129,22 @@ class SAMTrackerUnified:
 
         self.model_type = model_type
         self.device = device
+        # 推論時のautocast精度（CPUではNone: autocastを使わない）
+        self.autocast_dtype = self._select_autocast_dtype(device)
+        self.use_compile = use_compile
+        # 画像エンコーダがtorch.compile済みか（_compile_image_encoder、バッチの端数のパディングに使う）
+        self._encoder_compiled = False
         self.predictor: Optional[SamPredictor] = None
         self.mask_generator: Optional[SamAutomaticMaskGenerator] = None
         self.current_image: Optional[np.ndarray] = None
+        # マスクのGPU→CPU転送用ピン留めバッファ（_masks_to_host）
+        self._d2h_buffer = None
+        # フレームのCPU→GPU転送用ピン留めバッファと、その転送完了イベント・転送専用ストリーム（_upload_frame）
+        self._staging_buffer = None
+        self._staging_done = None
+        self._copy_stream = None
+        # 全点前景のラベルテンソル（(プロンプト数, 点数) -> デバイス上のテンソル、_positive_labels）
+        self._positive_labels_cache: Dict[Tuple[int, int], Any] = {}
 
         # GPU最適化: 画像リサイズ用のパラメータ
         self.scale_factor: float = 1.0
@@ -139,6 +185,10 @@ class SAMTrackerUnified:
                     checkpoint_path = Path("sam_b.pt")
                     if not checkpoint_path.exists():
                         checkpoint_path = Path("backend_experimental/sam_b.pt")
+                elif self.model_type == "vit_t":
+                    checkpoint_path = Path("mobile_sam.pt")
+                    if not checkpoint_path.exists():
+                        checkpoint_path = Path("backend_experimental/mobile_sam.pt")
                 else:
                     raise ValueError(f"Unsupported model_type: {self.model_type}")
             else:
@@ -147,7 +197,8 @@ class SAMTrackerUnified:
             if not checkpoint_path.exists():
                 download_urls = {
                     "vit_h": "https://dl.fbaipublicfiles.com/segment_anything/sam_vit_h_4b8939.pth",
-                    "vit_b": "https://github.com/facebookresearch/segment-anything"
+                    "vit_b": "https://github.com/facebookresearch/segment-anything",
+                    "vit_t": "https://github.com/ChaoningZhang/MobileSAM/raw/master/weights/mobile_sam.pt"
                 }
                 download_url = download_urls.get(self.model_type, "https://github.com/facebookresearch/segment-anything")
 
@@ -157,15 +208,31 @@ class SAMTrackerUnified:
                 )
 
             logger.info(f"Loading SAM {self.model_type} model from {checkpoint_path}")
-            sam = sam_model_registry[self.model_type](checkpoint=str(checkpoint_path))
+            if self.model_type == "vit_t":
+                if not MOBILE_SAM_AVAILABLE:
+                    raise RuntimeError(
+                        "MobileSAM (model_type='vit_t') is not installed. "
+                        "Please install: pip install git+https://github.com/ChaoningZhang/MobileSAM.git"
+                    )
+                sam = mobile_sam_model_registry[self.model_type](checkpoint=str(checkpoint_path))
+            else:
+                sam = sam_model_registry[self.model_type](checkpoint=str(checkpoint_path))
 
             # GPU最適化
             sam.to(device=self.device)
-            # 注: FP16モードは型変換の問題があるため、FP32で動作
-            # RTX 3060でもFP32で十分高速（約50ms/frame）
+            # 注: 重みはFP32のまま保持し、推論はautocast（_inference_context）で低精度化する
+            # （重みごとFP16に変換すると入力との型不一致が起きる）
+            if self.device == "cuda":
+                import torch
+                # autocast対象外のFP32行列積・畳み込みもTensor Core（TF32）で実行
+                torch.backends.cuda.matmul.allow_tf32 = True
+                torch.backends.cudnn.allow_tf32 = True
 
+            # 自動マスク生成器はauto_detect_instrumentsで初めて必要になった時に作る（_get_mask_generator）
             self.predictor = SamPredictor(sam)
-            self.mask_generator = SamAutomaticMaskGenerator(sam)
+
+            if self.device == "cuda" and self.use_compile:
+                self._compile_image_encoder()
 
             if self.device == "cuda":
                 try:
@@ -181,27 +248,120 @@ class SAMTrackerUnified:
             logger.error(f"Failed to load SAM model: {e}")
             raise
 
-    def set_image(self, image: np.ndarray) -> None:
+    def _compile_image_encoder(self) -> None:
+        """画像エンコーダをtorch.compile（reduce-overhead: カーネル融合 + CUDA Graph）
+
+        エンコーダの入力は常にimg_size四方にパディングされるので、形状はバッチサイズだけで決まる。
+        ロード時にset_image・自動マスク生成の1枚と、detect_batchのDEFAULT_ENCODER_BATCH_SIZE枚で
+        ダミー画像を実行してコンパイルを済ませる（初回リクエストで待たせない）。
+        detect_batchの端数のチャンクはencoder_batch_sizeまでパディングするので新しい形状は増えない
+        （既定以外のencoder_batch_sizeを指定した場合は、その初回だけコンパイルが走る）。
+        Tritonが無い環境（Windowsなど）やコンパイルに失敗した場合は通常実行のまま続行する
+        """
+        if importlib.util.find_spec("triton") is None:
+            logger.info("Triton not available, skipping torch.compile of SAM image encoder")
+            return
+
+        import torch
+
+        model = self.predictor.model
+        compiled_encoder = torch.compile(model.image_encoder, mode="reduce-overhead", dynamic=False)
+        img_size = model.image_encoder.img_size
+
+        try:
+            with self._inference_context():
+                for batch_size in sorted({1, DEFAULT_ENCODER_BATCH_SIZE}):
+                    compiled_encoder(torch.zeros(batch_size, 3, img_size, img_size, device=self.device))
+        except Exception as e:
+            logger.warning(f"torch.compile of SAM image encoder failed, using eager mode: {e}")
+            return
+
+        # 自動マスク生成器も同じSamから作るので、コンパイル済みのエンコーダを使う
+        model.image_encoder = compiled_encoder
+        self._encoder_compiled = True
+        logger.info("SAM image encoder compiled with torch.compile (reduce-overhead)")
+
+    @staticmethod
+    def _select_autocast_dtype(device: str):
+        """推論時のautocast精度を選択（SAM2Trackerと同じ基準）
+
+        SM86（RTX 30系）とBF16非対応のGPUはFP16、それ以外のGPUはBF16。
+        CPUはNone（autocastを使わずFP32で推論）
+        """
+        if device != "cuda":
+            return None
+
+        import torch
+        capability = torch.cuda.get_device_capability()
+        if capability < (8, 0) or capability == (8, 6) or not torch.cuda.is_bf16_supported():
+            return torch.float16
+        return torch.bfloat16
+
+    def _inference_context(self) -> contextlib.ExitStack:
+        """SAMの推論呼び出しを囲むコンテキスト（inference_mode + autocast）
+
+        画像特徴量とマスクデコーダを同じ精度で実行するため、
+        エンコード（set_image / _encode_frames）と予測の両方をこの中で呼ぶ
+        """
+        import torch
+
+        stack = contextlib.ExitStack()
+        stack.enter_context(torch.inference_mode())
+        if self.autocast_dtype is not None:
+            stack.enter_context(torch.autocast(self.device, dtype=self.autocast_dtype))
+        return stack
+
+    def set_image(
+        self,
+        image: np.ndarray,
+        features: Optional[Any] = None,
+        prepared: Optional[Tuple[Any, float, Tuple[int, int]]] = None
+    ) -> None:
         """
         画像をSAMにセット（GPU最適化: リサイズで高速化）
 
         Args:
             image: 入力画像 (BGR)
+            features: _encode_frames()で計算済みの画像特徴量 (1, C, H, W)。
+                指定した場合は画像エンコーダを実行しない
+            prepared: imageに対する_prepare_image()の結果。指定した場合は縮小を省く
         """
         if self.use_mock:
             self._mock_image = image
             return
 
-        # BGRからRGBに変換
-        if len(image.shape) == 3 and image.shape[2] == 3:
-            image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        resized_image, scale, original_shape = prepared if prepared is not None else self._prepare_image(image)
+
+        # リサイズした画像でエンコード（計算済みの特徴量があればそれを使う）
+        if features is None:
+            with self._inference_context():
+                self.predictor.set_torch_image(self._to_input_tensor(resized_image), tuple(resized_image.shape[:2]))
         else:
-            image_rgb = image
+            self._set_image_features(resized_image, features)
+        self.current_image = resized_image
+
+        # 座標変換のためのスケール係数を保存
+        self.scale_factor = scale
+        self.original_shape = original_shape
+
+    def _prepare_image(self, image: np.ndarray) -> Tuple[Any, float, Tuple[int, int]]:
+        """
+        画像をエンコード用に縮小
 
+        CUDAではuint8のままGPUに転送し、RGB変換と縮小（F.interpolate）をGPU上で行う（CPUでは画像に触れない）。
+        CPUではcv2.resizeで縮小し、色空間はBGRのまま（RGB変換は_to_input_tensor()で行う）
+
+        Args:
+            image: 入力画像 (BGR)
+
+        Returns:
+            (縮小した画像, スケール係数, 元画像の (H, W))
+            縮小した画像はCUDAではRGBのfloat torch.Tensor (H, W, 3)、CPUではBGRのnp.ndarray
+        """
         # GPU最適化: 画像をリサイズしてエンコード時間を短縮
         # 元サイズ（1214x620）→ 640x480に縮小
         # エンコード速度2-3倍向上、精度への影響は最小限
-        original_shape = image_rgb.shape[:2]  # (H, W)
+        original_shape = image.shape[:2]  # (H, W)
         target_size = 640
 
         # アスペクト比を維持してリサイズ
@@ -209,15 +369,139 @@ class SAMTrackerUnified:
         scale = target_size / max(h, w)
         new_h, new_w = int(h * scale), int(w * scale)
 
-        resized_image = cv2.resize(image_rgb, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        if self.device == "cuda":
+            import torch.nn.functional as F
 
-        # リサイズした画像でエンコード
-        self.predictor.set_image(resized_image)
-        self.current_image = resized_image
+            image_torch = self._upload_frame(image)[..., [2, 1, 0]]
+            image_torch = image_torch.permute(2, 0, 1)[None, :, :, :].float()
+            image_torch = F.interpolate(image_torch, size=(new_h, new_w), mode="bilinear", align_corners=False)
+            return image_torch[0].permute(1, 2, 0), scale, original_shape
 
-        # 座標変換のためのスケール係数を保存
-        self.scale_factor = scale
-        self.original_shape = original_shape
+        resized_image = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        return resized_image, scale, original_shape
+
+    def _upload_frame(self, image: np.ndarray):
+        """
+        uint8のフレームをピン留めバッファ経由でデバイスへ非同期転送
+
+        バッファはフレームサイズが変わらない限り再利用し、前回の転送が終わってから上書きする。
+        転送は専用ストリームで行い、呼び出し側のストリームは転送完了だけを待つ
+        （detect_batchでは、次のチャンクの転送が既定ストリームに積まれたエンコーダの後ろに並ばず、計算と重なる）
+
+        Args:
+            image: 入力画像 (H, W, 3) uint8
+
+        Returns:
+            デバイス上の torch.Tensor (H, W, 3) uint8
+        """
+        import torch
+
+        device = self.predictor.device
+        if device.type != "cuda":
+            return torch.from_numpy(np.ascontiguousarray(image)).to(device)
+
+        if self._staging_buffer is None or tuple(self._staging_buffer.shape) != image.shape:
+            self._staging_buffer = torch.empty(image.shape, dtype=torch.uint8, pin_memory=True)
+        elif self._staging_done is not None:
+            self._staging_done.synchronize()
+
+        if self._copy_stream is None:
+            self._copy_stream = torch.cuda.Stream(device=device)
+
+        self._staging_buffer.numpy()[...] = image
+        with torch.cuda.stream(self._copy_stream):
+            image_torch = self._staging_buffer.to(device, non_blocking=True)
+            self._staging_done = torch.cuda.Event()
+            self._staging_done.record()
+
+        # 以降の縮小は呼び出し側のストリームで行うので、転送完了を待たせ、
+        # 転送先メモリがそのストリームで使い終わるまで再利用されないようにする
+        compute_stream = torch.cuda.current_stream(device)
+        compute_stream.wait_event(self._staging_done)
+        image_torch.record_stream(compute_stream)
+        return image_torch
+
+    def _to_input_tensor(self, resized_image: Any):
+        """
+        縮小した画像をSAMの入力テンソルに変換（SamPredictor.set_imageの前処理と同じ）
+
+        CUDAでは長辺リサイズ（apply_image_torch）をGPU上で行う。
+        CPUではRGB変換をチャンネル逆順のビューで済ませ（コピーしない）、apply_imageでリサイズする
+
+        Args:
+            resized_image: _prepare_image()で縮小した画像
+
+        Returns:
+            torch.Tensor (1, 3, H, W) 長辺がtransform.target_length
+        """
+        import torch
+
+        if isinstance(resized_image, torch.Tensor):
+            return self.predictor.transform.apply_image_torch(resized_image.permute(2, 0, 1)[None, :, :, :])
+
+        # apply_image（PILでのリサイズ）は非連続なビューをそのまま受け取れ、出力は新しい連続配列
+        is_color = resized_image.ndim == 3 and resized_image.shape[2] == 3
+        image_rgb = resized_image[:, :, ::-1] if is_color else resized_image
+        input_image = self.predictor.transform.apply_image(image_rgb)
+        input_image_torch = torch.as_tensor(input_image, device=self.predictor.device)
+        return input_image_torch.permute(2, 0, 1).contiguous()[None, :, :, :]
+
+    def _encode_frames(self, frames: List[np.ndarray]):
+        """
+        複数フレームの画像特徴量を画像エンコーダの1回の順伝播で計算
+
+        SamPredictor.set_imageと同じ前処理（長辺リサイズ・正規化・パディング）を行い、
+        バッチにまとめてエンコードする
+
+        Args:
+            frames: フレームのリスト (BGR)
+
+        Returns:
+            画像特徴量 torch.Tensor (N, C, H, W)
+        """
+        return self._encode_prepared([self._prepare_image(frame)[0] for frame in frames])
+
+    def _encode_prepared(self, resized_images: List[Any], pad_to: Optional[int] = None):
+        """
+        _prepare_image()で縮小済みの画像をまとめてエンコード（_encode_frames()の本体）
+
+        Args:
+            resized_images: _prepare_image()で縮小した画像のリスト
+            pad_to: エンコーダがコンパイル済みの場合、バッチをこの枚数までゼロ画像で埋める
+                （端数のチャンクで新しい形状のコンパイル・CUDA Graphの記録が走らないようにする）
+
+        Returns:
+            画像特徴量 torch.Tensor (N, C, H, W)（パディング分は含まない）
+        """
+        import torch
+
+        batch = [
+            self.predictor.model.preprocess(self._to_input_tensor(resized_image))
+            for resized_image in resized_images
+        ]
+        num_images = len(batch)
+        if self._encoder_compiled and pad_to is not None and num_images < pad_to:
+            batch.append(batch[0].new_zeros((pad_to - num_images, *batch[0].shape[1:])))
+
+        with self._inference_context():
+            return self.predictor.model.image_encoder(torch.cat(batch))[:num_images]
+
+    def _set_image_features(self, resized_image: Any, features) -> None:
+        """
+        計算済みの画像特徴量をSamPredictorにセット（set_torch_imageのエンコード以外の処理）
+
+        Args:
+            resized_image: _prepare_image()で縮小した画像
+            features: 画像特徴量 (1, C, H, W)
+        """
+        h, w = (int(v) for v in resized_image.shape[:2])
+        self.predictor.reset_image()
+        self.predictor.original_size = (h, w)
+        self.predictor.input_size = self.predictor.transform.get_preprocess_shape(
+            h, w, self.predictor.transform.target_length
+        )
+        self.predictor.features = features
+        self.predictor.is_image_set = True
 
     def segment_with_point(self,
                           point_coords: List[Tuple[int, int]],
@@ -233,7 +517,8 @@ class SAMTrackerUnified:
             {
                 "mask": np.ndarray,
                 "score": float,
-                "bbox": [x1, y1, x2, y2]
+                "bbox": [x1, y1, x2, y2],
+                "area": int
             }
         """
         if self.use_mock:
@@ -242,45 +527,97 @@ class SAMTrackerUnified:
         if not self.predictor:
             raise RuntimeError("SAM predictor not initialized")
 
-        # 座標をリサイズ後の画像スケールに変換
-        point_coords_scaled = [(x * self.scale_factor, y * self.scale_factor) for x, y in point_coords]
-
-        # numpy配列に変換
-        point_coords_np = np.array(point_coords_scaled, dtype=np.float32)
+        # 座標をリサイズ後の画像スケールに変換（配列演算でまとめて変換）
+        point_coords_np = self._scale_coords(point_coords)
         point_labels_np = np.array(point_labels, dtype=np.int32)
 
         # SAM予測
-        masks, scores, _ = self.predictor.predict(
-            point_coords=point_coords_np,
-            point_labels=point_labels_np,
-            multimask_output=True
-        )
+        with self._inference_context():
+            masks, scores, _ = self.predictor.predict(
+                point_coords=point_coords_np,
+                point_labels=point_labels_np,
+                multimask_output=True
+            )
 
         # 最もスコアの高いマスクを選択
         best_idx = np.argmax(scores)
-        best_mask = masks[best_idx]
-        best_score = float(scores[best_idx])
+        return self._to_original_scale(masks[best_idx], float(scores[best_idx]))
 
-        # マスクからタイトなBBoxを計算（ノイズ除去付き）
-        bbox = self._refine_bbox_from_mask(best_mask)
+    def segment_with_points_batch(self,
+                                  point_coords_list: List[List[Tuple[int, int]]],
+                                  point_labels_list: Optional[List[List[int]]] = None) -> List[Dict[str, Any]]:
+        """
+        複数のポイントプロンプトを現在の画像に対してまとめてセグメンテーション
 
-        # bbox座標を元の画像スケールに戻す
-        bbox_original = [
-            int(bbox[0] / self.scale_factor),
-            int(bbox[1] / self.scale_factor),
-            int(bbox[2] / self.scale_factor),
-            int(bbox[3] / self.scale_factor)
-        ]
+        プロンプトを点数ごとにまとめ、グループごとにマスクデコーダを1回だけ実行する
+        （パディング点を足さないので、結果はプロンプトごとのsegment_with_pointと同じ）
 
-        # マスクも元のサイズにリサイズ
-        h_orig, w_orig = self.original_shape
-        mask_original = cv2.resize(best_mask.astype(np.uint8), (w_orig, h_orig), interpolation=cv2.INTER_NEAREST).astype(bool)
+        Args:
+            point_coords_list: プロンプトごとのポイント座標 [[(x, y), ...], ...]
+            point_labels_list: プロンプトごとのポイントラベル (1: 前景, 0: 背景)
+                省略時は全点を前景とする（デバイス上のラベルテンソルを使い回す）
 
-        return {
-            "mask": mask_original,
-            "score": best_score,
-            "bbox": bbox_original
-        }
+        Returns:
+            プロンプトごとのセグメンテーション結果（segment_with_pointと同じ形式）
+        """
+        if self.use_mock:
+            return [self._mock_segment_result() for _ in point_coords_list]
+
+        if not self.predictor:
+            raise RuntimeError("SAM predictor not initialized")
+
+        import torch
+
+        groups: Dict[int, List[int]] = {}
+        for i, coords in enumerate(point_coords_list):
+            groups.setdefault(len(coords), []).append(i)
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(point_coords_list)
+        for indices in groups.values():
+            # 座標をリサイズ後の画像スケールに変換し、SAMの入力解像度に合わせる
+            point_coords_np = self._scale_coords([point_coords_list[i] for i in indices])
+            point_coords_np = self.predictor.transform.apply_coords(point_coords_np, self.predictor.original_size)
+            coords = torch.as_tensor(point_coords_np, dtype=torch.float, device=self.predictor.device)
+            if point_labels_list is None:
+                labels = self._positive_labels(len(indices), len(point_coords_list[indices[0]]))
+            else:
+                labels = torch.as_tensor(
+                    np.array([point_labels_list[i] for i in indices], dtype=np.int32),
+                    dtype=torch.int, device=self.predictor.device
+                )
+
+            with self._inference_context():
+                masks, scores, _ = self.predictor.predict_torch(
+                    point_coords=coords,
+                    point_labels=labels,
+                    multimask_output=True
+                )
+                # 最もスコアの高いマスクをデバイス上で選び、選んだマスクだけをCPUに転送
+                best_idx = scores.argmax(dim=1)
+                rows = torch.arange(len(indices), device=best_idx.device)
+                best_masks = self._masks_to_host(masks[rows, best_idx])
+                best_scores = scores[rows, best_idx].float().cpu().numpy()
+
+            for j, i in enumerate(indices):
+                results[i] = self._to_original_scale(best_masks[j], float(best_scores[j]))
+
+        return results
+
+    def _positive_labels(self, num_prompts: int, num_points: int):
+        """
+        全点前景のラベルテンソルを返す
+
+        track_frameのプロンプトは常に全点前景なので、形状ごとに1度だけ作ってデバイス上に置いておく
+        （プロンプトエンコーダはラベルを書き換えないので共有してよい）
+        """
+        import torch
+
+        key = (num_prompts, num_points)
+        labels = self._positive_labels_cache.get(key)
+        if labels is None:
+            labels = torch.ones(key, dtype=torch.int, device=self.predictor.device)
+            self._positive_labels_cache[key] = labels
+        return labels
 
     def segment_with_box(self, box: Tuple[int, int, int, int]) -> Dict[str, Any]:
         """
@@ -299,45 +636,86 @@ class SAMTrackerUnified:
             raise RuntimeError("SAM predictor not initialized")
 
         # box座標をリサイズ後のスケールに変換
-        box_scaled = [
-            box[0] * self.scale_factor,
-            box[1] * self.scale_factor,
-            box[2] * self.scale_factor,
-            box[3] * self.scale_factor
-        ]
-        box_np = np.array(box_scaled, dtype=np.float32)
-
-        masks, scores, _ = self.predictor.predict(
-            point_coords=None,
-            point_labels=None,
-            box=box_np,
-            multimask_output=True  # 変更: 3候補から最良選択
-        )
+        box_np = self._scale_coords(box)
+
+        with self._inference_context():
+            masks, scores, _ = self.predictor.predict(
+                point_coords=None,
+                point_labels=None,
+                box=box_np,
+                multimask_output=True  # 変更: 3候補から最良選択
+            )
 
         # 最もスコアの高いマスクを選択
         best_idx = np.argmax(scores)
-        mask = masks[best_idx]
-        score = float(scores[best_idx])
+        return self._to_original_scale(masks[best_idx], float(scores[best_idx]))
+
+    def _masks_to_host(self, masks):
+        """選択したマスク (N, H, W) をまとめてCPUへ転送
+
+        CUDAではピン留めバッファへ非同期コピーし、同期は1回だけ行う。
+        バッファは次の呼び出しで上書きされるため、保持する場合は呼び出し側でコピーすること
+
+        Args:
+            masks: (N, H, W) のboolマスク torch.Tensor
+
+        Returns:
+            (N, H, W) のboolマスク
+        """
+        import torch
+
+        masks = masks.to(torch.uint8)
+
+        if masks.device.type != "cuda":
+            return masks.numpy().view(np.bool_)
+
+        if self._d2h_buffer is None or self._d2h_buffer.shape != masks.shape:
+            self._d2h_buffer = torch.empty(masks.shape, dtype=torch.uint8, pin_memory=True)
+
+        self._d2h_buffer.copy_(masks, non_blocking=True)
+        torch.cuda.current_stream().synchronize()
+        return self._d2h_buffer.numpy().view(np.bool_)
+
+    def _scale_coords(self, coords) -> np.ndarray:
+        """
+        元画像の座標（点列・box）をリサイズ後のスケールに変換
 
-        # タイトなBBoxを計算
+        float64で乗算してからfloat32に丸める（要素ごとの変換と同じ値になる）
+        """
+        return (np.asarray(coords, dtype=np.float64) * self.scale_factor).astype(np.float32)
+
+    def _to_original_scale(self, mask: np.ndarray, score: float) -> Dict[str, Any]:
+        """
+        リサイズ後の画像でのマスクから、元の画像スケールのセグメンテーション結果を作る
+
+        Args:
+            mask: リサイズ後の画像サイズのバイナリマスク
+            score: マスクのスコア
+
+        Returns:
+            {"mask": 元サイズのマスク, "score": float, "bbox": [x1, y1, x2, y2], "area": 画素数}
+        """
+        # マスクからタイトなBBoxを計算（ノイズ除去付き）
         bbox = self._refine_bbox_from_mask(mask)
 
-        # bbox座標を元のスケールに戻す
-        bbox_original = [
-            int(bbox[0] / self.scale_factor),
-            int(bbox[1] / self.scale_factor),
-            int(bbox[2] / self.scale_factor),
-            int(bbox[3] / self.scale_factor)
-        ]
+        # bbox座標を元の画像スケールに戻す
+        # （int()と同じく0方向への切り捨て）
+        bbox_original = (np.asarray(bbox, dtype=np.float64) / self.scale_factor).astype(np.int64).tolist()
 
-        # マスクも元のサイズにリサイズ
+        # マスクも元のサイズにリサイズ（入出力ともuint8とboolの読み替えのみで、変換コピーは作らない）
+        # 先端検出・回転BBox・次フレームのプロンプトは元画像座標で計算するため、元サイズのマスクが必要
+        if mask.dtype == np.bool_:
+            mask_u8 = np.ascontiguousarray(mask).view(np.uint8)
+        else:
+            mask_u8 = (mask > 0).astype(np.uint8)
         h_orig, w_orig = self.original_shape
-        mask_original = cv2.resize(mask.astype(np.uint8), (w_orig, h_orig), interpolation=cv2.INTER_NEAREST).astype(bool)
+        mask_original = cv2.resize(mask_u8, (w_orig, h_orig), interpolation=cv2.INTER_NEAREST).view(bool)
 
         return {
             "mask": mask_original,
             "score": score,
-            "bbox": bbox_original
+            "bbox": bbox_original,
+            "area": int(np.count_nonzero(mask_original))
         }
 
     def auto_detect_instruments(self, frame: np.ndarray, max_instruments: int = 5) -> None:
@@ -348,23 +726,26 @@ class SAMTrackerUnified:
             frame: 初期フレーム
             max_instruments: 最大検出器具数
         """
-        if not self.mask_generator:
-            raise RuntimeError("SAM mask generator not initialized")
+        mask_generator = self._get_mask_generator()
 
         self.set_image(frame)
         logger.info("Starting automatic instrument detection...")
 
         # SAMで自動マスク生成
-        masks = self.mask_generator.generate(frame)
+        with self._inference_context():
+            masks = mask_generator.generate(frame)
 
-        # スコアでソート
-        masks.sort(key=lambda x: x["predicted_iou"], reverse=True)
+        # スコアを配列にまとめて上位N個の順位だけを求める
+        # （安定ソートなので同スコアは生成順のまま。辞書のリストは並べ替えない）
+        scores = np.fromiter((m["predicted_iou"] for m in masks), dtype=np.float64, count=len(masks))
+        top_indices = np.argsort(-scores, kind="stable")[:max_instruments]
 
         # 上位N個を器具として採用
         self.tracked_instruments = []
         detected_count = 0
 
-        for idx, mask_data in enumerate(masks[:max_instruments]):
+        for idx, mask_idx in enumerate(top_indices.tolist()):
+            mask_data = masks[mask_idx]
             score = mask_data["predicted_iou"]
 
             # スコアが低すぎる場合はスキップ
@@ -400,6 +781,18 @@ class SAMTrackerUnified:
 
         logger.info(f"Auto-detection completed: {detected_count} instruments found")
 
+    def _get_mask_generator(self) -> "SamAutomaticMaskGenerator":
+        """
+        自動マスク生成器を取得（初回呼び出し時にSamPredictorと同じSamから作る）
+
+        track_frameでは使わないので、モデルロード時には作らない
+        """
+        if self.mask_generator is None:
+            if not self.predictor:
+                raise RuntimeError("SAM mask generator not initialized")
+            self.mask_generator = SamAutomaticMaskGenerator(self.predictor.model, **_AUTO_MASK_GENERATOR_PARAMS)
+        return self.mask_generator
+
     def _decode_mask(self, mask_b64: str) -> np.ndarray:
         """
         base64エンコードされたマスクをnumpy配列に変換
@@ -414,16 +807,16 @@ class SAMTrackerUnified:
             # base64デコード
             mask_bytes = base64.b64decode(mask_b64)
 
-            # PNG画像として読み込み
-            image = Image.open(BytesIO(mask_bytes))
-
-            # numpy配列に変換（グレースケール）
-            mask_array = np.array(image.convert('L'))
+            # PNGをOpenCVでグレースケールとしてデコード（PILより速い）
+            mask_array = cv2.imdecode(np.frombuffer(mask_bytes, np.uint8), cv2.IMREAD_GRAYSCALE)
+            if mask_array is None:
+                # OpenCVで読めない形式はPILにフォールバック
+                mask_array = np.array(Image.open(BytesIO(mask_bytes)).convert('L'))
 
             # バイナリマスクに変換（0 or 1）
-            mask_binary = (mask_array > 0).astype(np.uint8)
+            _, mask_binary = cv2.threshold(mask_array, 0, 1, cv2.THRESH_BINARY)
 
-            logger.debug(f"Decoded mask shape: {mask_binary.shape}, non-zero pixels: {np.sum(mask_binary)}")
+            logger.debug(f"Decoded mask shape: {mask_binary.shape}, non-zero pixels: {np.count_nonzero(mask_binary)}")
             return mask_binary
 
         except Exception as e:
@@ -475,7 +868,7 @@ class SAMTrackerUnified:
                         "score": 1.0  # ユーザー選択なので信頼度は最大
                     }
 
-                    logger.info(f"Instrument {idx} initialized with mask: bbox={bbox}, mask_pixels={np.sum(mask)}")
+                    logger.info(f"Instrument {idx} initialized with mask: bbox={bbox}, mask_pixels={np.count_nonzero(mask)}")
 
                 except Exception as e:
                     logger.error(f"Failed to initialize instrument {idx} with mask: {e}")
@@ -523,12 +916,19 @@ class SAMTrackerUnified:
 
             logger.info(f"Initialized instrument {track_id}: {instrument.get('name')}")
 
-    def track_frame(self, frame: np.ndarray) -> List[Dict[str, Any]]:
+    def track_frame(
+        self,
+        frame: np.ndarray,
+        features: Optional[Any] = None,
+        prepared: Optional[Tuple[Any, float, Tuple[int, int]]] = None
+    ) -> List[Dict[str, Any]]:
         """
         現在のフレームで器具を追跡
 
         Args:
             frame: 現在のフレーム
+            features: _encode_frames()で計算済みの画像特徴量（省略時はここでエンコード）
+            prepared: frameに対する_prepare_image()の結果（省略時はここで縮小）
 
         Returns:
             検出された器具のリスト
@@ -537,33 +937,31 @@ class SAMTrackerUnified:
             return []
 
         # 毎フレーム画像をセット（フレームごとに画像が異なるため必須）
-        self.set_image(frame)
+        self.set_image(frame, features, prepared)
         detections = []
 
+        # マルチポイントプロンプトを全器具分作る（細長い器具対応）
+        prompts = []
         for inst in self.tracked_instruments:
-            track_id = inst["id"]
-            prev_bbox = inst["last_bbox"]
-            prev_mask = inst.get("last_mask")
-
-            # マルチポイントプロンプトで検出（細長い器具対応）
             try:
-                prompt_points = self._get_robust_prompts_for_elongated(
-                    prev_bbox,
-                    prev_mask
-                )
-                result = self.segment_with_point(
-                    point_coords=prompt_points,
-                    point_labels=[1] * len(prompt_points)
-                )
-                logger.debug(f"Track {track_id}: used {len(prompt_points)} prompt points, score={result['score']:.2f}")
+                prompts.append(self._get_robust_prompts_for_elongated(inst["last_bbox"], inst.get("last_mask")))
             except Exception as e:
-                logger.warning(f"Enhanced detection failed for {track_id}: {e}, falling back to single point")
-                # フォールバック: 単一ポイント
-                center = self._get_bbox_center(prev_bbox)
-                result = self.segment_with_point(
-                    point_coords=[center],
-                    point_labels=[1]
-                )
+                logger.warning(f"Enhanced prompts failed for {inst['id']}: {e}, falling back to single point")
+                prompts.append([self._get_bbox_center(inst["last_bbox"])])
+
+        # 全器具のプロンプトをまとめてマスクデコーダに渡す
+        try:
+            results = self.segment_with_points_batch(prompts)
+        except Exception as e:
+            logger.warning(f"Enhanced detection failed: {e}, falling back to single point")
+            # フォールバック: 単一ポイント
+            prompts = [[self._get_bbox_center(inst["last_bbox"])] for inst in self.tracked_instruments]
+            results = self.segment_with_points_batch(prompts)
+
+        for inst, prompt_points, result in zip(self.tracked_instruments, prompts, results):
+            track_id = inst["id"]
+            prev_bbox = inst["last_bbox"]
+            logger.debug(f"Track {track_id}: used {len(prompt_points)} prompt points, score={result['score']:.2f}")
 
             # Phase 2.1: 動的信頼度閾値を使用
             dynamic_threshold = self._get_dynamic_confidence_threshold(track_id, result["score"])
@@ -579,11 +977,14 @@ class SAMTrackerUnified:
                 new_center = self._get_bbox_center(result["bbox"])
                 self.trajectories[track_id].append(new_center)
 
+                # 2値化・輪郭抽出を1回だけ行い、回転BBoxと先端検出で共有
+                mask_info = self._analyze_mask(result["mask"])
+
                 # Phase 2.5: 回転BBoxを計算
-                rotated_info = self._get_rotated_bbox_from_mask(result["mask"])
+                rotated_info = self._get_rotated_bbox_from_mask(result["mask"], mask_info)
 
                 # 先端点を検出
-                tip_point = self._detect_instrument_tip(result["mask"], result["bbox"])
+                tip_point = self._detect_instrument_tip(result["mask"], result["bbox"], mask_info)
 
                 detections.append({
                     "class_name": inst["name"],
@@ -619,11 +1020,13 @@ class SAMTrackerUnified:
                         new_center = self._get_bbox_center(redetect_result["bbox"])
                         self.trajectories[track_id].append(new_center)
 
+                        mask_info = self._analyze_mask(redetect_result["mask"])
+
                         # Phase 2.5: 回転BBoxを計算（再検出時）
-                        rotated_info = self._get_rotated_bbox_from_mask(redetect_result["mask"])
+                        rotated_info = self._get_rotated_bbox_from_mask(redetect_result["mask"], mask_info)
 
                         # 先端点を検出（再検出時）
-                        tip_point = self._detect_instrument_tip(redetect_result["mask"], redetect_result["bbox"])
+                        tip_point = self._detect_instrument_tip(redetect_result["mask"], redetect_result["bbox"], mask_info)
 
                         detections.append({
                             "class_name": inst["name"],
@@ -693,22 +1096,45 @@ class SAMTrackerUnified:
         # 閾値は呼び出し側で判定するため、結果をそのまま返す
         return result
 
-    def detect_batch(self, frames: List[np.ndarray]) -> List[Dict[str, Any]]:
+    def detect_batch(
+        self,
+        frames: List[np.ndarray],
+        encoder_batch_size: int = DEFAULT_ENCODER_BATCH_SIZE
+    ) -> List[Dict[str, Any]]:
         """
         複数フレームに対してバッチ検出を実行
 
+        画像エンコーダはencoder_batch_sizeフレームずつまとめて実行し、
+        プロンプト（前フレームの結果に依存）とマスクデコーダだけをフレームごとに実行する。
+        次のチャンクの縮小はワーカースレッドで先行して行い、エンコード・デコードと重ねる
+
         Args:
             frames: フレームのリスト
+            encoder_batch_size: 画像エンコーダに一度に入力するフレーム数
 
         Returns:
             検出結果のリスト（各フレームごと）
         """
+        if self.use_mock or not self.tracked_instruments:
+            return [{'detections': self.track_frame(frame)} for frame in frames]
+
         results = []
-        for frame in frames:
-            detections = self.track_frame(frame)
-            results.append({'detections': detections})
+        for chunk, prepared in prefetch(self._prepare_chunks(frames, encoder_batch_size), maxsize=2):
+            features = self._encode_prepared(
+                [resized_image for resized_image, _, _ in prepared], pad_to=encoder_batch_size
+            )
+
+            for i, frame in enumerate(chunk):
+                detections = self.track_frame(frame, features[i:i + 1], prepared[i])
+                results.append({'detections': detections})
         return results
 
+    def _prepare_chunks(self, frames: List[np.ndarray], chunk_size: int):
+        """detect_batch用: フレームをchunk_sizeずつ縮小して (チャンク, _prepare_image()の結果) を返す"""
+        for start in range(0, len(frames), chunk_size):
+            chunk = frames[start:start + chunk_size]
+            yield chunk, [self._prepare_image(frame) for frame in chunk]
+
     def _get_bbox_from_mask(self, mask: np.ndarray) -> List[int]:
         """
         マスクからバウンディングボックスを計算（旧版・互換性のため残す）
@@ -719,14 +1145,13 @@ class SAMTrackerUnified:
         Returns:
             [x1, y1, x2, y2]
         """
-        if mask.sum() == 0:
-            return [0, 0, 0, 0]
-
         rows = np.any(mask, axis=1)
+        if not rows.any():
+            return [0, 0, 0, 0]
         cols = np.any(mask, axis=0)
 
-        y1, y2 = np.where(rows)[0][[0, -1]]
-        x1, x2 = np.where(cols)[0][[0, -1]]
+        y1, y2 = rows.argmax(), len(rows) - 1 - rows[::-1].argmax()
+        x1, x2 = cols.argmax(), len(cols) - 1 - cols[::-1].argmax()
 
         return [int(x1), int(y1), int(x2), int(y2)]
 
@@ -736,8 +1161,8 @@ class SAMTrackerUnified:
 
         手順:
         1. 形態学的Opening（小さなノイズ除去）
-        2. 連結成分分析（最大領域のみ採用）
-        3. タイトなBBox計算
+        2. 外側輪郭の抽出（最大領域のみ採用）
+        3. 最大輪郭の外接矩形をBBoxとする（全画素のラベリングは行わない）
 
         Args:
             mask: バイナリマスク
@@ -745,50 +1170,32 @@ class SAMTrackerUnified:
         Returns:
             [x1, y1, x2, y2]
         """
-        if mask.sum() == 0:
+        if not mask.any():
             return [0, 0, 0, 0]
 
         try:
-            # バイナリマスクに変換（0 or 255）
-            mask_binary = (mask > 0).astype(np.uint8) * 255
+            # バイナリマスクに変換（0 or 1、boolはコピーせずuint8として見る）
+            mask_binary = mask.view(np.uint8) if mask.dtype == bool else (mask > 0).astype(np.uint8)
 
             # モルフォロジー処理でノイズ除去
-            kernel = np.ones((3, 3), np.uint8)
-            mask_clean = cv2.morphologyEx(mask_binary, cv2.MORPH_OPEN, kernel)
+            mask_clean = cv2.morphologyEx(mask_binary, cv2.MORPH_OPEN, _MORPH_KERNEL)
 
             # Openingで消えた場合は元のマスクを使用
-            if mask_clean.sum() == 0:
+            if not mask_clean.any():
                 mask_clean = mask_binary
 
-            # 連結成分分析
-            num_labels, labels, stats, centroids = cv2.connectedComponentsWithStats(
-                mask_clean, connectivity=8
-            )
-
-            # 最大領域のみ採用（背景ラベル0を除く）
-            if num_labels > 1:
-                # 面積でソート（背景を除く）
-                areas = stats[1:, cv2.CC_STAT_AREA]
-                if len(areas) > 0:
-                    largest_label = 1 + np.argmax(areas)
-                    mask_clean = (labels == largest_label).astype(np.uint8) * 255
+            # 外側輪郭（8近傍で連結した領域ごとに1つ）
+            contours, _ = cv2.findContours(mask_clean, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
-            # タイトなBBox計算
-            rows = np.any(mask_clean > 0, axis=1)
-            cols = np.any(mask_clean > 0, axis=0)
-
-            if not rows.any() or not cols.any():
+            if not contours:
                 # フォールバック: 元のマスクから計算
                 logger.warning("Clean mask is empty, using original mask")
                 return self._get_bbox_from_mask(mask)
 
-            y_indices = np.where(rows)[0]
-            x_indices = np.where(cols)[0]
+            # 最大領域の外接矩形
+            x, y, w, h = cv2.boundingRect(max(contours, key=cv2.contourArea))
 
-            y1, y2 = y_indices[0], y_indices[-1]
-            x1, x2 = x_indices[0], x_indices[-1]
-
-            return [int(x1), int(y1), int(x2), int(y2)]
+            return [int(x), int(y), int(x + w - 1), int(y + h - 1)]
 
         except Exception as e:
             logger.warning(f"BBox refinement failed: {e}, using simple calculation")
@@ -832,10 +1239,11 @@ class SAMTrackerUnified:
         """
         points = []
 
-        if mask is not None and mask.sum() > 0:
+        if mask is not None and mask.any():
             try:
                 # 1. 先端点を検出（最優先）
-                tip_point = self._detect_instrument_tip(mask, bbox)
+                mask_info = self._analyze_mask(mask)
+                tip_point = self._detect_instrument_tip(mask, bbox, mask_info)
                 if tip_point is not None:
                     # 先端点を2回追加（実質的なweight=2）
                     points.append(tip_point)
@@ -843,10 +1251,8 @@ class SAMTrackerUnified:
                     logger.debug(f"Tip point (priority): {tip_point}")
 
                 # 2. 重心を計算
-                moments = cv2.moments(mask.astype(np.uint8))
-                if moments["m00"] > 0:
-                    cx = int(moments["m10"] / moments["m00"])
-                    cy = int(moments["m01"] / moments["m00"])
+                if mask_info["centroid"] is not None:
+                    cx, cy = (int(v) for v in mask_info["centroid"])
                     centroid = (cx, cy)
 
                     # 3. 先端から中央への中間点を追加
@@ -883,10 +1289,75 @@ class SAMTrackerUnified:
         logger.debug(f"Generated {len(points)} tip-focused prompt points")
         return points
 
+    def _analyze_mask(self, mask: np.ndarray) -> Dict[str, Any]:
+        """
+        先端検出・回転BBoxが共通で使うマスクの走査結果を計算
+
+        Args:
+            mask: バイナリマスク
+
+        Returns:
+            {
+                "binary": uint8マスク（0 or 1）,
+                "largest_contour": 面積最大の外側輪郭（空マスクはNone）,
+                "centroid": 重心 (x, y) float（空マスクはNone）,
+                "principal_axis": 主軸の単位ベクトル（5画素未満はNone）
+            }
+        """
+        if mask.dtype == np.bool_:
+            mask_binary = np.ascontiguousarray(mask).view(np.uint8)
+        else:
+            mask_binary = (mask > 0).astype(np.uint8)
+
+        contours, _ = cv2.findContours(mask_binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        # 画像モーメントを1回の走査で求め、重心と主軸をまとめて計算
+        # （画素座標の配列を作らずに、中心モーメントから共分散行列が得られる）
+        moments = cv2.moments(mask_binary, binaryImage=True)
+        area = moments["m00"]
+        centroid = None
+        principal_axis = None
+
+        if area > 0:
+            centroid = (moments["m10"] / area, moments["m01"] / area)
+            if area >= 5:
+                cov = np.array([
+                    [moments["mu20"], moments["mu11"]],
+                    [moments["mu11"], moments["mu02"]]
+                ]) / area
+                principal_axis = self._compute_principal_axis(cov)
+
+        return {
+            "binary": mask_binary,
+            "largest_contour": max(contours, key=cv2.contourArea) if contours else None,
+            "centroid": centroid,
+            "principal_axis": principal_axis
+        }
+
+    @staticmethod
+    def _compute_principal_axis(cov: np.ndarray) -> np.ndarray:
+        """
+        画素座標の2x2共分散行列から主軸（第1主成分）を計算
+
+        向きはcv2.PCAComputeに合わせ、絶対値の大きい成分（同程度ならy成分）を正にする
+
+        Args:
+            cov: (x, y) 座標の2x2共分散行列
+
+        Returns:
+            主軸の単位ベクトル (x, y)
+        """
+        _, eigenvectors = np.linalg.eigh(cov)
+        axis = eigenvectors[:, -1]
+
+        key = axis[1] if abs(axis[1]) >= abs(axis[0]) - 1e-6 else axis[0]
+        return -axis if key < 0 else axis
+
     def _detect_instrument_tip(
         self,
         mask: np.ndarray,
-        bbox: List[int]
+        bbox: List[int],
+        mask_info: Optional[Dict[str, Any]] = None
     ) -> Optional[Tuple[int, int]]:
         """
         器具の先端点を検出
@@ -900,82 +1371,35 @@ class SAMTrackerUnified:
         Args:
             mask: バイナリマスク
             bbox: [x1, y1, x2, y2]
+            mask_info: _analyze_mask()の結果（省略時はここで計算）
 
         Returns:
             (tip_x, tip_y) または None
         """
-        if mask.sum() == 0:
-            return None
-
         try:
-            # 1. 輪郭抽出
-            mask_binary = (mask > 0).astype(np.uint8) * 255
-            contours, _ = cv2.findContours(mask_binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-            if not contours:
+            # 1. 輪郭抽出（最大輪郭を使用、空マスクは輪郭なし）
+            if mask_info is None:
+                mask_info = self._analyze_mask(mask)
+            contour = mask_info["largest_contour"]
+
+            # 2. PCAの主軸（第1主成分）と重心は_analyze_mask()で計算済み
+            principal_axis = mask_info["principal_axis"]
+            if contour is None or principal_axis is None:
                 return None
 
-            # 最大輪郭を使用
-            contour = max(contours, key=cv2.contourArea)
-
-            # 2. PCAで主軸を計算
-            y_coords, x_coords = np.where(mask > 0)
-            if len(x_coords) < 5:
-                return None
-
-            coords = np.column_stack([x_coords, y_coords])
-            mean, eigenvectors = cv2.PCACompute(coords.astype(np.float32), mean=None)
-            principal_axis = eigenvectors[0]  # 第1主成分
-
-            # 重心を計算
-            moments = cv2.moments(mask_binary)
-            if moments["m00"] == 0:
-                return None
-
-            cx = int(moments["m10"] / moments["m00"])
-            cy = int(moments["m01"] / moments["m00"])
-            centroid = np.array([cx, cy], dtype=np.float32)
+            cx, cy = (int(v) for v in mask_info["centroid"])
 
             # 3. 輪郭上で主軸方向の最遠点を検出
-            max_dist = -1
-            tip_point = None
-
-            for pt in contour:
-                pt_coord = pt[0]  # (x, y)
-                # 重心からの相対位置
-                rel_pos = pt_coord - centroid
-
-                # 主軸方向への射影距離
-                projection = np.dot(rel_pos, principal_axis)
-
-                # 正の方向（先端側）のみ考慮
-                if projection > 0 and projection > max_dist:
-                    max_dist = projection
-                    tip_point = tuple(pt_coord)
-
-            # フォールバック: 負の方向も確認（器具の向きが逆の場合）
-            if tip_point is None:
-                for pt in contour:
-                    pt_coord = pt[0]
-                    rel_pos = pt_coord - centroid
-                    projection = np.dot(rel_pos, principal_axis)
-
-                    if projection < 0 and abs(projection) > max_dist:
-                        max_dist = abs(projection)
-                        tip_point = tuple(pt_coord)
-
-            # 4. 外れ値検証
-            if tip_point is not None:
-                x1, y1, x2, y2 = bbox
-                tx, ty = tip_point
-
-                # BBox内にあるか確認
-                if x1 <= tx <= x2 and y1 <= ty <= y2:
-                    logger.debug(f"Detected tip at ({tx}, {ty}), centroid=({cx}, {cy}), max_dist={max_dist:.1f}")
-                    return tip_point
-                else:
-                    logger.warning(f"Tip point ({tx}, {ty}) outside bbox {bbox}, using centroid")
-                    return (cx, cy)
+            # 全輪郭点 (x, y) の重心からの射影とBBox判定をカーネルで1回の走査で行う
+            tx, ty, status = tip_from_contour(contour, (cx, cy), principal_axis, bbox)
+
+            # 4. 外れ値検証（BBox内にあるか）
+            if status == TIP_FOUND:
+                logger.debug(f"Detected tip at ({tx}, {ty}), centroid=({cx}, {cy})")
+                return (tx, ty)
+            if status == TIP_OUTSIDE_BBOX:
+                logger.warning(f"Tip point ({tx}, {ty}) outside bbox {bbox}, using centroid")
+                return (cx, cy)
 
             # フォールバック: 重心を返す
             logger.debug(f"Tip detection failed, using centroid ({cx}, {cy})")
@@ -1116,8 +1540,8 @@ class SAMTrackerUnified:
         # 速度ベースの拡張（軌跡から計算）
         velocity_based_expansion = 0
         if track_id in self.trajectories and len(self.trajectories[track_id]) >= 2:
-            trajectory = list(self.trajectories[track_id])
-            # 最後の2点間の移動距離
+            # 最後の2点間の移動距離（dequeの末尾はO(1)で参照できるのでリスト化しない）
+            trajectory = self.trajectories[track_id]
             p1 = trajectory[-2]
             p2 = trajectory[-1]
             distance = ((p2[0] - p1[0]) ** 2 + (p2[1] - p1[1]) ** 2) ** 0.5
@@ -1134,7 +1558,11 @@ class SAMTrackerUnified:
 
         return adaptive_expansion
 
-    def _get_rotated_bbox_from_mask(self, mask: np.ndarray) -> Dict[str, Any]:
+    def _get_rotated_bbox_from_mask(
+        self,
+        mask: np.ndarray,
+        mask_info: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """
         Phase 2.5: マスクから回転BBox（Rotated Bounding Box）を計算
 
@@ -1143,6 +1571,7 @@ class SAMTrackerUnified:
 
         Args:
             mask: バイナリマスク
+            mask_info: _analyze_mask()の結果（省略時はここで計算）
 
         Returns:
             {
@@ -1152,53 +1581,30 @@ class SAMTrackerUnified:
                 "area_reduction": float  # 面積削減率（%）
             }
         """
-        if mask.sum() == 0:
-            return {
-                "rotated_bbox": [[0, 0], [0, 0], [0, 0], [0, 0]],
-                "rotation_angle": 0.0,
-                "rect_bbox": [0, 0, 0, 0],
-                "area_reduction": 0.0
-            }
-
         try:
-            # バイナリマスクに変換
-            mask_binary = (mask > 0).astype(np.uint8) * 255
-
-            # 輪郭抽出
-            contours, _ = cv2.findContours(
-                mask_binary,
-                cv2.RETR_EXTERNAL,
-                cv2.CHAIN_APPROX_SIMPLE
-            )
+            # 輪郭抽出（最大輪郭を使用）
+            if mask_info is None:
+                mask_info = self._analyze_mask(mask)
+            largest_contour = mask_info["largest_contour"]
 
-            if not contours:
-                # フォールバック
-                rect_bbox = self._refine_bbox_from_mask(mask)
+            # 輪郭が無いのは空マスクのみ
+            if largest_contour is None:
                 return {
-                    "rotated_bbox": [
-                        [rect_bbox[0], rect_bbox[1]],
-                        [rect_bbox[2], rect_bbox[1]],
-                        [rect_bbox[2], rect_bbox[3]],
-                        [rect_bbox[0], rect_bbox[3]]
-                    ],
+                    "rotated_bbox": [[0, 0], [0, 0], [0, 0], [0, 0]],
                     "rotation_angle": 0.0,
-                    "rect_bbox": rect_bbox,
+                    "rect_bbox": [0, 0, 0, 0],
                     "area_reduction": 0.0
                 }
 
-            # 最大輪郭を取得
-            largest_contour = max(contours, key=cv2.contourArea)
-
             # 回転矩形を計算
             # rect = ((center_x, center_y), (width, height), angle)
             rect = cv2.minAreaRect(largest_contour)
 
             # 4点の座標を取得
-            box_points = cv2.boxPoints(rect)
-            box_points = np.intp(box_points)  # 整数に変換（int0は非推奨）
+            box_points = cv2.boxPoints(rect).round().astype(np.int32)
 
             # リスト形式に変換
-            rotated_bbox = [[int(pt[0]), int(pt[1])] for pt in box_points]
+            rotated_bbox = box_points.tolist()
 
             # 回転角度（度）
             rotation_angle = float(rect[2])
@@ -1246,7 +1652,9 @@ class SAMTrackerUnified:
 
     def _mock_segment_result(self) -> Dict[str, Any]:
         """モックモード用のダミーセグメンテーション結果"""
-        h, w = getattr(self, '_mock_image', np.zeros((480, 640, 3))).shape[:2]
+        # 画像未セット時は640x480（getattrの既定値に配列を渡すと毎回確保されるので使わない）
+        mock_image = getattr(self, '_mock_image', None)
+        h, w = mock_image.shape[:2] if mock_image is not None else (480, 640)
         return {
             "mask": np.zeros((h, w), dtype=bool),
             "score": 0.0,
@@ -1277,14 +1685,7 @@ class SAMTrackerUnified:
 
         if isinstance(result, dict):
             if result.get("mask") is not None:
-                mask = result["mask"]
-                colored_mask = np.zeros_like(vis_image)
-                colored_mask[mask] = color
-                vis_image = cv2.addWeighted(
-                    vis_image, 1 - alpha,
-                    colored_mask, alpha,
-                    0
-                )
+                self._blend_mask(vis_image, result["mask"], color, alpha)
 
             if result.get("bbox"):
                 bbox = result["bbox"]
@@ -1295,14 +1696,7 @@ class SAMTrackerUnified:
                     color, 2
                 )
         elif isinstance(result, np.ndarray):
-            mask = result
-            colored_mask = np.zeros_like(vis_image)
-            colored_mask[mask > 0] = color
-            vis_image = cv2.addWeighted(
-                vis_image, 1 - alpha,
-                colored_mask, alpha,
-                0
-            )
+            self._blend_mask(vis_image, result > 0, color, alpha)
 
         if box:
             cv2.rectangle(
@@ -1313,3 +1707,26 @@ class SAMTrackerUnified:
             )
 
         return vis_image
+
+    @staticmethod
+    def _blend_mask(
+        vis_image: np.ndarray,
+        mask: np.ndarray,
+        color: Tuple[int, int, int],
+        alpha: float
+    ) -> None:
+        """
+        マスク領域の画素だけをその場で色とブレンド（フレーム全体の色マスクを作らない）
+
+        Args:
+            vis_image: 描画先の画像（上書きされる）
+            mask: バイナリマスク
+            color: マスクの色
+            alpha: 透明度
+        """
+        mask = mask.astype(bool, copy=False)
+        if not mask.any():
+            return
+
+        blended = vis_image[mask] * (1 - alpha) + np.asarray(color, dtype=np.float32) * alpha
+        vis_image[mask] = np.rint(blended).astype(np.uint8)
@@ -7,9 +7,11 @@ MediaPipeを使用して手の21個のランドマークを検出し、
 
 import cv2
 import numpy as np
-import mediapipe as mp
 from typing import Dict, List, Any, Optional, Tuple
 import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 logger = logging.getLogger(__name__)
 
@@ -26,13 +28,36 @@ class HandSkeletonDetector:
         'ring': [13, 14, 15, 16],
         'pinky': [17, 18, 19, 20]
     }
+
+    # 指の曲がり角度計算に使う3点のインデックス（親指の基点は手首）
+    _ANGLE_BASE_IDS = np.array([0, 5, 9, 13, 17])
+    _ANGLE_JOINT_IDS = np.array([2, 6, 10, 14, 18])
+    _ANGLE_TIP_IDS = np.array([3, 7, 11, 15, 19])
+    # 基部・先端・関節を1回のインデックス参照でまとめて取り出すための (3, 5) 配列
+    _ANGLE_TRIPLET_IDS = np.stack([_ANGLE_BASE_IDS, _ANGLE_TIP_IDS, _ANGLE_JOINT_IDS])
+
+    PALM_LANDMARK_IDS = np.array([0, 1, 5, 9, 13, 17])
+
+    # 速度モードごとのMediaPipe設定（throughputは軽量モデルで長尺のオフライン解析向け）
+    SPEED_MODES = {
+        "quality": {"model_complexity": 1, "min_detection_confidence": 0.8},
+        "balanced": {"model_complexity": 1, "min_detection_confidence": 0.6},
+        "throughput": {"model_complexity": 0, "min_detection_confidence": 0.5},
+    }
+
+    # 描画用の骨格接続 (親, 子)。各指の付け根は手首(0)に接続し、子の番号順に並べる
+    _BONE_CONNECTIONS = np.array(
+        [(0 if i in (1, 5, 9, 13, 17) else i - 1, i) for i in range(1, 21)],
+        dtype=np.int32
+    )
     
     def __init__(self,
                  static_image_mode: bool = False,
                  max_num_hands: int = 2,
                  min_detection_confidence: float = 0.5,
                  min_tracking_confidence: float = 0.5,
-                 flip_handedness: bool = False):
+                 flip_handedness: bool = False,
+                 speed_mode: Optional[str] = None):
         """
         初期化 - 純粋なMediaPipe実装
 
@@ -42,16 +67,46 @@ class HandSkeletonDetector:
             min_detection_confidence: 検出の最小信頼度
             min_tracking_confidence: トラッキングの最小信頼度
             flip_handedness: 手の左右を反転するか（外部カメラの場合True）
+            speed_mode: 速度モード（"quality" / "balanced" / "throughput"）。
+                指定時はモデルの複雑度と検出の最小信頼度をモードの値で上書きする。
+                長尺動画のdetect_batchには"throughput"を推奨
         """
+        if speed_mode is not None and speed_mode not in self.SPEED_MODES:
+            raise ValueError(f"Unknown speed_mode: {speed_mode} (expected one of {list(self.SPEED_MODES)})")
+
+        model_complexity = 1
+        if speed_mode is not None:
+            model_complexity = self.SPEED_MODES[speed_mode]["model_complexity"]
+            min_detection_confidence = self.SPEED_MODES[speed_mode]["min_detection_confidence"]
+
+        # MediaPipeは読み込みが重いため、検出器の生成時にのみインポートする
+        import mediapipe as mp
+
         self.mp_hands = mp.solutions.hands
         self.mp_drawing = mp.solutions.drawing_utils
         self.flip_handedness = flip_handedness
         self.max_num_hands = max_num_hands
 
+        # ワーカープロセスで同じ設定の検出器を再生成するための引数
+        self._init_kwargs = {
+            "static_image_mode": static_image_mode,
+            "max_num_hands": max_num_hands,
+            "min_detection_confidence": min_detection_confidence,
+            "min_tracking_confidence": min_tracking_confidence,
+            "flip_handedness": flip_handedness,
+            "speed_mode": speed_mode,
+        }
+
+        # BGR→RGB変換用バッファ（フレームごとの確保を避けて使い回す）
+        self._rgb_buf = None
+        # 左右分割検出で左半分を並行処理するスレッド（初回使用時に生成）
+        self._split_executor: Optional[ThreadPoolExecutor] = None
+
         # 純粋なMediaPipe Hands初期化
         self.hands = self.mp_hands.Hands(
             static_image_mode=static_image_mode,
             max_num_hands=max_num_hands,
+            model_complexity=model_complexity,
             min_detection_confidence=min_detection_confidence,
             min_tracking_confidence=min_tracking_confidence
         )
@@ -61,12 +116,14 @@ class HandSkeletonDetector:
             self.hands_left = self.mp_hands.Hands(
                 static_image_mode=True,
                 max_num_hands=1,
+                model_complexity=model_complexity,
                 min_detection_confidence=min_detection_confidence * 0.8,  # やや低めの閾値
                 min_tracking_confidence=min_tracking_confidence * 0.8
             )
             self.hands_right = self.mp_hands.Hands(
                 static_image_mode=True,
                 max_num_hands=1,
+                model_complexity=model_complexity,
                 min_detection_confidence=min_detection_confidence * 0.8,
                 min_tracking_confidence=min_tracking_confidence * 0.8
             )
@@ -74,7 +131,8 @@ class HandSkeletonDetector:
             self.hands_left = None
             self.hands_right = None
 
-        logger.info("HandSkeletonDetector initialized with MediaPipe")
+        logger.info(f"HandSkeletonDetector initialized with MediaPipe "
+                    f"(speed_mode={speed_mode}, model_complexity={model_complexity})")
     
     def _normalize_landmarks(self, landmarks):
         """
@@ -98,8 +156,7 @@ class HandSkeletonDetector:
                     normalized.append({
                         "x": float(landmarks[i][0]),
                         "y": float(landmarks[i][1]),
-                        "z": float(landmarks[i][2]) if len(landmarks[i]) > 2 else 0.0,
-                        "visibility": float(landmarks[i][3]) if len(landmarks[i]) > 3 else 1.0
+                        "z": float(landmarks[i][2]) if len(landmarks[i]) > 2 else 0.0
                     })
             return normalized
 
@@ -121,26 +178,39 @@ class HandSkeletonDetector:
                         normalized.append({
                             "x": float(point[0]),
                             "y": float(point[1]),
-                            "z": float(point[2]) if len(point) > 2 else 0.0,
-                            "visibility": float(point[3]) if len(point) > 3 else 1.0
+                            "z": float(point[2]) if len(point) > 2 else 0.0
                         })
                 return normalized
 
         logger.warning(f"Unexpected landmarks format: {type(landmarks)}")
         return landmarks if isinstance(landmarks, list) else []
 
-    def detect_from_frame(self, frame: np.ndarray) -> Dict[str, Any]:
+    def detect_from_frame(self, frame: np.ndarray, color: str = "BGR") -> Dict[str, Any]:
         """
         フレームから手の骨格を検出 - 純粋なMediaPipe実装
 
         Args:
-            frame: 入力画像フレーム (BGR)
+            frame: 入力画像フレーム
+            color: 入力フレームの色順（"BGR" または "RGB"。"RGB"なら色変換を省略）
 
         Returns:
             検出結果の辞書
         """
-        # BGR to RGB変換のみ（前処理なし）
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        if color == "RGB":
+            # 抽出段階でRGBに変換済み
+            rgb_frame = frame
+        elif color == "BGR":
+            # BGR to RGB変換のみ（前処理なし、バッファを再利用）
+            if self._rgb_buf is None or self._rgb_buf.shape != frame.shape:
+                self._rgb_buf = np.empty_like(frame)
+            self._rgb_buf.flags.writeable = True
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self._rgb_buf)
+
+            # 読み取り専用にするとMediaPipe内部でのコピーが省略される
+            # （次回の変換時に書き込み可能へ戻す）
+            rgb_frame.flags.writeable = False
+        else:
+            raise ValueError(f"Unsupported color order: {color}")
 
         # MediaPipeで検出
         results = self.hands.process(rgb_frame)
@@ -160,7 +230,7 @@ class HandSkeletonDetector:
                 zip(results.multi_hand_landmarks, results.multi_handedness)
             ):
                 hand_data = self._process_hand_landmarks(
-                    hand_landmarks,
+                    self._landmarks_to_array(hand_landmarks),
                     hand_info,
                     frame.shape,
                     hand_idx
@@ -204,7 +274,7 @@ class HandSkeletonDetector:
         画像を左右に分割して両手を検出する改善メソッド
 
         Args:
-            frame: 元のフレーム (BGR)
+            frame: 元のフレーム
             rgb_frame: RGB変換済みフレーム
             initial_hands: 初回検出で見つかった手
 
@@ -214,69 +284,53 @@ class HandSkeletonDetector:
         h, w = frame.shape[:2]
         mid_x = w // 2
 
-        # 左半分と右半分を処理
-        left_half = rgb_frame[:, :mid_x + 50]  # 少しオーバーラップ
-        right_half = rgb_frame[:, mid_x - 50:]  # 少しオーバーラップ
+        # 左半分と右半分（少しオーバーラップ）
+        left_half = rgb_frame[:, :mid_x + 50]
+        right_half = rgb_frame[:, mid_x - 50:]
 
         all_hands = []
 
-        # 左半分を処理（通常右手が映る）
-        left_results = self.hands_left.process(left_half)
-        if left_results.multi_hand_landmarks:
-            for hand_landmarks, hand_info in zip(left_results.multi_hand_landmarks, left_results.multi_handedness):
-                # 座標を元画像の座標系に変換
-                adjusted_landmarks = []
-                for lm in hand_landmarks.landmark:
-                    adjusted_landmarks.append({
-                        "x": lm.x * left_half.shape[1] / w,  # 正規化座標に調整
-                        "y": lm.y,
-                        "z": lm.z,
-                        "visibility": lm.visibility
-                    })
-
-                # MediaPipeのランドマークオブジェクトを作成
-                class FakeLandmark:
-                    def __init__(self, x, y, z, visibility):
-                        self.x = x
-                        self.y = y
-                        self.z = z
-                        self.visibility = visibility
+        # 既に検出済みの手を丸ごと含む半分は、1手検出のMediaPipeが同じ手を
+        # 再検出して重複除去で捨てられるだけなので処理を省略する
+        # （両方の半分に含まれる手＝中央の重なり部分の手では省略しない）
+        in_left = self._contains_hand(initial_hands, 0, mid_x + 50)
+        in_right = self._contains_hand(initial_hands, mid_x - 50, w)
+        skip_left = in_left and not in_right
+        skip_right = in_right and not in_left
+
+        # 読み取り専用のフレームはC連続でないとMediaPipeに渡せないため、処理する半分のみコピー
+        # 左右は別インスタンスなので、両方処理する場合は左半分をワーカースレッドで並行して推論する
+        # （MediaPipeは推論の待機中にGILを解放する）
+        left_results = None
+        left_future = None
+        if not skip_left:
+            left_input = np.ascontiguousarray(left_half)
+            if skip_right:
+                left_results = self.hands_left.process(left_input)
+            else:
+                left_future = self._get_split_executor().submit(self.hands_left.process, left_input)
+        right_results = None if skip_right else self.hands_right.process(np.ascontiguousarray(right_half))
+        if left_future is not None:
+            left_results = left_future.result()
 
-                class FakeLandmarks:
-                    def __init__(self, landmarks):
-                        self.landmark = [FakeLandmark(lm["x"], lm["y"], lm["z"], lm["visibility"]) for lm in landmarks]
+        # 左半分の結果（通常右手が映る）
+        if left_results and left_results.multi_hand_landmarks:
+            for hand_landmarks, hand_info in zip(left_results.multi_hand_landmarks, left_results.multi_handedness):
+                # 座標を元画像の座標系に変換（正規化座標に調整）
+                landmarks = self._landmarks_to_array(hand_landmarks)
+                landmarks[:, 0] *= left_half.shape[1] / w
 
-                fake_landmarks = FakeLandmarks(adjusted_landmarks)
-                hand_data = self._process_hand_landmarks(fake_landmarks, hand_info, frame.shape, 0)
+                hand_data = self._process_hand_landmarks(landmarks, hand_info, frame.shape, 0)
                 all_hands.append(hand_data)
 
-        # 右半分を処理（通常左手が映る）
-        right_results = self.hands_right.process(right_half)
-        if right_results.multi_hand_landmarks:
+        # 右半分の結果（通常左手が映る）
+        if right_results and right_results.multi_hand_landmarks:
             for hand_landmarks, hand_info in zip(right_results.multi_hand_landmarks, right_results.multi_handedness):
-                # 座標を元画像の座標系に変換
-                adjusted_landmarks = []
-                for lm in hand_landmarks.landmark:
-                    adjusted_landmarks.append({
-                        "x": (lm.x * right_half.shape[1] + (mid_x - 50)) / w,  # 正規化座標に調整
-                        "y": lm.y,
-                        "z": lm.z,
-                        "visibility": lm.visibility
-                    })
-
-                class FakeLandmark:
-                    def __init__(self, x, y, z, visibility):
-                        self.x = x
-                        self.y = y
-                        self.z = z
-                        self.visibility = visibility
+                # 座標を元画像の座標系に変換（正規化座標に調整）
+                landmarks = self._landmarks_to_array(hand_landmarks)
+                landmarks[:, 0] = (landmarks[:, 0] * right_half.shape[1] + (mid_x - 50)) / w
 
-                class FakeLandmarks:
-                    def __init__(self, landmarks):
-                        self.landmark = [FakeLandmark(lm["x"], lm["y"], lm["z"], lm["visibility"]) for lm in landmarks]
-
-                fake_landmarks = FakeLandmarks(adjusted_landmarks)
-                hand_data = self._process_hand_landmarks(fake_landmarks, hand_info, frame.shape, 1)
+                hand_data = self._process_hand_landmarks(landmarks, hand_info, frame.shape, 1)
                 all_hands.append(hand_data)
 
         # 重複を除去（同じ手が2回検出された場合）
@@ -316,8 +370,40 @@ class HandSkeletonDetector:
         else:
             return all_hands[:2]  # 最大2つまで
     
+    def _get_split_executor(self) -> ThreadPoolExecutor:
+        """左右分割検出用のワーカースレッドを取得"""
+        if self._split_executor is None:
+            self._split_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hands-split")
+        return self._split_executor
+
+    @staticmethod
+    def _contains_hand(hands: List[Dict], x_start: float, x_end: float) -> bool:
+        """x方向の範囲 [x_start, x_end] にBBoxが丸ごと収まる手があるか"""
+        return any(
+            x_start <= hand["bbox"]["x_min"] and hand["bbox"]["x_max"] <= x_end
+            for hand in hands
+        )
+
+    @staticmethod
+    def _landmarks_to_array(hand_landmarks) -> np.ndarray:
+        """
+        MediaPipeのランドマークを (21, 3) の配列に一括変換
+
+        visibilityはPose用の項目でHandsでは常に0.0のため含めない
+
+        Args:
+            hand_landmarks: MediaPipeのランドマーク
+
+        Returns:
+            [x, y, z] を行とする正規化座標の配列
+        """
+        return np.array(
+            [(lm.x, lm.y, lm.z) for lm in hand_landmarks.landmark],
+            dtype=np.float64
+        )
+
     def _process_hand_landmarks(self,
-                                hand_landmarks,
+                                landmarks: np.ndarray,
                                 hand_info,
                                 frame_shape: Tuple[int, int, int],
                                 hand_idx: int = 0) -> Dict[str, Any]:
@@ -325,7 +411,7 @@ class HandSkeletonDetector:
         手のランドマークを処理
         
         Args:
-            hand_landmarks: MediaPipeのランドマーク
+            landmarks: 正規化座標のランドマーク配列 (21, 3)
             hand_info: 手の情報（左右など）
             frame_shape: フレームの形状
         
@@ -333,19 +419,15 @@ class HandSkeletonDetector:
             処理された手のデータ
         """
         height, width = frame_shape[:2]
+
+        # ピクセル座標に変換（以降の計算は配列のまま行う）
+        points = landmarks.copy()
+        points[:, 0] *= width
+        points[:, 1] *= height
         
-        landmarks_list = []
-        for landmark in hand_landmarks.landmark:
-            landmarks_list.append({
-                "x": landmark.x * width,
-                "y": landmark.y * height,
-                "z": landmark.z,
-                "visibility": landmark.visibility
-            })
-        
-        finger_angles = self._calculate_finger_angles(landmarks_list)
+        finger_angles = self._calculate_finger_angles(points)
         
-        palm_center = self._calculate_palm_center(landmarks_list)
+        palm_center = self._calculate_palm_center(points)
         
         hand_openness = self._calculate_hand_openness(finger_angles)
 
@@ -363,6 +445,12 @@ class HandSkeletonDetector:
         # Add hand_id for tracking (like in reference code)
         hand_id = hand_idx
 
+        # APIの出力形式（辞書のリスト）への変換はここで1回だけ行う
+        landmarks_list = [
+            {"x": x, "y": y, "z": z}
+            for x, y, z in points.tolist()
+        ]
+
         return {
             "hand_id": hand_id,  # Add hand_id like reference code
             "label": final_label,
@@ -372,82 +460,50 @@ class HandSkeletonDetector:
             "finger_angles": finger_angles,
             "palm_center": palm_center,
             "hand_openness": hand_openness,
-            "bbox": self._calculate_bbox(landmarks_list)
+            "bbox": self._calculate_bbox(points)
         }
     
-    def _calculate_finger_angles(self, landmarks: List[Dict[str, float]]) -> Dict[str, float]:
+    def _calculate_finger_angles(self, points: np.ndarray) -> Dict[str, float]:
         """
-        各指の曲がり角度を計算
+        各指の曲がり角度を計算（5本分をまとめてベクトル演算）
         
         Args:
-            landmarks: ランドマークのリスト
+            points: ピクセル座標のランドマーク配列 (21, 2+)
         
         Returns:
             各指の角度（度数）
         """
-        angles = {}
-        
-        for finger_name in self.FINGER_NAMES:
-            landmark_ids = self.FINGER_LANDMARK_IDS[finger_name]
-            
-            if finger_name == 'thumb':
-                p1 = np.array([landmarks[0]["x"], landmarks[0]["y"]])
-                p2 = np.array([landmarks[landmark_ids[1]]["x"], 
-                             landmarks[landmark_ids[1]]["y"]])
-                p3 = np.array([landmarks[landmark_ids[2]]["x"], 
-                             landmarks[landmark_ids[2]]["y"]])
-            else:
-                p1 = np.array([landmarks[landmark_ids[0]]["x"], 
-                             landmarks[landmark_ids[0]]["y"]])
-                p2 = np.array([landmarks[landmark_ids[1]]["x"], 
-                             landmarks[landmark_ids[1]]["y"]])
-                p3 = np.array([landmarks[landmark_ids[2]]["x"], 
-                             landmarks[landmark_ids[2]]["y"]])
-            
-            angle = self._calculate_angle(p1, p2, p3)
-            angles[finger_name] = angle
-        
-        return angles
-    
-    def _calculate_angle(self, p1: np.ndarray, p2: np.ndarray, p3: np.ndarray) -> float:
-        """
-        3点間の角度を計算
-        
-        Args:
-            p1, p2, p3: 3つの点の座標
-        
-        Returns:
-            角度（度数）
-        """
-        v1 = p1 - p2
-        v2 = p3 - p2
-        
-        cos_angle = np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2) + 1e-6)
-        
-        cos_angle = np.clip(cos_angle, -1.0, 1.0)
-        
-        angle = np.degrees(np.arccos(cos_angle))
-        
-        return float(angle)
+        # 要素数が小さいため、配列演算の呼び出し回数そのものがコストになる。
+        # (3, 5, 2) で一括取得し、v[0]=基部-関節, v[1]=先端-関節 を1回の減算で求める
+        triplets = points[self._ANGLE_TRIPLET_IDS, :2]
+        v = triplets[:2] - triplets[2]
+
+        cos_angle = (v[0] * v[1]).sum(axis=-1) / (
+            np.sqrt((v * v).sum(axis=-1)).prod(axis=0) + 1e-6
+        )
+        # np.clip は小さな配列ではオーバーヘッドが大きいため ufunc で直接クリップ
+        np.minimum(cos_angle, 1.0, out=cos_angle)
+        np.maximum(cos_angle, -1.0, out=cos_angle)
+
+        angles = np.degrees(np.arccos(cos_angle, out=cos_angle), out=cos_angle)
+
+        return dict(zip(self.FINGER_NAMES, angles.tolist()))
     
-    def _calculate_palm_center(self, landmarks: List[Dict[str, float]]) -> Dict[str, float]:
+    def _calculate_palm_center(self, points: np.ndarray) -> Dict[str, float]:
         """
         手のひらの中心座標を計算
         
         Args:
-            landmarks: ランドマークのリスト
+            points: ピクセル座標のランドマーク配列 (21, 2+)
         
         Returns:
             中心座標
         """
-        palm_landmarks = [0, 1, 5, 9, 13, 17]
-        
-        x_coords = [landmarks[i]["x"] for i in palm_landmarks]
-        y_coords = [landmarks[i]["y"] for i in palm_landmarks]
+        center = points[self.PALM_LANDMARK_IDS, :2].sum(axis=0) / len(self.PALM_LANDMARK_IDS)
         
         return {
-            "x": float(np.mean(x_coords)),
-            "y": float(np.mean(y_coords))
+            "x": float(center[0]),
+            "y": float(center[1])
         }
     
     def _calculate_hand_openness(self, finger_angles: Dict[str, float]) -> float:
@@ -462,73 +518,63 @@ class HandSkeletonDetector:
         """
         max_angle = 180.0
         
-        total_openness = 0
-        for finger, angle in finger_angles.items():
-            openness = (max_angle - angle) / max_angle
-            total_openness += openness
+        total_openness = sum((max_angle - angle) / max_angle for angle in finger_angles.values())
         
         average_openness = (total_openness / len(finger_angles)) * 100
         
-        return float(np.clip(average_openness, 0, 100))
+        # スカラーなので np.clip ではなく組み込み関数でクリップ
+        return float(min(max(average_openness, 0.0), 100.0))
     
-    def _calculate_bbox(self, landmarks: List[Dict[str, float]]) -> Dict[str, float]:
+    def _calculate_bbox(self, points: np.ndarray) -> Dict[str, float]:
         """
         手の境界ボックスを計算
         
         Args:
-            landmarks: ランドマークのリスト
+            points: ピクセル座標のランドマーク配列 (21, 2+)
         
         Returns:
             境界ボックス座標
         """
-        x_coords = [lm["x"] for lm in landmarks]
-        y_coords = [lm["y"] for lm in landmarks]
+        x_min, y_min = points[:, :2].min(axis=0)
+        x_max, y_max = points[:, :2].max(axis=0)
         
         margin = 20
         
         return {
-            "x_min": float(max(0, min(x_coords) - margin)),
-            "y_min": float(max(0, min(y_coords) - margin)),
-            "x_max": float(max(x_coords) + margin),
-            "y_max": float(max(y_coords) + margin)
+            "x_min": float(max(0, x_min - margin)),
+            "y_min": float(max(0, y_min - margin)),
+            "x_max": float(x_max + margin),
+            "y_max": float(y_max + margin)
         }
     
-    def draw_landmarks(self, frame: np.ndarray, detection_result: Dict[str, Any]) -> np.ndarray:
+    def draw_landmarks(self,
+                       frame: np.ndarray,
+                       detection_result: Dict[str, Any],
+                       inplace: bool = False) -> np.ndarray:
         """
         検出結果を画像に描画
         
         Args:
             frame: 入力画像
             detection_result: 検出結果
+            inplace: Trueの場合はコピーせず入力画像に直接描画
         
         Returns:
             描画された画像
         """
-        annotated_frame = frame.copy()
+        annotated_frame = frame if inplace else frame.copy()
         
         for hand_data in detection_result.get("hands", []):
             landmarks = hand_data["landmarks"]
+            points = np.array([(lm["x"], lm["y"]) for lm in landmarks]).astype(np.int32)
+            
+            # 骨格の線分は (E, 2, 2) の配列として1回のpolylinesで描画
+            if len(points) > 1:
+                connections = self._BONE_CONNECTIONS[:len(points) - 1]
+                cv2.polylines(annotated_frame, points[connections], False, (0, 255, 0), 2)
             
-            for i, landmark in enumerate(landmarks):
-                x = int(landmark["x"])
-                y = int(landmark["y"])
+            for x, y in points.tolist():
                 cv2.circle(annotated_frame, (x, y), 5, (0, 255, 0), -1)
-                
-                if i > 0:
-                    if i in [1, 5, 9, 13, 17]:
-                        prev_idx = 0
-                    elif i in [2, 6, 10, 14, 18]:
-                        prev_idx = i - 1
-                    elif i in [3, 7, 11, 15, 19]:
-                        prev_idx = i - 1
-                    elif i in [4, 8, 12, 16, 20]:
-                        prev_idx = i - 1
-                    else:
-                        prev_idx = i - 1
-                    
-                    prev_x = int(landmarks[prev_idx]["x"])
-                    prev_y = int(landmarks[prev_idx]["y"])
-                    cv2.line(annotated_frame, (prev_x, prev_y), (x, y), (0, 255, 0), 2)
             
             label = f"{hand_data['label']} ({hand_data['confidence']:.2f})"
             bbox = hand_data["bbox"]
@@ -543,28 +589,90 @@ class HandSkeletonDetector:
         
         return annotated_frame
 
-    def detect_batch(self, frames: List[np.ndarray]) -> List[Dict[str, Any]]:
+    def detect_batch(self, frames: List[np.ndarray], color: str = "BGR") -> List[Dict[str, Any]]:
         """
         複数フレームに対してバッチ検出を実行
 
         Args:
             frames: フレームのリスト
+            color: フレームの色順（"BGR" または "RGB"）
 
         Returns:
             検出結果のリスト
         """
         results = []
         for idx, frame in enumerate(frames):
-            result = self.detect_from_frame(frame)
+            result = self.detect_from_frame(frame, color)
             result['frame_index'] = idx  # フレームインデックスを追加
             results.append(result)
         return results
 
+    def detect_batch_parallel(self,
+                              frames: List[np.ndarray],
+                              num_workers: Optional[int] = None,
+                              color: str = "BGR") -> List[Dict[str, Any]]:
+        """
+        複数フレームをプロセス並列でバッチ検出
+
+        フレームを連続したチャンクに分割し、各ワーカープロセスが
+        同じ設定で生成した自前の検出器で処理する（MediaPipeはpickle不可）。
+        トラッキング状態はチャンク境界でリセットされる
+
+        Args:
+            frames: フレームのリスト
+            num_workers: ワーカープロセス数（Noneの場合はCPUコア数）
+            color: フレームの色順（"BGR" または "RGB"）
+
+        Returns:
+            検出結果のリスト（detect_batchと同じ順序・frame_index）
+        """
+        num_workers = min(num_workers or os.cpu_count() or 1, len(frames))
+        if num_workers <= 1:
+            return self.detect_batch(frames, color)
+
+        chunk_size = -(-len(frames) // num_workers)
+        starts = list(range(0, len(frames), chunk_size))
+        chunks = [frames[start:start + chunk_size] for start in starts]
+
+        logger.info(f"Parallel skeleton detection: {len(frames)} frames, {len(chunks)} workers")
+
+        # forkはMediaPipe内部スレッドと相性が悪いためspawnで起動する
+        with ProcessPoolExecutor(
+            max_workers=len(chunks),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self._init_kwargs,)
+        ) as executor:
+            results = []
+            for chunk_results in executor.map(_detect_chunk, starts, chunks, [color] * len(chunks)):
+                results.extend(chunk_results)
+        return results
+
     def __del__(self):
         """クリーンアップ"""
+        if getattr(self, '_split_executor', None):
+            self._split_executor.shutdown(wait=True)
         if hasattr(self, 'hands'):
             self.hands.close()
         if hasattr(self, 'hands_left') and self.hands_left:
             self.hands_left.close()
         if hasattr(self, 'hands_right') and self.hands_right:
-            self.hands_right.close()
\ No newline at end of file
+            self.hands_right.close()
+
+
+# プロセス並列検出用（ワーカープロセスごとに1インスタンス）
+_worker_detector: Optional[HandSkeletonDetector] = None
+
+
+def _init_worker(detector_kwargs: Dict[str, Any]) -> None:
+    """ワーカープロセスの検出器を初期化"""
+    global _worker_detector
+    _worker_detector = HandSkeletonDetector(**detector_kwargs)
+
+
+def _detect_chunk(start_index: int, frames: List[np.ndarray], color: str = "BGR") -> List[Dict[str, Any]]:
+    """チャンクを検出し、frame_indexを全体の通し番号に補正"""
+    results = _worker_detector.detect_batch(frames, color)
+    for result in results:
+        result['frame_index'] += start_index
+    return results
@@ -0,0 +1,109 @@
+"""
+器具先端検出のカーネル
+
+輪郭点の主軸方向への射影・最遠点の選択・BBox内判定を1つのループにまとめる
+Numbaがあればnjitでコンパイルし、無い場合は同じ結果を返すNumPy版を使う
+"""
+
+import numpy as np
+from typing import Tuple
+
+# numba（任意）: 検出ごとに呼ばれる先端検出をネイティブコードで実行
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# tip_from_contour() の判定結果
+TIP_FOUND = 0           # 先端点がBBox内で見つかった
+TIP_OUTSIDE_BBOX = 1    # 先端点がBBox外
+TIP_NOT_FOUND = 2       # 主軸方向に重心から離れた輪郭点が無い（重心を返す）
+
+
+def _tip_from_contour_loop(pts, cx, cy, axis_x, axis_y, x1, y1, x2, y2):
+    """輪郭点を1回走査して先端点を求める（Numba用）
+
+    正方向の最大射影点を優先し、無ければ負方向の最小射影点を使う
+    同値の場合は先に現れた点を選ぶ（np.argmax / np.argminと同じ）
+    """
+    pos_index = -1
+    neg_index = -1
+    max_proj = 0.0
+    min_proj = 0.0
+
+    for i in range(pts.shape[0]):
+        proj = (pts[i, 0] - cx) * axis_x + (pts[i, 1] - cy) * axis_y
+        if pos_index < 0 or proj > max_proj:
+            max_proj = proj
+            pos_index = i
+        if neg_index < 0 or proj < min_proj:
+            min_proj = proj
+            neg_index = i
+
+    if pos_index >= 0 and max_proj > 0:
+        index = pos_index
+    elif neg_index >= 0 and min_proj < 0:
+        index = neg_index
+    else:
+        return cx, cy, TIP_NOT_FOUND
+
+    tx = pts[index, 0]
+    ty = pts[index, 1]
+    if x1 <= tx <= x2 and y1 <= ty <= y2:
+        return tx, ty, TIP_FOUND
+    return tx, ty, TIP_OUTSIDE_BBOX
+
+
+def _tip_from_contour_numpy(pts, cx, cy, axis_x, axis_y, x1, y1, x2, y2):
+    """_tip_from_contour_loop() と同じ処理をNumPyのベクトル演算で行う"""
+    projections = (pts - np.array([cx, cy])) @ np.array([axis_x, axis_y])
+    pos_index = projections.argmax()
+    neg_index = projections.argmin()
+
+    if projections[pos_index] > 0:
+        index = pos_index
+    elif projections[neg_index] < 0:
+        index = neg_index
+    else:
+        return cx, cy, TIP_NOT_FOUND
+
+    tx, ty = pts[index].tolist()
+    if x1 <= tx <= x2 and y1 <= ty <= y2:
+        return tx, ty, TIP_FOUND
+    return tx, ty, TIP_OUTSIDE_BBOX
+
+
+if NUMBA_AVAILABLE:
+    _tip_kernel = njit(cache=True)(_tip_from_contour_loop)
+    # import時に一度呼んでコンパイルしておく（初回検出でのJIT待ちを避ける）
+    _tip_kernel(np.zeros((1, 2), dtype=np.int32), 0, 0, 1.0, 0.0, 0, 0, 0, 0)
+else:
+    _tip_kernel = _tip_from_contour_numpy
+
+
+def tip_from_contour(
+    contour: np.ndarray,
+    centroid: Tuple[int, int],
+    principal_axis: np.ndarray,
+    bbox: Tuple[int, int, int, int]
+) -> Tuple[int, int, int]:
+    """輪郭上で主軸方向に重心から最も遠い点を先端として返す
+
+    Args:
+        contour: cv2.findContoursの輪郭 (N, 1, 2) int32
+        centroid: 重心 (cx, cy)
+        principal_axis: 主軸の単位ベクトル (x, y)
+        bbox: [x1, y1, x2, y2]
+
+    Returns:
+        (x, y, status) statusはTIP_FOUND / TIP_OUTSIDE_BBOX / TIP_NOT_FOUND
+        TIP_NOT_FOUNDの場合、(x, y) は重心
+    """
+    x1, y1, x2, y2 = (int(v) for v in bbox)
+    tx, ty, status = _tip_kernel(
+        contour.reshape(-1, 2), int(centroid[0]), int(centroid[1]),
+        float(principal_axis[0]), float(principal_axis[1]),
+        x1, y1, x2, y2
+    )
+    return int(tx), int(ty), int(status)
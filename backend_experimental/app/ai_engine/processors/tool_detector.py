@@ -9,8 +9,10 @@ import cv2
 import numpy as np
 from typing import Dict, List, Any, Optional, Tuple
 import logging
+import threading
 from enum import Enum
-import random
+from pathlib import Path
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
@@ -38,15 +40,84 @@ class SurgicalTool(Enum):
     DISSECTOR = "dissector"            # 剥離子
 
 
+_SURGICAL_TOOLS = list(SurgicalTool)
+
+# 手術器具クラスマッピング（COCOクラスから）
+_COCO_TO_SURGICAL = {
+    43: "knife",  # knife → scalpel
+    76: "scissors",  # scissors → surgical scissors
+    # 他のクラスも器具として扱う可能性
+    45: "bowl",  # bowl → surgical bowl
+    47: "cup",  # cup → medicine cup
+}
+
+
+# ロード済みYOLOモデルのキャッシュ（モデルファイルの絶対パス → (モデル, 推論ロック)）
+# 同じモデルを使うToolDetectorが複数生成されても、重みのロードとGPUメモリ確保は1回で済む
+_MODEL_CACHE: Dict[str, Tuple[Any, threading.Lock]] = {}
+_MODEL_CACHE_LOCK = threading.Lock()
+
+
+def _get_shared_model(model_path, loader) -> Tuple[Any, threading.Lock]:
+    """
+    キャッシュ済みのモデルを取得（未ロードならloaderでロードして登録）
+
+    ultralyticsの推論はスレッドセーフではないため、共有するモデルごとに
+    推論用のロックを1つ持たせる
+
+    Args:
+        model_path: モデルファイルのパス
+        loader: モデルをロードする呼び出し可能オブジェクト
+
+    Returns:
+        (model, lock): 共有モデルとその推論ロック
+    """
+    key = str(Path(model_path).resolve())
+    with _MODEL_CACHE_LOCK:
+        if key not in _MODEL_CACHE:
+            _MODEL_CACHE[key] = (loader(), threading.Lock())
+        return _MODEL_CACHE[key]
+
+
+@lru_cache(maxsize=2048)
+def _label_size(label: str) -> Tuple[int, int]:
+    """
+    ラベル文字列の描画サイズ (幅, 高さ) を取得
+
+    ラベルは「器具名 + 小数2桁の信頼度」で種類が限られるため、
+    getTextSizeの結果をキャッシュして描画ごとの計測を省く
+    """
+    (width, height), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
+    return width, height
+
+
 class ToolDetector:
     """手術器具検出クラス"""
+
+    MODEL_IMGSZ = 640  # YOLO入力サイズの既定値
+    INT8_ENGINE_SUFFIX = "_int8.engine"  # TensorRT INT8エンジンのファイル名サフィックス
+
+    # カラーマップ（器具タイプごとに色を変える）
+    COLOR_MAP = {
+        "forceps": (0, 255, 0),        # 緑
+        "scissors": (255, 0, 0),       # 青
+        "needle_holder": (0, 0, 255),  # 赤
+        "scalpel": (255, 255, 0),      # シアン
+        "retractor": (255, 0, 255),    # マゼンタ
+        "suction": (0, 255, 255),      # イエロー
+        "electrocautery": (128, 255, 128),
+        "clip_applier": (255, 128, 128),
+        "grasper": (128, 128, 255),
+        "dissector": (255, 255, 128)
+    }
     
     def __init__(self,
                  model_size: YOLOModel = YOLOModel.NANO,
                  confidence_threshold: float = 0.5,
                  nms_threshold: float = 0.45,
                  use_gpu: bool = False,
-                 force_mock: bool = False):
+                 force_mock: bool = False,
+                 imgsz: int = MODEL_IMGSZ):
         """
         初期化
 
@@ -56,12 +127,19 @@ class ToolDetector:
             nms_threshold: Non-Maximum Suppressionの閾値
             use_gpu: GPU使用フラグ
             force_mock: 強制的にモックモードを使用
+            imgsz: YOLOの推論解像度（32の倍数。小さいほど高速だが小さな器具を見逃しやすい。
+                   TensorRTエンジン使用時はエクスポート時のサイズと合わせること）
         """
         self.model_size = model_size
         self.confidence_threshold = confidence_threshold
         self.nms_threshold = nms_threshold
         self.use_gpu = use_gpu
+        self.imgsz = imgsz
         self.model = None
+        self._model_lock = threading.Lock()  # モデルを共有する場合は共有モデルのロックに置き換わる
+        self._device = None  # GPU前処理を行うデバイス（Noneの場合はultralyticsのCPU前処理）
+        # モック検出用の乱数生成器（1フレーム分の値をまとめて生成する）
+        self._rng = np.random.default_rng()
 
         if force_mock:
             self.is_mock = True
@@ -72,6 +150,8 @@ class ToolDetector:
             try:
                 self.model = self._load_model()
                 self.is_mock = False
+                if use_gpu:
+                    self._init_gpu_preprocess()
                 logger.info(f"ToolDetector initialized with {model_size.value} model (Real YOLO)")
             except Exception as e:
                 logger.warning(f"Failed to load YOLO model, falling back to mock mode: {e}")
@@ -93,31 +173,108 @@ class ToolDetector:
         except ImportError:
             raise Exception("ultralytics package not installed")
 
-        from pathlib import Path
+        # GPU使用時はTensorRTのINT8エンジン（scripts/maintenance/export_yolo_int8.pyで生成）を優先
+        if self.use_gpu:
+            engine_path = self._find_model_file(f"{self.model_size.value}{self.INT8_ENGINE_SUFFIX}")
+            if engine_path:
+                model, self._model_lock = _get_shared_model(
+                    engine_path, lambda: YOLO(str(engine_path), task="detect")
+                )
+                logger.info(f"Successfully loaded {self.model_size.value} TensorRT INT8 engine")
+                return model
 
-        # モデルファイルを探索
         model_filename = f"{self.model_size.value}.pt"
+        model_path = self._find_model_file(model_filename)
+
+        if not model_path:
+            raise Exception(f"YOLO model not found: {model_filename}")
+
+        # モデルロード（同じモデルファイルは全インスタンスで共有）
+        model, self._model_lock = _get_shared_model(model_path, lambda: YOLO(str(model_path)))
+        logger.info(f"Successfully loaded {self.model_size.value} YOLO model")
+        return model
+
+    @staticmethod
+    def _find_model_file(model_filename: str):
+        """
+        モデルファイルを探索
+
+        Args:
+            model_filename: モデルのファイル名
+
+        Returns:
+            見つかったパス（見つからない場合はNone）
+        """
         possible_paths = [
             Path(model_filename),  # カレントディレクトリ
             Path(f"backend_experimental/{model_filename}"),  # プロジェクトルートから
             Path(__file__).parent.parent.parent.parent / model_filename  # 絶対パス
         ]
 
-        model_path = None
         for path in possible_paths:
             if path.exists():
-                model_path = path
-                logger.info(f"Found YOLO model at: {model_path}")
-                break
+                logger.info(f"Found YOLO model at: {path}")
+                return path
 
-        if not model_path:
-            raise Exception(f"YOLO model not found: {model_filename}")
-
-        # モデルロード
-        model = YOLO(str(model_path))
-        logger.info(f"Successfully loaded {self.model_size.value} YOLO model")
-        return model
+        return None
     
+    def _init_gpu_preprocess(self):
+        """CUDAが使える場合、YOLOの前処理（リサイズ・BGR→RGB・正規化）をGPUで行う"""
+        import torch
+
+        if not torch.cuda.is_available():
+            logger.warning("CUDA is not available, YOLO preprocessing stays on CPU")
+            return
+
+        self._device = "cuda"
+        # 入力サイズが固定のためcuDNNに最速の畳み込みアルゴリズムを選ばせる
+        torch.backends.cudnn.benchmark = True
+        logger.info("YOLO preprocessing moved to GPU")
+
+    def _to_gpu_tensor(self, frames: List[np.ndarray]):
+        """
+        BGRフレームをデバイス上でYOLO入力テンソルに変換
+
+        Args:
+            frames: 同じサイズのフレームのリスト (BGR, uint8)
+
+        Returns:
+            (B, 3, imgsz, imgsz) のRGB・0-1正規化テンソル
+        """
+        import torch
+        import torch.nn.functional as F
+
+        batch = torch.from_numpy(np.stack(frames)).to(self._device, non_blocking=True)
+        # HWC→CHW、チャンネル反転でBGR→RGB、0-1に正規化
+        batch = batch.permute(0, 3, 1, 2).flip(1).float().div_(255.0)
+        return F.interpolate(batch, size=(self.imgsz, self.imgsz),
+                             mode="bilinear", align_corners=False)
+
+    def _infer(self, frames: List[np.ndarray]) -> List[Dict[str, Any]]:
+        """
+        YOLO推論を実行し、フレームごとの検出結果を返す
+
+        GPU前処理が有効な場合はデバイス上で作成したテンソルを渡し
+        （ultralyticsはテンソル入力では前処理を省略する）、BBoxを元のフレーム座標へ戻す
+
+        Args:
+            frames: フレームのリスト (BGR)
+
+        Returns:
+            検出結果のリスト
+        """
+        inputs = self._to_gpu_tensor(frames) if self._device is not None else frames
+        with self._model_lock:
+            results = self.model(inputs, conf=self.confidence_threshold, imgsz=self.imgsz, verbose=False)
+
+        detections = []
+        # 推論結果は入力フレームと同じ順序で1フレーム1件
+        for frame, result in zip(frames, results):
+            height, width = frame.shape[:2]
+            scale = (width / self.imgsz, height / self.imgsz) if self._device is not None else (1.0, 1.0)
+            detections.append(self._parse_results([result], frame.shape, scale))
+        return detections
+
     def detect_from_frame(self, frame: np.ndarray) -> Dict[str, Any]:
         """
         フレームから手術器具を検出
@@ -146,19 +303,60 @@ class ToolDetector:
         if self.model is None:
             raise RuntimeError("YOLO model not loaded")
 
-        height, width = frame.shape[:2]
-
         # YOLO推論実行
-        results = self.model(frame, conf=self.confidence_threshold, verbose=False)
-
-        # 手術器具クラスマッピング（COCOクラスから）
-        coco_to_surgical = {
-            43: "knife",  # knife → scalpel
-            76: "scissors",  # scissors → surgical scissors
-            # 他のクラスも器具として扱う可能性
-            45: "bowl",  # bowl → surgical bowl
-            47: "cup",  # cup → medicine cup
-        }
+        detection_result = self._infer([frame])[0]
+        logger.info(f"Detected {len(detection_result['instruments'])} instruments")
+        return detection_result
+
+    def detect_batch(self,
+                     frames: List[np.ndarray],
+                     batch_size: int = 16) -> List[Dict[str, Any]]:
+        """
+        複数フレームに対してバッチ検出を実行
+
+        YOLOにはbatch_size枚ずつまとめて渡し、1回の推論で複数フレームを処理する
+        （GPUではフレームごとの推論よりカーネル起動のオーバーヘッドが小さい）
+
+        Args:
+            frames: フレームのリスト (BGR)
+            batch_size: 1回の推論に渡すフレーム数
+
+        Returns:
+            検出結果のリスト（frame_index付き）
+        """
+        if self.is_mock:
+            results = [self._mock_detection(frame) for frame in frames]
+        else:
+            if self.model is None:
+                raise RuntimeError("YOLO model not loaded")
+
+            results = []
+            for start in range(0, len(frames), batch_size):
+                results.extend(self._infer(frames[start:start + batch_size]))
+
+            logger.info(f"Detected {sum(len(r['instruments']) for r in results)} instruments "
+                        f"in {len(frames)} frames")
+
+        for idx, result in enumerate(results):
+            result['frame_index'] = idx  # フレームインデックスを追加
+        return results
+
+    def _parse_results(self,
+                       results,
+                       frame_shape: Tuple[int, ...],
+                       scale: Tuple[float, float] = (1.0, 1.0)) -> Dict[str, Any]:
+        """
+        YOLOの推論結果（1フレーム分）を検出結果の辞書に変換
+
+        Args:
+            results: 1フレーム分のultralytics Resultsのリスト
+            frame_shape: 入力フレームの形状
+            scale: BBox座標に掛ける (x, y) の倍率（推論入力と元フレームのサイズ比）
+
+        Returns:
+            検出結果
+        """
+        height, width = frame_shape[:2]
 
         detection_result = {
             "instruments": [],
@@ -178,9 +376,11 @@ class ToolDetector:
                 cls_id = int(box.cls[0].item())
                 confidence = float(box.conf[0].item())
                 x1, y1, x2, y2 = box.xyxy[0].tolist()
+                x1, x2 = x1 * scale[0], x2 * scale[0]
+                y1, y2 = y1 * scale[1], y2 * scale[1]
 
                 # 器具として認識可能なクラスのみ
-                tool_type = coco_to_surgical.get(cls_id, f"object_{cls_id}")
+                tool_type = _COCO_TO_SURGICAL.get(cls_id, f"object_{cls_id}")
 
                 # 中心座標計算
                 center_x = (x1 + x2) / 2
@@ -207,7 +407,6 @@ class ToolDetector:
 
                 detection_result["instruments"].append(instrument_data)
 
-        logger.info(f"Detected {len(detection_result['instruments'])} instruments")
         return detection_result
     
     def _mock_detection(self, frame: np.ndarray) -> Dict[str, Any]:
@@ -233,47 +432,46 @@ class ToolDetector:
         }
         
         # ランダムに器具を検出（シミュレーション）
-        if random.random() < self.mock_detection_probability:
-            num_instruments = random.randint(1, 3)
+        if self._rng.random() < self.mock_detection_probability:
+            rng = self._rng
+            num_instruments = int(rng.integers(1, 3, endpoint=True))
             
-            for i in range(num_instruments):
-                # ランダムな器具タイプを選択
-                tool_type = random.choice(list(SurgicalTool))
-                
-                # ランダムな位置とサイズを生成
-                center_x = random.randint(width // 4, 3 * width // 4)
-                center_y = random.randint(height // 4, 3 * height // 4)
-                box_width = random.randint(50, min(200, width // 3))
-                box_height = random.randint(30, min(150, height // 3))
-                
-                x_min = max(0, center_x - box_width // 2)
-                y_min = max(0, center_y - box_height // 2)
-                x_max = min(width, center_x + box_width // 2)
-                y_max = min(height, center_y + box_height // 2)
-                
-                # 信頼度をランダムに生成
-                confidence = random.uniform(self.confidence_threshold, 0.95)
-                
-                # 器具の向きを計算（簡易版）
-                orientation = random.uniform(0, 360)
-                
+            # 器具タイプ・位置・サイズ・信頼度・向きを器具数分まとめて生成
+            tool_types = rng.choice(len(_SURGICAL_TOOLS), size=num_instruments)
+            center_x = rng.integers(width // 4, 3 * width // 4, size=num_instruments, endpoint=True)
+            center_y = rng.integers(height // 4, 3 * height // 4, size=num_instruments, endpoint=True)
+            box_width = rng.integers(50, min(200, width // 3), size=num_instruments, endpoint=True)
+            box_height = rng.integers(30, min(150, height // 3), size=num_instruments, endpoint=True)
+            confidence = rng.uniform(self.confidence_threshold, 0.95, size=num_instruments)
+            orientation = rng.uniform(0, 360, size=num_instruments)
+            
+            x_min = np.maximum(0, center_x - box_width // 2)
+            y_min = np.maximum(0, center_y - box_height // 2)
+            x_max = np.minimum(width, center_x + box_width // 2)
+            y_max = np.minimum(height, center_y + box_height // 2)
+            
+            for i, (tool_idx, cx, cy, x0, y0, x1, y1, conf, angle) in enumerate(zip(
+                tool_types.tolist(), center_x.tolist(), center_y.tolist(),
+                x_min.tolist(), y_min.tolist(), x_max.tolist(), y_max.tolist(),
+                confidence.tolist(), orientation.tolist()
+            )):
                 instrument_data = {
                     "id": i,
-                    "type": tool_type.value,
-                    "confidence": float(confidence),
+                    "type": _SURGICAL_TOOLS[tool_idx].value,
+                    "confidence": float(conf),
                     "bbox": {
-                        "x_min": float(x_min),
-                        "y_min": float(y_min),
-                        "x_max": float(x_max),
-                        "y_max": float(y_max)
+                        "x_min": float(x0),
+                        "y_min": float(y0),
+                        "x_max": float(x1),
+                        "y_max": float(y1)
                     },
                     "center": {
-                        "x": float(center_x),
-                        "y": float(center_y)
+                        "x": float(cx),
+                        "y": float(cy)
                     },
-                    "orientation": float(orientation),
-                    "area": float((x_max - x_min) * (y_max - y_min)),
-                    "aspect_ratio": float((x_max - x_min) / (y_max - y_min + 1e-6))
+                    "orientation": float(angle),
+                    "area": float((x1 - x0) * (y1 - y0)),
+                    "aspect_ratio": float((x1 - x0) / (y1 - y0 + 1e-6))
                 }
                 
                 detection_result["instruments"].append(instrument_data)
@@ -426,32 +624,21 @@ class ToolDetector:
     
     def draw_detections(self, 
                        frame: np.ndarray, 
-                       detection_result: Dict[str, Any]) -> np.ndarray:
+                       detection_result: Dict[str, Any],
+                       inplace: bool = False) -> np.ndarray:
         """
         検出結果を画像に描画
         
         Args:
             frame: 入力画像
             detection_result: 検出結果
+            inplace: Trueの場合はコピーせず入力画像に直接描画
         
         Returns:
             描画された画像
         """
-        annotated_frame = frame.copy()
-        
-        # カラーマップ（器具タイプごとに色を変える）
-        color_map = {
-            "forceps": (0, 255, 0),        # 緑
-            "scissors": (255, 0, 0),       # 青
-            "needle_holder": (0, 0, 255),  # 赤
-            "scalpel": (255, 255, 0),      # シアン
-            "retractor": (255, 0, 255),    # マゼンタ
-            "suction": (0, 255, 255),      # イエロー
-            "electrocautery": (128, 255, 128),
-            "clip_applier": (255, 128, 128),
-            "grasper": (128, 128, 255),
-            "dissector": (255, 255, 128)
-        }
+        annotated_frame = frame if inplace else frame.copy()
+        color_map = self.COLOR_MAP
         
         for instrument in detection_result.get("instruments", []):
             bbox = instrument["bbox"]
@@ -471,7 +658,7 @@ class ToolDetector:
             
             # ラベルを描画
             label = f"{tool_type} ({confidence:.2f})"
-            label_size, _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
+            label_size = _label_size(label)
             
             # ラベル背景
             cv2.rectangle(annotated_frame,
@@ -15,6 +15,7 @@ import logging
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
 
+from .frame_extractor import FrameExtractor
 from .skeleton_detector import HandSkeletonDetector
 from .tool_detector import ToolDetector, YOLOModel
 
@@ -157,28 +158,20 @@ class VideoAnalyzer:
         Returns:
             フレーム解析結果のリスト
         """
-        cap = cv2.VideoCapture(video_path)
-        
-        original_fps = cap.get(cv2.CAP_PROP_FPS)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        frame_interval = int(original_fps / self.output_fps)
-        
         frames_data = []
-        frame_count = 0
         analyzed_count = 0
         
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
+        # デコードはバックグラウンドスレッドで先行させ、検出と重ねて実行する
+        with FrameExtractor(video_path, target_fps=self.output_fps) as extractor:
+            info = extractor.get_info()
+            frame_interval = max(1, int(info.fps / self.output_fps))
             
-            # 指定FPSでサンプリング
-            if frame_count % frame_interval == 0:
+            for frame_count, frame in extractor.extract_frames_threaded():
                 # フレーム解析
                 frame_result = await self._analyze_frame(
                     frame, 
                     frame_count,
-                    frame_count / original_fps,
+                    frame_count / info.fps,
                     video_type
                 )
                 
@@ -187,16 +180,12 @@ class VideoAnalyzer:
                 
                 # 進捗通知
                 if progress_callback:
-                    progress = int((analyzed_count / (total_frames / frame_interval)) * 100)
+                    progress = int((analyzed_count / (info.total_frames / frame_interval)) * 100)
                     await progress_callback(progress, f"Analyzing frame {analyzed_count}")
                 
                 # 可視化の保存（オプション）
                 if self.save_visualizations:
                     self._save_visualization(frame, frame_result, analyzed_count)
-            
-            frame_count += 1
-        
-        cap.release()
         
         logger.info(f"Analyzed {len(frames_data)} frames")
         return frames_data
@@ -604,20 +593,23 @@ class VideoAnalyzer:
             frame_result: 解析結果
             frame_index: フレームインデックス
         """
+        # 元フレームは呼び出し側で再利用されるため1回だけコピーし、以降は直接描画
         annotated_frame = frame.copy()
         
         # 骨格の描画
         if "skeleton" in frame_result["detections"] and self.skeleton_detector:
             annotated_frame = self.skeleton_detector.draw_landmarks(
                 annotated_frame,
-                frame_result["detections"]["skeleton"]
+                frame_result["detections"]["skeleton"],
+                inplace=True
             )
         
         # 器具の描画
         if "tools" in frame_result["detections"] and self.tool_detector:
             annotated_frame = self.tool_detector.draw_detections(
                 annotated_frame,
-                frame_result["detections"]["tools"]
+                frame_result["detections"]["tools"],
+                inplace=True
             )
         
         # スコア情報を描画
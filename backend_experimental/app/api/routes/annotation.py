@@ -205,7 +205,7 @@ async def get_frames(
             frame_urls = []
             frame_count = 0
 
-            for frame_num, frame in extractor.extract_frames_generator():
+            for frame_num, frame in extractor.extract_frames_threaded():
                 if max_frames and frame_count >= max_frames:
                     break
 
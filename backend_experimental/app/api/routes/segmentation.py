@@ -87,6 +87,17 @@ def _translate_tool_name(tool_type: str) -> str:
     return translations.get(tool_type, f"器具_{tool_type}")
 
 
+def _encode_mask_png(mask: np.ndarray) -> str:
+    """Encode a binary mask as a base64 PNG (0/255)
+
+    Writes 0/255 straight into a uint8 buffer; `mask * 255` on a bool mask
+    would first allocate a full-frame int64 array.
+    """
+    mask_uint8 = np.where(mask, np.uint8(255), np.uint8(0))
+    _, mask_encoded = cv2.imencode('.png', mask_uint8)
+    return base64.b64encode(mask_encoded.tobytes()).decode('utf-8')
+
+
 # === Endpoints ===
 
 @router.post(
@@ -151,10 +162,7 @@ async def segment_instrument(
         else:
             raise HTTPException(status_code=400, detail=f"Invalid prompt_type: {prompt_type}")
 
-        mask = result["mask"]
-        mask_uint8 = (mask * 255).astype(np.uint8)
-        _, mask_encoded = cv2.imencode('.png', mask_uint8)
-        mask_base64 = base64.b64encode(mask_encoded.tobytes()).decode('utf-8')
+        mask_base64 = _encode_mask_png(result["mask"])
 
         vis_frame = tracker.visualize_result(frame, result)
         _, vis_encoded = cv2.imencode('.jpg', vis_frame)
@@ -364,10 +372,7 @@ async def segment_from_detection(
             box=(int(x1), int(y1), int(x2), int(y2))
         )
 
-        mask = result["mask"]
-        mask_uint8 = (mask * 255).astype(np.uint8)
-        _, mask_encoded = cv2.imencode('.png', mask_uint8)
-        mask_base64 = base64.b64encode(mask_encoded.tobytes()).decode('utf-8')
+        mask_base64 = _encode_mask_png(result["mask"])
 
         vis_frame = tracker.visualize_result(frame, result)
         _, vis_encoded = cv2.imencode('.jpg', vis_frame)
@@ -35,6 +35,7 @@ class Settings(BaseSettings):
     YOLO_MODEL: str = "yolov8n.pt"
     MEDIAPIPE_MIN_DETECTION_CONFIDENCE: float = 0.8
     MEDIAPIPE_MIN_TRACKING_CONFIDENCE: float = 0.8
+    MEDIAPIPE_NUM_WORKERS: int = 1  # 骨格検出の並列プロセス数（1=逐次処理、2以上でプロセス並列）
 
     # 手袋検出設定
     USE_ADVANCED_GLOVE_DETECTION: bool = False  # 高性能な手袋検出器を使用するか（デフォルト無効で後方互換性維持）
@@ -42,6 +43,7 @@ class Settings(BaseSettings):
     # SAM器具追跡設定
     SAM_USE_MOCK: bool = False  # モックモードを無効化して実際の追跡を使用
     SAM_DEVICE: str = "auto"  # GPU/CPU自動検出 ("auto", "cuda", "cpu")
+    SAM_MODEL_TYPE: str = "vit_h"  # vit_h, vit_l, vit_b, vit_t（MobileSAM: 画像エンコーダが軽量、要mobile_sam）
     SAM_REDETECTION_INTERVAL: int = 30  # 再検出間隔（フレーム数）
     SAM_CONFIDENCE_THRESHOLD: float = 0.7  # 信頼度閾値
     SAM_USE_PROACTIVE_REDETECTION: bool = True  # プロアクティブ再検出を有効化
@@ -63,9 +65,9 @@ class Settings(BaseSettings):
     SAM_ENHANCED_REDETECTION_INTERVAL: int = 15  # 定期的な再検出の間隔（フレーム数）
 
     # SAM2設定
-    USE_SAM2: bool = True  # SAM2を有効化（高精度、JPEG一時保存方式）
+    USE_SAM2: bool = True  # SAM2を有効化（高精度、フレームはメモリ上から直接入力）
     SAM2_MODEL_TYPE: str = "small"  # tiny, small, base_plus, large
-    SAM2_TEMP_DIR: Path = Path("./temp_frames")  # JPEG一時保存ディレクトリ
+    SAM2_INPUT_SIZE: Optional[int] = None  # SAM2の入力解像度（32の倍数: 512/768/1024、None: VRAM 8GB未満は512、それ以外は1024）
 
     # 🧪 実験版: SAM2 Video API設定
     USE_SAM2_VIDEO_API: bool = True  # SAM2 Video APIを使用（Memory Bank + Temporal Context）
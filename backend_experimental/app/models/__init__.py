@@ -1,11 +1,76 @@
+import json
+import math
+
+import numpy as np
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
 
+# orjson（任意）: JSONカラム（フレームごとの骨格・器具データ）のシリアライズを高速化
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def _has_non_finite(obj) -> bool:
+    """NaN・Infを含むか（dict・list・tuple・NumPy配列を再帰的に確認）"""
+    if isinstance(obj, float):
+        return not math.isfinite(obj)
+    if isinstance(obj, dict):
+        return any(_has_non_finite(value) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return any(_has_non_finite(value) for value in obj)
+    if isinstance(obj, (np.ndarray, np.generic)) and np.issubdtype(obj.dtype, np.floating):
+        return not np.isfinite(obj).all()
+    return False
+
+
+def _numpy_default(obj):
+    """json.dumps用: NumPy配列・スカラーをPythonの値に変換"""
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _json_serializer(obj) -> str:
+    """
+    JSONカラムのシリアライザ
+
+    orjsonはNumPy配列・スカラーもそのまま扱える。orjsonはNaN・Infをnullにするため、
+    出力にnullがありNaN・Infを含む場合は従来通りjson.dumpsでNaN・Infのまま書き出す
+    （読み込み側のNumPy計算でNoneにならないように）。orjsonが扱えない値もjson.dumpsを使う
+    """
+    if ORJSON_AVAILABLE:
+        try:
+            data = orjson.dumps(
+                obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            )
+        except TypeError:
+            pass
+        else:
+            if b"null" not in data or not _has_non_finite(obj):
+                return data.decode()
+    return json.dumps(obj, default=_numpy_default)
+
+
+def _json_deserializer(value: str):
+    """JSONカラムのデシリアライザ（既存データのNaN等、orjsonが読めない場合はjson.loads）"""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.loads(value)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(value)
+
+
 engine = create_engine(
     settings.DATABASE_URL,
-    connect_args={"check_same_thread": False}  # SQLite用の設定
+    connect_args={"check_same_thread": False},  # SQLite用の設定
+    json_serializer=_json_serializer,
+    json_deserializer=_json_deserializer
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -59,7 +59,7 @@ def extract_mask_contour(mask: Optional[np.ndarray]) -> List[List[int]]:
         else:
             binary_mask = mask.astype(np.uint8)
 
-        if binary_mask.sum() == 0:
+        if not binary_mask.any():
             return []
 
         contours, _ = cv2.findContours(
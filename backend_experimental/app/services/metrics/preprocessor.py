@@ -27,7 +27,7 @@ def preprocess_skeleton_data(
     対応フォーマット:
     - V2: [{frame_number, timestamp, hands: [{hand_type, landmarks: {"point_0": {x,y}}}]}]
     - V1: [{frame_number, timestamp, landmarks: {"point_0": {x,y}}}]
-    - landmarks list形式: [{x, y, z, visibility}, ...]（point_0がindex 0）
+    - landmarks list形式: [{x, y, z}, ...]（point_0がindex 0。旧データのvisibilityは無視）
     """
     if not skeleton_data:
         return _empty_preprocessed(fps)
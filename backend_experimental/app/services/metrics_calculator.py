@@ -13,6 +13,17 @@ logger = logging.getLogger(__name__)
 class MetricsCalculator:
     """手の動きメトリクス計算クラス"""
 
+    FINGER_NAMES = ["thumb", "index", "middle", "ring", "pinky"]
+    # 各指の角度計算に使う (基部, 中間, 先端) のランドマーク番号
+    _FINGER_TRIPLETS = np.array([
+        [0, 2, 4],    # thumb
+        [0, 6, 8],    # index
+        [0, 10, 12],  # middle
+        [0, 14, 16],  # ring
+        [0, 18, 20],  # pinky
+    ])
+    _FINGER_POINT_IDS = np.unique(_FINGER_TRIPLETS).tolist()
+
     def __init__(self, fps: float = 30.0):
         """
         初期化
@@ -38,7 +49,7 @@ class MetricsCalculator:
 
         # 各メトリクスを計算
         position_metrics = self._calculate_position_metrics(frames_data)
-        velocity_metrics = self._calculate_velocity_metrics(frames_data)
+        velocity_metrics = self._calculate_velocity_metrics(frames_data, position_metrics)
         angle_metrics = self._calculate_angle_metrics(frames_data)
         coordination_metrics = self._calculate_coordination_metrics(frames_data)
 
@@ -161,17 +172,19 @@ class MetricsCalculator:
             "right_hand": right_positions
         }
 
-    def _calculate_velocity_metrics(self, frames_data: Dict) -> Dict:
+    def _calculate_velocity_metrics(self, frames_data: Dict, positions: Optional[Dict] = None) -> Dict:
         """
         速度メトリクスを計算
 
         Args:
             frames_data: フレームごとのデータ
+            positions: 計算済みの位置メトリクス（Noneの場合はここで計算）
 
         Returns:
             速度メトリクス
         """
-        positions = self._calculate_position_metrics(frames_data)
+        if positions is None:
+            positions = self._calculate_position_metrics(frames_data)
         left_velocities = []
         right_velocities = []
 
@@ -219,42 +232,19 @@ class MetricsCalculator:
         right_angles = []
         timestamps = []
 
-        finger_names = ["thumb", "index", "middle", "ring", "pinky"]
-        finger_points = {
-            "thumb": [0, 1, 2, 3, 4],
-            "index": [0, 5, 6, 7, 8],
-            "middle": [0, 9, 10, 11, 12],
-            "ring": [0, 13, 14, 15, 16],
-            "pinky": [0, 17, 18, 19, 20]
-        }
-
         for frame_num in sorted(frames_data.keys()):
             frame = frames_data[frame_num]
             timestamps.append(frame["timestamp"])
 
             # 左手の角度
             if frame["left"] and frame["left"].get("landmarks"):
-                angles = {}
-                for finger in finger_names:
-                    angle = self._calculate_finger_angle(
-                        frame["left"]["landmarks"],
-                        finger_points[finger]
-                    )
-                    angles[finger] = angle
-                left_angles.append(angles)
+                left_angles.append(self._calculate_hand_finger_angles(frame["left"]["landmarks"]))
             else:
                 left_angles.append(None)
 
             # 右手の角度
             if frame["right"] and frame["right"].get("landmarks"):
-                angles = {}
-                for finger in finger_names:
-                    angle = self._calculate_finger_angle(
-                        frame["right"]["landmarks"],
-                        finger_points[finger]
-                    )
-                    angles[finger] = angle
-                right_angles.append(angles)
+                right_angles.append(self._calculate_hand_finger_angles(frame["right"]["landmarks"]))
             else:
                 right_angles.append(None)
 
@@ -264,37 +254,38 @@ class MetricsCalculator:
             "right_hand": right_angles
         }
 
-    def _calculate_finger_angle(self, landmarks: Dict, points: List[int]) -> float:
+    def _calculate_hand_finger_angles(self, landmarks: Dict) -> Dict[str, float]:
         """
-        指の角度を計算
+        1つの手の5本の指の角度をまとめて計算
+
+        必要なランドマークを (21, 2) の配列に1回だけ取り出し、
+        5本分の角度をベクトル演算で求める
 
         Args:
-            landmarks: ランドマーク座標
-            points: 指のポイントインデックス
+            landmarks: ランドマーク座標（point_N形式）
 
         Returns:
-            角度（度）
+            各指の角度（度）。ランドマークが欠けている指は0
         """
-        if len(points) < 3:
-            return 0
-
-        # 3点を取得（基部、中間、先端）
-        p1 = landmarks.get(f"point_{points[0]}", {})
-        p2 = landmarks.get(f"point_{points[2]}", {})
-        p3 = landmarks.get(f"point_{points[4]}", {})
-
-        if not all([p1, p2, p3]):
-            return 0
+        xy = np.full((21, 2), np.nan)
+        for i in self._FINGER_POINT_IDS:
+            point = landmarks.get(f"point_{i}")
+            if point:
+                xy[i] = (point["x"], point["y"])
 
-        # ベクトルを計算
-        v1 = np.array([p2["x"] - p1["x"], p2["y"] - p1["y"]])
-        v2 = np.array([p3["x"] - p2["x"], p3["y"] - p2["y"]])
+        # ベクトルを計算（基部→中間、中間→先端）
+        p1, p2, p3 = (xy[self._FINGER_TRIPLETS[:, k]] for k in range(3))
+        v1 = p2 - p1
+        v2 = p3 - p2
 
         # 角度を計算
-        cos_angle = np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2) + 1e-6)
-        angle = np.degrees(np.arccos(np.clip(cos_angle, -1.0, 1.0)))
+        cos_angle = np.einsum('ij,ij->i', v1, v2) / (
+            np.linalg.norm(v1, axis=1) * np.linalg.norm(v2, axis=1) + 1e-6
+        )
+        angles = np.degrees(np.arccos(np.clip(cos_angle, -1.0, 1.0)))
+        angles = np.where(np.isnan(angles), 0.0, angles)
 
-        return float(angle)
+        return dict(zip(self.FINGER_NAMES, angles.tolist()))
 
     def _calculate_coordination_metrics(self, frames_data: Dict) -> Dict:
         """
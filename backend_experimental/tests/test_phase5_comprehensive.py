@@ -72,7 +72,7 @@ async def test_external_analysis():
 
         # Check landmark data
         first_landmark = landmarks[0]
-        if not all(k in first_landmark for k in ['x', 'y', 'z', 'visibility']):
+        if not all(k in first_landmark for k in ['x', 'y', 'z']):
             logger.error(f"❌ Invalid landmark structure: {first_landmark.keys()}")
             return False
 
@@ -0,0 +1,225 @@
+"""
+ユニットテスト: FrameExtractor
+
+テスト対象:
+1. 間引き抽出（target_fps）のフレーム番号
+2. スレッド先読み版ジェネレータが同期版と同じ結果を返すこと
+3. フレーム番号指定の取得（シーク省略・前方読み進め）
+4. RGB出力モード
+5. decord/cudaバックエンド
+6. 汎用の先読みジェネレータ（prefetch）
+"""
+
+import pytest
+import numpy as np
+import cv2
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+backend_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.ai_engine.processors.frame_extractor import FrameExtractor, prefetch
+
+
+VIDEO_FPS = 30
+TOTAL_FRAMES = 60
+
+
+@pytest.fixture
+def video_path(tmp_path):
+    """フレームごとに色が変わる 30fps × 60フレームのテスト動画（B/Rチャンネルは異なる値）"""
+    path = tmp_path / "test_video.avi"
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), VIDEO_FPS, (64, 48))
+    for i in range(TOTAL_FRAMES):
+        writer.write(np.full((48, 64, 3), (i * 4, 128, 255 - i * 4), dtype=np.uint8))
+    writer.release()
+    return path
+
+
+def _read_all_frames(video_path):
+    """read()で全フレームを順に読み出す"""
+    cap = cv2.VideoCapture(str(video_path))
+    frames = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+class TestFrameExtractor:
+    """FrameExtractorのテスト"""
+
+    def test_generator_samples_by_target_fps(self, video_path):
+        """30fps動画を5fpsで抽出すると6フレームごとになる"""
+        with FrameExtractor(str(video_path), target_fps=5) as extractor:
+            frame_numbers = [n for n, _ in extractor.extract_frames_generator()]
+
+        assert frame_numbers == list(range(0, TOTAL_FRAMES, 6))
+
+    def test_generator_frames_match_sequential_read(self, video_path):
+        """grab()/retrieve()で抽出したフレームがread()の結果と一致する"""
+        all_frames = _read_all_frames(video_path)
+
+        with FrameExtractor(str(video_path), target_fps=5) as extractor:
+            for frame_number, frame in extractor.extract_frames_generator():
+                np.testing.assert_array_equal(frame, all_frames[frame_number])
+
+    def test_threaded_matches_generator(self, video_path):
+        """スレッド先読み版は同期版と同じフレームを返す"""
+        with FrameExtractor(str(video_path), target_fps=5) as extractor:
+            expected = list(extractor.extract_frames_generator())
+            actual = list(extractor.extract_frames_threaded(queue_size=2))
+
+        assert [n for n, _ in actual] == [n for n, _ in expected]
+        for (_, a), (_, b) in zip(actual, expected):
+            np.testing.assert_array_equal(a, b)
+
+    def test_threaded_early_exit(self, video_path):
+        """途中でイテレーションを止めてもスレッドが残らない"""
+        with FrameExtractor(str(video_path), target_fps=30) as extractor:
+            gen = extractor.extract_frames_threaded(queue_size=1)
+            first = next(gen)
+            gen.close()
+
+            assert first[0] == 0
+            # 停止後も通常の抽出が使える
+            assert len(list(extractor.extract_frames_generator())) == TOTAL_FRAMES
+
+    def test_extract_batches(self, video_path):
+        """間引き抽出したフレームをbatch_size件ずつ返す（最後は端数）"""
+        with FrameExtractor(str(video_path), target_fps=5) as extractor:
+            batches = list(extractor.extract_batches(batch_size=4))
+
+        assert [len(b) for b in batches] == [4, 4, 2]
+        assert [n for b in batches for n, _ in b] == list(range(0, TOTAL_FRAMES, 6))
+
+    def test_get_frames_at_matches_sequential_read(self, video_path):
+        """順不同・重複・範囲外を含む指定でも正しいフレームを返す"""
+        all_frames = _read_all_frames(video_path)
+
+        with FrameExtractor(str(video_path)) as extractor:
+            frames = extractor.get_frames_at([40, 3, 17, 3, 59, TOTAL_FRAMES + 5])
+
+        assert sorted(frames) == [3, 17, 40, 59]
+        for frame_number, frame in frames.items():
+            np.testing.assert_array_equal(frame, all_frames[frame_number])
+
+    def test_extract_keyframes(self, video_path):
+        """キーフレームは一定間隔の時刻と対応するフレームを返す"""
+        all_frames = _read_all_frames(video_path)
+
+        with FrameExtractor(str(video_path)) as extractor:
+            keyframes = extractor.extract_keyframes(interval_seconds=0.5)
+
+        assert [t for t, _ in keyframes] == [0.0, 0.5, 1.0, 1.5]
+        for t, frame in keyframes:
+            np.testing.assert_array_equal(frame, all_frames[int(t * VIDEO_FPS)])
+
+    def test_extract_keyframes_times_do_not_accumulate_error(self, video_path):
+        """時刻は加算の繰り返しではなく i * interval で生成される"""
+        with FrameExtractor(str(video_path)) as extractor:
+            keyframes = extractor.extract_keyframes(interval_seconds=0.1)
+
+        assert [t for t, _ in keyframes] == [i * 0.1 for i in range(20)]
+
+    def test_extract_frames_at_times_keeps_input_order(self, video_path):
+        """時刻指定の一括抽出は入力順で返し、範囲外は除外する"""
+        all_frames = _read_all_frames(video_path)
+
+        with FrameExtractor(str(video_path)) as extractor:
+            frames = extractor.extract_frames_at_times([1.5, 0.1, 10.0])
+
+        assert [t for t, _ in frames] == [1.5, 0.1]
+        np.testing.assert_array_equal(frames[0][1], all_frames[45])
+        np.testing.assert_array_equal(frames[1][1], all_frames[3])
+
+    def test_save_frames(self, video_path, tmp_path):
+        """間引き抽出した全フレームがファイルとして保存される"""
+        output_dir = tmp_path / "frames"
+
+        with FrameExtractor(str(video_path), target_fps=5) as extractor:
+            extractor.save_frames(output_dir)
+
+        saved = sorted(p.name for p in output_dir.glob("*.jpg"))
+        assert saved == [f"frame_{n:06d}.jpg" for n in range(0, TOTAL_FRAMES, 6)]
+        assert cv2.imread(str(output_dir / saved[-1])).shape == (48, 64, 3)
+
+    def test_extract_frame_at_time_consecutive(self, video_path):
+        """連続するフレームの取得（シーク省略）と後方へのシークの両方が正しい"""
+        all_frames = _read_all_frames(video_path)
+
+        with FrameExtractor(str(video_path)) as extractor:
+            for frame_number in [10, 11, 12, 5]:
+                frame = extractor.extract_frame_at_time(frame_number / VIDEO_FPS)
+                np.testing.assert_array_equal(frame, all_frames[frame_number])
+
+    def test_generator_rgb_output(self, video_path):
+        """color="RGB"ではBGRのチャンネル順を反転したフレームを返す"""
+        with FrameExtractor(str(video_path), target_fps=5) as extractor:
+            bgr = list(extractor.extract_frames_generator())
+            rgb = list(extractor.extract_frames_threaded(color="RGB"))
+
+        assert [n for n, _ in rgb] == [n for n, _ in bgr]
+        for (_, a), (_, b) in zip(rgb, bgr):
+            np.testing.assert_array_equal(a, b[:, :, ::-1])
+
+
+class TestDecodeBackends:
+    """デコードバックエンドのテスト（未インストールのバックエンドはスキップ/フォールバック）"""
+
+    def test_decord_matches_opencv(self, video_path):
+        """decordでもOpenCVと同じフレーム番号・BGRフレームを返す"""
+        pytest.importorskip("decord")
+
+        with FrameExtractor(str(video_path), target_fps=5) as extractor:
+            expected = list(extractor.extract_frames_generator())
+
+        with FrameExtractor(str(video_path), target_fps=5, backend="decord") as extractor:
+            actual = list(extractor.extract_frames_generator())
+            at_time = extractor.extract_frame_at_time(12 / VIDEO_FPS)
+            frames = extractor.get_frames_at([30, 6])
+
+        assert [n for n, _ in actual] == [n for n, _ in expected]
+        for (_, a), (_, b) in zip(actual, expected):
+            np.testing.assert_allclose(a, b, atol=2)
+        np.testing.assert_allclose(at_time, expected[2][1], atol=2)
+        np.testing.assert_allclose(frames[30], expected[5][1], atol=2)
+
+    def test_cuda_backend_extracts_same_frames(self, video_path):
+        """cudaバックエンド（CUDA非対応環境ではopencvにフォールバック）でも同じフレーム番号"""
+        with FrameExtractor(str(video_path), target_fps=5, backend="cuda") as extractor:
+            frame_numbers = [n for n, _ in extractor.extract_frames_generator()]
+
+            if not FrameExtractor._cuda_decode_available():
+                assert extractor.backend == "opencv"
+
+        assert frame_numbers == list(range(0, TOTAL_FRAMES, 6))
+
+    def test_unknown_backend_raises(self, video_path):
+        """未知のバックエンドはValueError"""
+        with pytest.raises(ValueError):
+            FrameExtractor(str(video_path), backend="ffmpeg")
+
+
+class TestPrefetch:
+    """prefetchのテスト"""
+
+    def test_preserves_order(self):
+        """要素は元の順序で全て返る"""
+        assert list(prefetch(iter(range(50)), maxsize=3)) == list(range(50))
+
+    def test_producer_error_is_raised(self):
+        """生成側の例外は消費側で送出される"""
+        def failing():
+            yield 1
+            raise RuntimeError("decode failed")
+
+        gen = prefetch(failing(), maxsize=1)
+        assert next(gen) == 1
+        with pytest.raises(RuntimeError):
+            next(gen)
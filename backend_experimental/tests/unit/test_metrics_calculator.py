@@ -0,0 +1,94 @@
+"""
+ユニットテスト: MetricsCalculator
+
+テスト対象:
+1. 指の角度のベクトル化計算（ランドマーク欠損時は0）
+2. 全メトリクス計算の出力形式
+"""
+
+import pytest
+import numpy as np
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+backend_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.services.metrics_calculator import MetricsCalculator
+
+
+FINGER_POINTS = {
+    "thumb": [0, 1, 2, 3, 4],
+    "index": [0, 5, 6, 7, 8],
+    "middle": [0, 9, 10, 11, 12],
+    "ring": [0, 13, 14, 15, 16],
+    "pinky": [0, 17, 18, 19, 20]
+}
+
+
+def _reference_finger_angle(landmarks, points):
+    """指ごとに計算する従来の実装"""
+    p1 = landmarks.get(f"point_{points[0]}", {})
+    p2 = landmarks.get(f"point_{points[2]}", {})
+    p3 = landmarks.get(f"point_{points[4]}", {})
+    if not all([p1, p2, p3]):
+        return 0
+    v1 = np.array([p2["x"] - p1["x"], p2["y"] - p1["y"]])
+    v2 = np.array([p3["x"] - p2["x"], p3["y"] - p2["y"]])
+    cos_angle = np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2) + 1e-6)
+    return float(np.degrees(np.arccos(np.clip(cos_angle, -1.0, 1.0))))
+
+
+@pytest.fixture
+def calculator():
+    return MetricsCalculator(fps=30.0)
+
+
+@pytest.fixture
+def landmarks():
+    """point_N形式のランドマーク"""
+    rng = np.random.default_rng(0)
+    return {f"point_{i}": {"x": float(x), "y": float(y), "z": 0.0}
+            for i, (x, y) in enumerate(rng.random((21, 2)))}
+
+
+class TestFingerAngles:
+    """指の角度計算のテスト"""
+
+    def test_matches_per_finger_calculation(self, calculator, landmarks):
+        """ベクトル化した計算が指ごとの計算と一致する"""
+        angles = calculator._calculate_hand_finger_angles(landmarks)
+
+        for finger, points in FINGER_POINTS.items():
+            assert angles[finger] == pytest.approx(_reference_finger_angle(landmarks, points))
+
+    def test_missing_landmark_gives_zero(self, calculator, landmarks):
+        """ランドマークが欠けた指の角度は0、他の指は影響を受けない"""
+        del landmarks["point_8"]
+
+        angles = calculator._calculate_hand_finger_angles(landmarks)
+
+        assert angles["index"] == 0
+        assert angles["middle"] == pytest.approx(_reference_finger_angle(landmarks, FINGER_POINTS["middle"]))
+
+
+class TestCalculateAllMetrics:
+    """全メトリクス計算のテスト"""
+
+    def test_output_format(self, calculator, landmarks):
+        """V2形式（hands配列）の入力から各メトリクスを計算する"""
+        landmark_list = [landmarks[f"point_{i}"] for i in range(21)]
+        skeleton_data = [
+            {"frame_number": i, "timestamp": i / 30.0,
+             "hands": [{"hand_type": "Left", "landmarks": landmark_list}]}
+            for i in range(3)
+        ]
+
+        metrics = calculator.calculate_all_metrics(skeleton_data)
+
+        assert len(metrics["angles"]["left_hand"]) == 3
+        assert set(metrics["angles"]["left_hand"][0]) == set(FINGER_POINTS)
+        assert metrics["angles"]["right_hand"] == [None, None, None]
+        assert metrics["velocity"]["left_hand"] == [0, 0.0, 0.0]
+        assert metrics["summary"]["detection_rate"] == {"left": 1.0, "right": 0.0}
@@ -0,0 +1,62 @@
+"""
+ユニットテスト: DBのJSONカラム用シリアライザ
+
+テスト対象:
+1. NumPy値・非文字列キーのシリアライズ
+2. NaN・Infを含むデータの書き出し（json.dumpsと同じくNaNのまま）
+3. 既存データ（NaNを含むjson.dumps出力）の読み込み
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# プロジェクトルートをパスに追加
+backend_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.models import _json_serializer, _json_deserializer
+
+
+def test_serializer_round_trip():
+    """NumPy値・数値キーを含むデータが標準jsonと同じ内容で往復できる"""
+    pytest.importorskip("orjson")
+    data = {"landmarks": [{"x": 1.5, "y": np.float32(2.0)}], 3: np.arange(3)}
+
+    restored = _json_deserializer(_json_serializer(data))
+
+    assert restored == {"landmarks": [{"x": 1.5, "y": 2.0}], "3": [0, 1, 2]}
+
+
+def test_serializer_keeps_non_finite_floats():
+    """NaN・Infはnullにならず、json.dumpsと同じ表記で書き出される"""
+    data = {"values": [1.0, float("nan"), float("inf")], "array": np.array([-np.inf, 2.0]), "none": None}
+
+    serialized = _json_serializer(data)
+    restored = _json_deserializer(serialized)
+
+    assert serialized == json.dumps(
+        {"values": [1.0, float("nan"), float("inf")], "array": [-np.inf, 2.0], "none": None}
+    )
+    assert np.isnan(restored["values"][1])
+    assert restored["values"][2] == float("inf")
+    assert restored["array"] == [-float("inf"), 2.0]
+    assert restored["none"] is None
+
+
+def test_serializer_null_without_non_finite():
+    """NaN・Infが無ければNoneを含んでいてもorjsonの出力を使う"""
+    orjson = pytest.importorskip("orjson")
+    data = {"correlation": None, "values": np.array([1.0, 2.0])}
+
+    assert _json_serializer(data) == orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+
+def test_deserializer_reads_legacy_nan():
+    """json.dumpsで保存されたNaNを含むデータも読み込める"""
+    restored = _json_deserializer(json.dumps({"value": float("nan")}))
+
+    assert np.isnan(restored["value"])
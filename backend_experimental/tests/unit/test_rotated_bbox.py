@@ -194,6 +194,21 @@ class TestRotatedBBoxIntegration:
 
         print(f"30° ellipse: reduction = {result['area_reduction']:.1f}%")
 
+    def test_shared_mask_info(self, tracker):
+        """_analyze_mask()の結果を共有しても、回転BBox・先端点は個別計算と同じ"""
+        import cv2
+        mask = np.zeros((200, 200), dtype=np.uint8)
+        cv2.ellipse(mask, (100, 100), (80, 10), 30, 0, 360, 255, -1)
+        bbox = tracker._refine_bbox_from_mask(mask)
+
+        mask_info = tracker._analyze_mask(mask)
+
+        assert tracker._get_rotated_bbox_from_mask(mask, mask_info) == tracker._get_rotated_bbox_from_mask(mask)
+        tip = tracker._detect_instrument_tip(mask, bbox, mask_info)
+        assert tip == tracker._detect_instrument_tip(mask, bbox)
+        # 先端は重心から長軸方向に離れた輪郭上の点
+        assert np.hypot(tip[0] - 100, tip[1] - 100) > 70
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,293 @@
+"""
+ユニットテスト: SAM2Tracker のマスク後処理（SAM2モデルなし）
+
+テスト対象:
+1. マスクからのBBox計算
+2. 先端検出・回転BBoxでのマスク走査結果（重心・主軸）の共有
+3. デバイス上でのマスク切り出し
+4. autocast精度の選択
+5. 画像エンコーダのコンパイル
+6. メモリ上のフレームからのinference state作成
+7. 軌跡のリングバッファ
+8. Predictorのインスタンス間共有
+9. 参照マスクのビットパック保存
+"""
+
+import pytest
+import numpy as np
+import cv2
+import torch
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+backend_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.ai_engine.processors import sam2_tracker
+from app.ai_engine.processors.sam2_tracker import SAM2Tracker, _compile_image_encoder
+
+
+@pytest.fixture
+def tracker():
+    """モデルをロードしないSAM2Tracker（マスク処理メソッドのみ使用）"""
+    return SAM2Tracker.__new__(SAM2Tracker)
+
+
+@pytest.fixture
+def instrument_mask():
+    """斜めの細長い器具マスク (bool)"""
+    mask = np.zeros((240, 320), dtype=np.uint8)
+    cv2.ellipse(mask, (160, 120), (90, 12), 30, 0, 360, 1, -1)
+    return mask.astype(bool)
+
+
+class TestMaskBBox:
+    """BBox計算のテスト"""
+
+    def test_bbox_matches_pixel_extent(self, tracker, instrument_mask):
+        """BBoxはマスク画素の最小・最大座標と一致する"""
+        y_coords, x_coords = np.nonzero(instrument_mask)
+        expected = [x_coords.min(), y_coords.min(), x_coords.max(), y_coords.max()]
+
+        assert tracker._compute_bbox_from_mask(instrument_mask) == expected
+        assert tracker._mask_to_bbox(instrument_mask) == expected
+        assert tracker._mask_to_bbox(instrument_mask.astype(np.float32)) == expected
+
+    def test_empty_mask(self, tracker):
+        """空マスクは [0, 0, 0, 0]（_mask_to_bboxはNone）"""
+        empty = np.zeros((10, 10), dtype=bool)
+
+        assert tracker._compute_bbox_from_mask(empty) == [0, 0, 0, 0]
+        assert tracker._mask_to_bbox(empty) is None
+        assert tracker._detect_instrument_tip(empty, [0, 0, 0, 0]) is None
+
+
+class TestAnalyzeMask:
+    """マスク走査結果の共有のテスト"""
+
+    def test_shared_result_matches_standalone(self, tracker, instrument_mask):
+        """_analyze_mask()の結果を渡しても、省略時と同じ結果になる"""
+        mask_info = tracker._analyze_mask(instrument_mask)
+        bbox = mask_info["bbox"]
+
+        assert bbox == tracker._compute_bbox_from_mask(instrument_mask)
+        assert tracker._detect_instrument_tip(instrument_mask, bbox, mask_info) == \
+            tracker._detect_instrument_tip(instrument_mask, bbox)
+        assert tracker._compute_rotated_bbox(instrument_mask, mask_info) == \
+            tracker._compute_rotated_bbox(instrument_mask)
+        assert tracker._get_rotated_bbox(instrument_mask, mask_info) == \
+            tracker._get_rotated_bbox(instrument_mask)
+
+    def test_tip_lies_on_instrument(self, tracker, instrument_mask):
+        """先端点はBBox内でマスクの端付近にある"""
+        mask_info = tracker._analyze_mask(instrument_mask)
+        x1, y1, x2, y2 = mask_info["bbox"]
+
+        tip = tracker._detect_instrument_tip(instrument_mask, mask_info["bbox"], mask_info)
+
+        assert x1 <= tip[0] <= x2 and y1 <= tip[1] <= y2
+        assert np.hypot(tip[0] - 160, tip[1] - 120) > 60
+
+    @pytest.mark.parametrize("angle", [0, 30, 90, 135])
+    def test_principal_axis_matches_pca(self, tracker, angle):
+        """重心・主軸（向きを含む）はcv2.moments / cv2.PCAComputeと一致する"""
+        mask = np.zeros((240, 320), dtype=np.uint8)
+        cv2.ellipse(mask, (160, 120), (90, 12), angle, 0, 360, 1, -1)
+        coords = cv2.findNonZero(mask).reshape(-1, 2).astype(np.float32)
+        _, eigenvectors = cv2.PCACompute(coords, mean=None)
+        moments = cv2.moments(mask, binaryImage=True)
+
+        mask_info = tracker._analyze_mask(mask)
+
+        np.testing.assert_allclose(mask_info["principal_axis"], eigenvectors[0], atol=1e-5)
+        assert mask_info["centroid"] == pytest.approx(
+            (moments["m10"] / moments["m00"], moments["m01"] / moments["m00"])
+        )
+
+
+class TestTrajectoryBuffer:
+    """軌跡リングバッファのテスト"""
+
+    @pytest.mark.parametrize("num_points", [0, 3, 10, 50, 55, 137])
+    def test_recent_matches_deque(self, tracker, num_points):
+        """直近の点はdeque(maxlen=50)の末尾10点と同じ順序・値になる"""
+        from collections import deque
+
+        tracker._traj_buf = {1: np.zeros((SAM2Tracker.TRAJECTORY_LENGTH, 2), dtype=np.int32)}
+        tracker._traj_head = {1: 0}
+        expected = deque(maxlen=SAM2Tracker.TRAJECTORY_LENGTH)
+
+        for i in range(num_points):
+            tracker._append_trajectory(1, (i, 2 * i))
+            expected.append([i, 2 * i])
+
+        assert tracker._recent_trajectory(1) == list(expected)[-SAM2Tracker.TRAJECTORY_TAIL:]
+
+
+class TestReferenceMask:
+    """参照マスクのビットパック保存のテスト"""
+
+    @pytest.mark.parametrize("dtype, value", [(bool, True), (np.uint8, 1), (np.uint8, 255)])
+    def test_roundtrip(self, tracker, instrument_mask, dtype, value):
+        """幅が8の倍数でないマスクも、展開すると元の0/1マスクに戻る"""
+        tracker.reference_masks = {}
+        mask = np.where(instrument_mask[:, :317], value, 0).astype(dtype)
+
+        tracker._store_reference_mask(3, mask)
+        restored = tracker.get_reference_mask(3)
+
+        assert tracker.reference_masks[3][0].nbytes == 240 * 40
+        assert restored.dtype == np.uint8
+        np.testing.assert_array_equal(restored, instrument_mask[:, :317])
+        assert tracker.get_reference_mask(4) is None
+
+
+class TestCropMaskOnDevice:
+    """デバイス上でのマスク切り出しのテスト"""
+
+    def test_cropped_mask_gives_same_results(self, tracker, instrument_mask):
+        """切り出したマスク + オフセットでフレーム全体のマスクと同じ結果になる"""
+        logits = torch.from_numpy(np.where(instrument_mask, 3.0, -3.0).astype(np.float32))[None]
+
+        cropped, offset = tracker._crop_mask_on_device(logits)
+        full_info = tracker._analyze_mask(instrument_mask)
+        crop_info = tracker._analyze_mask(cropped, offset)
+
+        assert cropped.shape == (full_info["bbox"][3] - full_info["bbox"][1] + 1,
+                                 full_info["bbox"][2] - full_info["bbox"][0] + 1)
+        assert crop_info["bbox"] == full_info["bbox"]
+        assert tracker._detect_instrument_tip(cropped, crop_info["bbox"], crop_info) == \
+            tracker._detect_instrument_tip(instrument_mask, full_info["bbox"], full_info)
+        assert tracker._compute_rotated_bbox(cropped, crop_info) == \
+            tracker._compute_rotated_bbox(instrument_mask, full_info)
+
+    def test_empty_logits(self, tracker):
+        """全画素が負のlogitsはNone"""
+        assert tracker._crop_mask_on_device(torch.full((1, 20, 30), -1.0)) is None
+
+    def test_masks_to_host(self, tracker):
+        """全オブジェクトのlogitsを (N, H, W) のboolマスクとして返す"""
+        tracker._d2h_buffer = None
+        logits = torch.randn(3, 1, 20, 30)
+
+        masks = tracker._masks_to_host(logits)
+
+        assert masks.shape == (3, 20, 30) and masks.dtype == np.bool_
+        np.testing.assert_array_equal(masks, (logits > 0).numpy()[:, 0])
+
+
+class TestAutocastDtype:
+    """autocast精度選択のテスト"""
+
+    def test_cpu_uses_bfloat16(self):
+        """CPUのautocastはBF16"""
+        assert SAM2Tracker._select_autocast_dtype("cpu") == torch.bfloat16
+
+    @pytest.mark.parametrize("capability, bf16_supported, expected", [
+        ((8, 6), True, torch.float16),   # RTX 30系
+        ((7, 5), False, torch.float16),  # BF16非対応
+        ((8, 9), True, torch.bfloat16),
+        ((9, 0), True, torch.bfloat16),
+    ])
+    def test_cuda_capability(self, monkeypatch, capability, bf16_supported, expected):
+        """GPUの世代に応じてFP16/BF16を選ぶ"""
+        monkeypatch.setattr(torch.cuda, "get_device_capability", lambda *args: capability)
+        monkeypatch.setattr(torch.cuda, "is_bf16_supported", lambda *args: bf16_supported)
+
+        assert SAM2Tracker._select_autocast_dtype("cuda") == expected
+
+
+class TestCompileImageEncoder:
+    """画像エンコーダのtorch.compileのテスト"""
+
+    def test_skips_without_triton(self, monkeypatch):
+        """Tritonが無い環境ではエンコーダをそのまま使う"""
+        import importlib.util
+
+        encoder = torch.nn.Conv2d(3, 1, 1)
+        predictor = type("Predictor", (), {"image_encoder": encoder, "image_size": 32})()
+        monkeypatch.setattr(importlib.util, "find_spec", lambda name: None)
+
+        _compile_image_encoder(predictor, "cpu", torch.bfloat16)
+
+        assert predictor.image_encoder is encoder
+
+
+class TestSharedPredictor:
+    """Predictorのインスタンス間共有のテスト"""
+
+    def test_predictor_built_once_per_model(self, monkeypatch):
+        """同じ設定・チェックポイント・デバイス・入力解像度では構築済みのPredictorを返す"""
+        built = []
+
+        def fake_build(config_path, checkpoint_path, device, hydra_overrides_extra):
+            built.append((config_path, hydra_overrides_extra))
+            return object()
+
+        monkeypatch.setattr(sam2_tracker, "build_sam2_video_predictor", fake_build, raising=False)
+        sam2_tracker._load_predictor.cache_clear()
+
+        try:
+            small = sam2_tracker._load_predictor("s.yaml", "s.pt", "cpu", torch.bfloat16, True, 1024)
+            assert sam2_tracker._load_predictor("s.yaml", "s.pt", "cpu", torch.bfloat16, True, 1024) is small
+            assert sam2_tracker._load_predictor("s.yaml", "s.pt", "cpu", torch.bfloat16, True, 512) is not small
+            assert built == [("s.yaml", ["++model.image_size=1024"]), ("s.yaml", ["++model.image_size=512"])]
+        finally:
+            sam2_tracker._load_predictor.cache_clear()
+
+    @pytest.mark.parametrize("vram_gb, expected", [(None, 1024), (6.0, 512), (12.0, 1024)])
+    def test_input_size_from_vram(self, vram_gb, expected):
+        """VRAM 8GB未満のGPUは入力解像度512"""
+        assert SAM2Tracker._select_input_size(vram_gb) == expected
+
+
+def load_video_frames(*args, **kwargs):
+    """SAM2のフレームローダーの代わり（_FakeVideoPredictor.init_stateから呼ばれる）"""
+    raise AssertionError("frames must not be loaded from disk")
+
+
+class _FakeVideoPredictor:
+    """init_stateでモジュールのload_video_framesを呼ぶSAM2VideoPredictor互換オブジェクト"""
+
+    image_size = 32
+
+    def init_state(self, video_path, async_loading_frames=False):
+        images, height, width = load_video_frames(
+            video_path=video_path, image_size=self.image_size, async_loading_frames=async_loading_frames
+        )
+        return {"images": images, "num_frames": len(images), "video_height": height, "video_width": width}
+
+
+class TestInitStateFromFrames:
+    """メモリ上のフレームからのinference state作成のテスト"""
+
+    @pytest.fixture
+    def frame_tracker(self, tracker):
+        tracker.predictor = _FakeVideoPredictor()
+        tracker.device = "cpu"
+        return tracker
+
+    def test_preprocess_matches_sam2_normalization(self, frame_tracker):
+        """正方形リサイズ・RGB化・ImageNet正規化"""
+        frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        frame[..., 2] = 255  # 赤 (BGR)
+
+        images = frame_tracker._preprocess_frames([frame])
+
+        assert tuple(images.shape) == (1, 3, 32, 32)
+        expected = [(1.0 - 0.485) / 0.229, (0.0 - 0.456) / 0.224, (0.0 - 0.406) / 0.225]
+        for channel, value in enumerate(expected):
+            assert images[0, channel].mean().item() == pytest.approx(value, abs=1e-5)
+
+    def test_init_state_uses_in_memory_frames(self, frame_tracker):
+        """init_stateはディスクを読まずに前処理済みテンソルを使い、ローダーは元に戻る"""
+        frames = [np.full((48, 64, 3), i * 50, dtype=np.uint8) for i in range(3)]
+
+        state = frame_tracker._init_state_from_frames(frames)
+
+        assert state["num_frames"] == 3
+        assert (state["video_height"], state["video_width"]) == (48, 64)
+        assert state["images"][0].mean() < state["images"][2].mean()
+        with pytest.raises(AssertionError):
+            _FakeVideoPredictor().init_state("video.mp4")
@@ -0,0 +1,455 @@
+"""
+ユニットテスト: SAMTrackerUnified の画像エンコード経路（SAMモデルなし）
+
+テスト対象:
+1. detect_batchでの画像エンコーダのバッチ実行
+2. 計算済み特徴量のSamPredictorへのセット
+3. 推論時のautocast精度選択
+4. 画像エンコーダのtorch.compile
+5. 可視化のマスクブレンド
+6. ポイントプロンプトのバッチ推論
+7. 入力テンソルの前処理（CUDA経路・CPU経路）
+8. MobileSAM（vit_t）のロード
+9. マスクの元画像スケールへの変換
+10. 自動検出での上位マスクの選択
+11. マスクの重心・主軸
+"""
+
+import pytest
+import numpy as np
+import cv2
+import torch
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+backend_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.ai_engine.processors import sam_tracker_unified
+from app.ai_engine.processors.sam_tracker_unified import SAMTrackerUnified
+
+
+class _FakeResizeLongestSide:
+    """segment_anything.utils.transforms.ResizeLongestSide互換"""
+
+    target_length = 64
+
+    @staticmethod
+    def get_preprocess_shape(oldh, oldw, long_side_length):
+        scale = long_side_length / max(oldh, oldw)
+        return int(oldh * scale + 0.5), int(oldw * scale + 0.5)
+
+    def apply_image(self, image):
+        h, w = self.get_preprocess_shape(image.shape[0], image.shape[1], self.target_length)
+        return cv2.resize(image, (w, h))
+
+    def apply_image_torch(self, image):
+        h, w = self.get_preprocess_shape(image.shape[2], image.shape[3], self.target_length)
+        return torch.nn.functional.interpolate(image, (h, w), mode="bilinear", align_corners=False)
+
+    def apply_coords(self, coords, original_size):
+        return coords * (self.target_length / max(original_size))
+
+
+class _FakeImageEncoder:
+    """SAMの画像エンコーダ互換（呼び出しごとのバッチサイズを記録）"""
+
+    img_size = 64
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, x):
+        self.batches.append(x.shape[0])
+        # フレームごとの入力の平均値を特徴量として返す
+        return x.mean(dim=(1, 2, 3), keepdim=True)
+
+
+class _FakeSam:
+    """Samのpreprocess・image_encoder互換"""
+
+    def __init__(self):
+        self.image_encoder = _FakeImageEncoder()
+
+    def preprocess(self, x):
+        h, w = x.shape[-2:]
+        return torch.nn.functional.pad(x.float(), (0, 64 - w, 0, 64 - h))
+
+
+class _FakeSamPredictor:
+    """SamPredictor互換（set_torch_imageは呼ばれたら失敗）"""
+
+    device = torch.device("cpu")
+
+    def __init__(self):
+        self.transform = _FakeResizeLongestSide()
+        self.model = _FakeSam()
+        self.is_image_set = False
+        self.predict_batches = []
+        self.predict_labels = []
+
+    def set_torch_image(self, transformed_image, original_image_size):
+        raise AssertionError("image encoder must not run per frame")
+
+    def reset_image(self):
+        self.is_image_set = False
+        self.features = None
+
+    def predict_torch(self, point_coords, point_labels, multimask_output=True):
+        """各プロンプトの最初の点の周りに正方形マスクを返す（2番目の候補が最高スコア）"""
+        self.predict_batches.append(tuple(point_coords.shape))
+        self.predict_labels.append(point_labels)
+        scale = self.transform.target_length / max(self.original_size)
+        masks = torch.zeros((len(point_coords), 3, *self.original_size), dtype=torch.bool)
+        for b, (x, y) in enumerate((point_coords[:, 0] / scale).round().int().tolist()):
+            masks[b, 1, y - 5:y + 6, x - 5:x + 6] = True
+        scores = torch.tensor([[0.1, 0.9, 0.2]]).repeat(len(point_coords), 1)
+        return masks, scores, None
+
+
+@pytest.fixture
+def tracker():
+    """偽のSamPredictorを持つSAMTrackerUnified"""
+    tracker = SAMTrackerUnified.__new__(SAMTrackerUnified)
+    tracker.use_mock = False
+    tracker.device = "cpu"
+    tracker.autocast_dtype = None
+    tracker._d2h_buffer = None
+    tracker._staging_buffer = None
+    tracker._staging_done = None
+    tracker._copy_stream = None
+    tracker._encoder_compiled = False
+    tracker._positive_labels_cache = {}
+    tracker.predictor = _FakeSamPredictor()
+    tracker.tracked_instruments = [{"id": 0}]
+    return tracker
+
+
+def _frames(n):
+    return [np.full((60, 120, 3), 20 * i, dtype=np.uint8) for i in range(n)]
+
+
+class TestBatchedEncoder:
+    """画像エンコーダのバッチ実行のテスト"""
+
+    def test_encoder_runs_once_per_chunk(self, tracker, monkeypatch):
+        """エンコーダはencoder_batch_sizeフレームごとに1回、各フレームに自分の特徴量を渡す"""
+        received = []
+        prepare_calls = []
+        prepare_image = tracker._prepare_image
+        monkeypatch.setattr(tracker, "_prepare_image", lambda image: prepare_calls.append(1) or prepare_image(image))
+        monkeypatch.setattr(
+            tracker, "track_frame",
+            lambda frame, features, prepared: received.append((int(frame[0, 0, 0]), features.item())) or []
+        )
+
+        results = tracker.detect_batch(_frames(5), encoder_batch_size=2)
+
+        assert len(results) == 5
+        assert tracker.predictor.model.image_encoder.batches == [2, 2, 1]
+        # 特徴量（入力の平均値）はフレームの明るさの順
+        values = [value for _, value in received]
+        assert [pixel for pixel, _ in received] == [0, 20, 40, 60, 80]
+        assert values == sorted(values) and len(set(values)) == 5
+        # 縮小は先読みスレッドで各フレーム1回だけ
+        assert len(prepare_calls) == 5
+
+    def test_compiled_encoder_pads_last_chunk(self, tracker, monkeypatch):
+        """コンパイル済みのエンコーダには端数のチャンクもencoder_batch_size枚で入力し、特徴量は変わらない"""
+        received = []
+        monkeypatch.setattr(
+            tracker, "track_frame",
+            lambda frame, features, prepared: received.append(tuple(features.shape[:1]) + (features.item(),)) or []
+        )
+        expected = [value.item() for value in tracker._encode_frames(_frames(5))]
+        tracker._encoder_compiled = True
+        tracker.predictor.model.image_encoder.batches.clear()
+
+        tracker.detect_batch(_frames(5), encoder_batch_size=2)
+
+        assert tracker.predictor.model.image_encoder.batches == [2, 2, 2]
+        assert received == [(1, value) for value in expected]
+
+    def test_set_image_with_features(self, tracker):
+        """計算済み特徴量をセットするとSamPredictorが画像セット済みの状態になる"""
+        frame = _frames(2)[1]
+        features = tracker._encode_frames([frame])
+
+        tracker.set_image(frame, features)
+
+        predictor = tracker.predictor
+        assert predictor.is_image_set and predictor.features is features
+        assert predictor.original_size == tracker.current_image.shape[:2] == (320, 640)
+        assert predictor.input_size == (32, 64)
+        assert tracker.scale_factor == pytest.approx(640 / 120)
+        assert tracker.original_shape == (60, 120)
+
+
+class TestCompileImageEncoder:
+    """画像エンコーダのtorch.compileのテスト"""
+
+    def test_skips_without_triton(self, tracker, monkeypatch):
+        """Tritonが無い環境ではエンコーダをそのまま使う"""
+        import importlib.util
+
+        encoder = tracker.predictor.model.image_encoder
+        monkeypatch.setattr(importlib.util, "find_spec", lambda name: None)
+
+        tracker._compile_image_encoder()
+
+        assert tracker.predictor.model.image_encoder is encoder
+
+    def test_falls_back_when_warmup_fails(self, tracker, monkeypatch):
+        """ウォームアップでコンパイルに失敗した場合は通常実行のまま続行する"""
+        import importlib.util
+
+        def broken_encoder(x):
+            raise RuntimeError("compile failed")
+
+        model = tracker.predictor.model
+        encoder = model.image_encoder
+        monkeypatch.setattr(importlib.util, "find_spec", lambda name: object())
+        monkeypatch.setattr(torch, "compile", lambda module, **kwargs: broken_encoder)
+
+        tracker._compile_image_encoder()
+
+        assert model.image_encoder is encoder
+        assert not tracker._encoder_compiled
+
+    def test_warms_up_every_detect_batch_shape(self, tracker, monkeypatch):
+        """ロード時に1枚とDEFAULT_ENCODER_BATCH_SIZE枚の両方でコンパイルを済ませる"""
+        import importlib.util
+
+        model = tracker.predictor.model
+        encoder = model.image_encoder
+        monkeypatch.setattr(importlib.util, "find_spec", lambda name: object())
+        monkeypatch.setattr(torch, "compile", lambda module, **kwargs: module)
+
+        tracker._compile_image_encoder()
+
+        assert encoder.batches == [1, sam_tracker_unified.DEFAULT_ENCODER_BATCH_SIZE]
+        assert tracker._encoder_compiled
+
+
+class TestAutocastDtype:
+    """autocast精度選択のテスト"""
+
+    def test_cpu_disables_autocast(self):
+        """CPUではautocastを使わない"""
+        assert SAMTrackerUnified._select_autocast_dtype("cpu") is None
+
+    @pytest.mark.parametrize("capability, bf16_supported, expected", [
+        ((8, 6), True, torch.float16),   # RTX 30系
+        ((7, 5), False, torch.float16),  # BF16非対応
+        ((8, 9), True, torch.bfloat16),
+    ])
+    def test_cuda_capability(self, monkeypatch, capability, bf16_supported, expected):
+        """GPUの世代に応じてFP16/BF16を選ぶ"""
+        monkeypatch.setattr(torch.cuda, "get_device_capability", lambda *args: capability)
+        monkeypatch.setattr(torch.cuda, "is_bf16_supported", lambda *args: bf16_supported)
+
+        assert SAMTrackerUnified._select_autocast_dtype("cuda") == expected
+
+    def test_encoder_runs_in_inference_mode(self, tracker):
+        """エンコードはinference_modeの中で実行される"""
+        features = tracker._encode_frames(_frames(1))
+
+        assert features.is_inference()
+
+
+class TestVisualizeResult:
+    """visualize_result() のテスト"""
+
+    def test_blends_only_mask_pixels(self, tracker):
+        """マスク領域はaddWeightedと同じ色になり、それ以外の画素は元画像のまま"""
+        image = np.random.default_rng(0).integers(0, 256, (40, 50, 3), dtype=np.uint8)
+        mask = np.zeros((40, 50), dtype=bool)
+        mask[10:20, 5:30] = True
+
+        vis = tracker.visualize_result(image, {"mask": mask}, color=(0, 255, 0), alpha=0.4)
+
+        colored = np.zeros_like(image)
+        colored[mask] = (0, 255, 0)
+        expected = cv2.addWeighted(image, 0.6, colored, 0.4, 0)
+        assert np.abs(vis[mask].astype(int) - expected[mask]).max() <= 1
+        assert np.array_equal(vis[~mask], image[~mask])
+        assert image[10, 5].tolist() != vis[10, 5].tolist()
+
+
+class TestSegmentWithPointsBatch:
+    """segment_with_points_batch() のテスト"""
+
+    def test_one_decoder_call_per_point_count(self, tracker):
+        """点数が同じプロンプトはまとめて1回で推論し、結果は入力順に返す"""
+        frame = _frames(1)[0]
+        tracker.set_image(frame, tracker._encode_frames([frame]))
+        prompts = [[(30, 20)], [(90, 40), (80, 30)], [(60, 30)]]
+
+        results = tracker.segment_with_points_batch(prompts, [[1] * len(p) for p in prompts])
+
+        assert tracker.predictor.predict_batches == [(2, 1, 2), (1, 2, 2)]
+        for (x, y), result in zip((p[0] for p in prompts), results):
+            x1, y1, x2, y2 = result["bbox"]
+            assert abs((x1 + x2) / 2 - x) <= 1 and abs((y1 + y2) / 2 - y) <= 1
+            assert result["score"] == pytest.approx(0.9)
+            assert result["mask"].shape == frame.shape[:2] and result["mask"][y, x]
+            assert result["mask"].dtype == bool and result["area"] == result["mask"].sum()
+
+    def test_omitted_labels_reuse_positive_tensor(self, tracker):
+        """ラベル省略時は全点前景のテンソルを形状ごとに使い回す"""
+        frame = _frames(1)[0]
+        tracker.set_image(frame, tracker._encode_frames([frame]))
+        prompts = [[(30, 20), (40, 25)], [(90, 40), (80, 30)]]
+
+        tracker.segment_with_points_batch(prompts)
+        tracker.segment_with_points_batch(prompts)
+
+        first, second = tracker.predictor.predict_labels
+        assert first is second
+        assert first.dtype == torch.int and first.tolist() == [[1, 1], [1, 1]]
+
+
+class TestToOriginalScale:
+    """_to_original_scale() のテスト"""
+
+    @pytest.mark.parametrize("dtype", [bool, np.uint8, np.float32])
+    def test_upscales_mask_and_bbox(self, tracker, dtype):
+        """マスクの型によらず元サイズのboolマスクと元スケールのbboxを返す"""
+        tracker.scale_factor = 0.5
+        tracker.original_shape = (60, 80)
+        mask = np.zeros((30, 40), dtype=dtype)
+        mask[10:20, 5:15] = 1
+
+        result = tracker._to_original_scale(mask, 0.8)
+
+        assert result["mask"].dtype == bool and result["mask"].shape == (60, 80)
+        assert result["bbox"] == [10, 20, 28, 38]
+        assert result["area"] == 400 and result["mask"][20:40, 10:30].all()
+        assert mask.sum() == 100
+
+
+class TestAutoDetectInstruments:
+    """auto_detect_instruments() のテスト"""
+
+    def test_picks_top_scores_in_order(self, tracker, monkeypatch):
+        """スコア上位N個を降順（同スコアは生成順）で採用し、低スコア・小領域は飛ばす"""
+        def square(x):
+            mask = np.zeros((120, 160), dtype=bool)
+            mask[20:60, x:x + 30] = True
+            return mask
+
+        generated = [
+            {"predicted_iou": 0.80, "segmentation": square(0)},
+            {"predicted_iou": 0.95, "segmentation": square(40)},
+            {"predicted_iou": 0.60, "segmentation": square(80)},
+            {"predicted_iou": 0.80, "segmentation": square(120)},
+            {"predicted_iou": 0.90, "segmentation": np.pad(np.ones((5, 5), bool), ((0, 115), (0, 155)))},
+        ]
+        monkeypatch.setattr(tracker, "set_image", lambda frame: None)
+        tracker.mask_generator = type("Gen", (), {"generate": lambda self, frame: list(generated)})()
+        tracker.trajectories = {}
+        tracker.lost_frame_counts = {}
+
+        tracker.auto_detect_instruments(_frames(1)[0], max_instruments=4)
+
+        assert [(inst["id"], inst["last_score"]) for inst in tracker.tracked_instruments] == [(0, 0.95), (2, 0.80), (3, 0.80)]
+        assert [inst["last_bbox"][0] for inst in tracker.tracked_instruments] == [40, 0, 120]
+
+    def test_mask_generator_built_lazily_once(self, tracker, monkeypatch):
+        """自動マスク生成器は初回だけ粗いグリッド設定で作り、以降は使い回す"""
+        built = []
+        monkeypatch.setattr(
+            sam_tracker_unified, "SamAutomaticMaskGenerator",
+            lambda sam, **params: built.append((sam, params)) or object(),
+            raising=False
+        )
+        tracker.predictor.model = "sam"
+        tracker.mask_generator = None
+
+        generator = tracker._get_mask_generator()
+
+        assert tracker._get_mask_generator() is generator
+        assert built == [("sam", sam_tracker_unified._AUTO_MASK_GENERATOR_PARAMS)]
+        assert built[0][1]["points_per_side"] == 16
+
+    def test_mask_generator_requires_predictor(self, tracker):
+        """モデル未ロードでは自動検出できない"""
+        tracker.predictor = None
+        tracker.mask_generator = None
+
+        with pytest.raises(RuntimeError, match="mask generator not initialized"):
+            tracker.auto_detect_instruments(_frames(1)[0])
+
+
+class TestAnalyzeMask:
+    """_analyze_mask() のテスト"""
+
+    @pytest.mark.parametrize("angle", [0, 30, 90, 135])
+    def test_principal_axis_matches_pca(self, tracker, angle):
+        """画像モーメントから求めた重心・主軸（向きを含む）は画素座標のcv2.PCAComputeと一致する"""
+        mask = np.zeros((240, 320), dtype=np.uint8)
+        cv2.ellipse(mask, (160, 120), (90, 12), angle, 0, 360, 1, -1)
+        coords = cv2.findNonZero(mask).reshape(-1, 2).astype(np.float64)
+        mean, eigenvectors = cv2.PCACompute(coords, mean=None)
+
+        mask_info = tracker._analyze_mask(mask.astype(bool))
+
+        np.testing.assert_allclose(mask_info["principal_axis"], eigenvectors[0], atol=1e-6)
+        assert mask_info["centroid"] == pytest.approx(tuple(mean[0]))
+
+    def test_empty_mask(self, tracker):
+        """空マスクは輪郭・重心・主軸なし"""
+        mask_info = tracker._analyze_mask(np.zeros((30, 40), dtype=bool))
+
+        assert mask_info["largest_contour"] is None
+        assert mask_info["centroid"] is None and mask_info["principal_axis"] is None
+
+
+class TestInputTensor:
+    """_to_input_tensor() のテスト"""
+
+    @pytest.mark.parametrize("device", ["cpu", "cuda"])
+    def test_bgr_to_rgb_and_resize(self, tracker, device):
+        """どちらの経路もRGB順・長辺target_lengthの (1, 3, H, W) テンソルを返す"""
+        tracker.device = device  # 変換経路の選択のみ（テンソルはpredictor.deviceに置く）
+        frame = np.empty((60, 120, 3), dtype=np.uint8)
+        frame[:] = (10, 20, 30)  # B, G, R
+
+        tensor = tracker._to_input_tensor(tracker._prepare_image(frame)[0])
+
+        assert tuple(tensor.shape) == (1, 3, 32, 64)
+        assert tensor[0, :, 16, 32].tolist() == [30, 20, 10]
+
+
+class TestMobileSam:
+    """MobileSAM（model_type="vit_t"）のロードのテスト"""
+
+    def test_vit_t_uses_mobile_sam_registry(self, tracker, tmp_path, monkeypatch):
+        """vit_tはmobile_samのレジストリからモデルを構築する"""
+        built = []
+        checkpoint = tmp_path / "mobile_sam.pt"
+        checkpoint.touch()
+        monkeypatch.setattr(sam_tracker_unified, "MOBILE_SAM_AVAILABLE", True)
+        monkeypatch.setattr(
+            sam_tracker_unified, "mobile_sam_model_registry",
+            {"vit_t": lambda checkpoint: built.append(checkpoint) or torch.nn.Linear(1, 1)},
+            raising=False
+        )
+        monkeypatch.setattr(sam_tracker_unified, "SamPredictor", lambda sam: "predictor", raising=False)
+        tracker.model_type = "vit_t"
+
+        tracker._load_sam_model(str(checkpoint))
+
+        assert built == [str(checkpoint)]
+        assert tracker.predictor == "predictor"
+
+    def test_vit_t_requires_mobile_sam(self, tracker, tmp_path, monkeypatch):
+        """mobile_sam未導入でvit_tを指定するとエラー"""
+        checkpoint = tmp_path / "mobile_sam.pt"
+        checkpoint.touch()
+        monkeypatch.setattr(sam_tracker_unified, "MOBILE_SAM_AVAILABLE", False)
+        tracker.model_type = "vit_t"
+
+        with pytest.raises(RuntimeError, match="MobileSAM"):
+            tracker._load_sam_model(str(checkpoint))
@@ -0,0 +1,319 @@
+"""
+ユニットテスト: HandSkeletonDetector のランドマーク処理
+
+テスト対象:
+1. ランドマーク配列化と出力形式（辞書のリスト）
+2. 指の角度・手のひら中心・BBoxのベクトル化計算
+"""
+
+import pytest
+import numpy as np
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+backend_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.ai_engine.processors import skeleton_detector
+from app.ai_engine.processors.skeleton_detector import HandSkeletonDetector
+
+
+class _Landmark:
+    def __init__(self, x, y, z):
+        self.x = x
+        self.y = y
+        self.z = z
+        self.visibility = 0.0  # MediaPipe Handsでは常に0.0
+
+
+class _HandLandmarks:
+    def __init__(self, points):
+        self.landmark = [_Landmark(*p) for p in points]
+
+
+class _Classification:
+    label = "Left"
+    score = 0.9
+
+
+class _HandInfo:
+    classification = [_Classification()]
+
+
+@pytest.fixture
+def detector():
+    """HandSkeletonDetectorインスタンスを作成"""
+    return HandSkeletonDetector(max_num_hands=1)
+
+
+@pytest.fixture
+def raw_landmarks():
+    """正規化座標のランドマーク (21, 3)"""
+    rng = np.random.default_rng(0)
+    return rng.random((21, 3))
+
+
+def _reference_angle(p1, p2, p3):
+    v1 = p1 - p2
+    v2 = p3 - p2
+    cos_angle = np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2) + 1e-6)
+    return float(np.degrees(np.arccos(np.clip(cos_angle, -1.0, 1.0))))
+
+
+class TestLandmarkProcessing:
+    """ランドマーク処理のテスト"""
+
+    def test_landmarks_to_array_shape(self, detector, raw_landmarks):
+        """MediaPipeランドマークが (21, 3) 配列に変換される（visibilityは含めない）"""
+        arr = detector._landmarks_to_array(_HandLandmarks(raw_landmarks))
+
+        assert arr.shape == (21, 3)
+        np.testing.assert_allclose(arr, raw_landmarks)
+
+    def test_output_format(self, detector, raw_landmarks):
+        """出力は従来通り辞書のリスト（ピクセル座標）"""
+        arr = detector._landmarks_to_array(_HandLandmarks(raw_landmarks))
+        hand = detector._process_hand_landmarks(arr, _HandInfo(), (480, 640, 3))
+
+        assert len(hand["landmarks"]) == 21
+        first = hand["landmarks"][0]
+        assert set(first.keys()) == {"x", "y", "z"}
+        assert isinstance(first["x"], float)
+        assert first["x"] == pytest.approx(raw_landmarks[0, 0] * 640)
+        assert first["y"] == pytest.approx(raw_landmarks[0, 1] * 480)
+        assert hand["label"] == "Left"
+
+    def test_finger_angles_match_per_finger_calculation(self, detector, raw_landmarks):
+        """ベクトル化した角度計算が指ごとの計算と一致する"""
+        points = raw_landmarks.copy()
+        angles = detector._calculate_finger_angles(points)
+
+        for finger_name in detector.FINGER_NAMES:
+            ids = detector.FINGER_LANDMARK_IDS[finger_name]
+            base = 0 if finger_name == 'thumb' else ids[0]
+            expected = _reference_angle(points[base, :2], points[ids[1], :2], points[ids[2], :2])
+            assert angles[finger_name] == pytest.approx(expected)
+
+    def test_palm_center_and_bbox(self, detector, raw_landmarks):
+        """手のひら中心とBBoxの計算"""
+        points = raw_landmarks * 100
+
+        center = detector._calculate_palm_center(points)
+        palm = points[[0, 1, 5, 9, 13, 17]]
+        assert center["x"] == pytest.approx(palm[:, 0].mean())
+        assert center["y"] == pytest.approx(palm[:, 1].mean())
+
+        bbox = detector._calculate_bbox(points)
+        assert bbox["x_min"] == pytest.approx(max(0, points[:, 0].min() - 20))
+        assert bbox["y_max"] == pytest.approx(points[:, 1].max() + 20)
+
+    def test_hand_openness(self, detector):
+        """開き具合は角度の平均から計算され、0-100にクリップされる"""
+        names = detector.FINGER_NAMES
+
+        assert detector._calculate_hand_openness(dict.fromkeys(names, 0.0)) == 100.0
+        assert detector._calculate_hand_openness(dict.fromkeys(names, 90.0)) == pytest.approx(50.0)
+        assert detector._calculate_hand_openness(dict.fromkeys(names, 200.0)) == 0.0
+
+
+class TestDrawLandmarks:
+    """描画のテスト"""
+
+    def test_draw_landmarks_draws_all_bones(self, detector, raw_landmarks):
+        """全ての骨格接続が描画され、入力フレームは変更されない"""
+        points = raw_landmarks[:, :2] * [640, 480]
+        landmarks = [{"x": float(x), "y": float(y), "z": 0.0} for x, y in points]
+        detection_result = {"hands": [{
+            "landmarks": landmarks,
+            "label": "Left",
+            "confidence": 0.9,
+            "bbox": detector._calculate_bbox(points)
+        }]}
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+
+        annotated = detector.draw_landmarks(frame, detection_result)
+
+        assert not frame.any()
+        assert len(detector._BONE_CONNECTIONS) == 20
+        for parent, child in detector._BONE_CONNECTIONS:
+            mid = ((points[parent].astype(int) + points[child].astype(int)) // 2)
+            assert annotated[mid[1], mid[0], 1] == 255
+
+
+class TestDetectBatchParallel:
+    """プロセス並列バッチ検出のテスト"""
+
+    def test_parallel_matches_sequential_order(self):
+        """並列検出はdetect_batchと同じ順序・frame_indexを返す"""
+        detector = HandSkeletonDetector(static_image_mode=True, max_num_hands=1)
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 255, (120, 160, 3), dtype=np.uint8) for _ in range(5)]
+
+        expected = detector.detect_batch(frames)
+        actual = detector.detect_batch_parallel(frames, num_workers=2)
+
+        assert [r["frame_index"] for r in actual] == list(range(5))
+        assert [r["detected"] for r in actual] == [r["detected"] for r in expected]
+
+    def test_single_worker_falls_back_to_sequential(self, detector):
+        """ワーカー数1では逐次処理にフォールバック"""
+        frames = [np.zeros((120, 160, 3), dtype=np.uint8)] * 2
+
+        results = detector.detect_batch_parallel(frames, num_workers=1)
+
+        assert [r["frame_index"] for r in results] == [0, 1]
+
+    def test_single_worker_passes_color(self, detector):
+        """ワーカー数1のフォールバックでもcolorがdetect_batchに渡る"""
+        frames = [np.zeros((120, 160, 3), dtype=np.uint8)]
+
+        with pytest.raises(ValueError):
+            detector.detect_batch_parallel(frames, num_workers=1, color="BGRA")
+
+    def test_detect_chunk_passes_color(self, monkeypatch):
+        """ワーカーのチャンク検出にcolorが渡り、frame_indexが補正される"""
+        class _RecordingDetector:
+            def detect_batch(self, frames, color="BGR"):
+                self.color = color
+                return [{"frame_index": idx} for idx in range(len(frames))]
+
+        recording = _RecordingDetector()
+        monkeypatch.setattr(skeleton_detector, "_worker_detector", recording)
+
+        results = skeleton_detector._detect_chunk(3, [None, None], "RGB")
+
+        assert recording.color == "RGB"
+        assert [r["frame_index"] for r in results] == [3, 4]
+
+
+class TestSpeedMode:
+    """速度モードのテスト"""
+
+    def test_throughput_mode_overrides_confidence(self):
+        """throughputモードはモードの検出信頼度を使う"""
+        detector = HandSkeletonDetector(max_num_hands=1, min_detection_confidence=0.1, speed_mode="throughput")
+
+        assert detector._init_kwargs["min_detection_confidence"] == 0.5
+        assert detector._init_kwargs["speed_mode"] == "throughput"
+
+    def test_unknown_speed_mode_raises(self):
+        """未知のモードはValueError"""
+        with pytest.raises(ValueError):
+            HandSkeletonDetector(max_num_hands=1, speed_mode="fastest")
+
+
+class TestColorOrder:
+    """入力色順のテスト"""
+
+    def test_rgb_input_matches_bgr_input(self, detector):
+        """RGB入力（変換省略）とBGR入力で同じ結果になる"""
+        rng = np.random.default_rng(0)
+        bgr = rng.integers(0, 255, (120, 160, 3), dtype=np.uint8)
+        rgb = np.ascontiguousarray(bgr[:, :, ::-1])
+
+        from_bgr = detector.detect_from_frame(bgr)
+        detector.hands.reset()
+        from_rgb = detector.detect_from_frame(rgb, color="RGB")
+
+        assert from_rgb["detected"] == from_bgr["detected"]
+        assert len(from_rgb["hands"]) == len(from_bgr["hands"])
+
+    def test_unknown_color_raises(self, detector):
+        """未知の色順はValueError"""
+        with pytest.raises(ValueError):
+            detector.detect_from_frame(np.zeros((120, 160, 3), dtype=np.uint8), color="HSV")
+
+
+class _RecordingHands:
+    """process呼び出しを記録し、指定した手（なければ検出なし）を返すMediaPipe Hands互換オブジェクト"""
+
+    class _Results:
+        def __init__(self, hands):
+            self.multi_hand_landmarks = [_HandLandmarks(points) for points in hands] or None
+            self.multi_handedness = [_HandInfo() for _ in hands] or None
+
+    def __init__(self, hands=()):
+        self.calls = 0
+        self.hands = list(hands)
+
+    def process(self, image):
+        self.calls += 1
+        return self._Results(self.hands)
+
+    def close(self):
+        pass
+
+
+class TestSplitDetection:
+    """左右分割検出のテスト"""
+
+    @pytest.fixture
+    def split_detector(self, detector):
+        detector.hands_left = _RecordingHands()
+        detector.hands_right = _RecordingHands()
+        return detector
+
+    @staticmethod
+    def _hand(x_min, x_max):
+        return {"bbox": {"x_min": x_min, "y_min": 0.0, "x_max": x_max, "y_max": 50.0},
+                "palm_center": {"x": (x_min + x_max) / 2, "y": 25.0}, "confidence": 0.9}
+
+    def test_skips_half_containing_detected_hand(self, split_detector):
+        """検出済みの手を丸ごと含む半分はMediaPipeを再実行しない"""
+        frame = np.zeros((240, 320, 3), dtype=np.uint8)
+
+        split_detector._detect_both_hands_split(frame, frame, [self._hand(10, 80)])
+
+        assert split_detector.hands_left.calls == 0
+        assert split_detector.hands_right.calls == 1
+
+    def test_processes_both_halves_for_center_hand(self, split_detector):
+        """中央の重なり部分の手、または手が無い場合は両方の半分を処理する"""
+        frame = np.zeros((240, 320, 3), dtype=np.uint8)
+
+        split_detector._detect_both_hands_split(frame, frame, [self._hand(130, 190)])
+        split_detector._detect_both_hands_split(frame, frame, [])
+
+        assert split_detector.hands_left.calls == 2
+        assert split_detector.hands_right.calls == 2
+
+    @pytest.mark.parametrize("second_hand_in_right", [True, False])
+    def test_skipping_left_half_keeps_results(self, split_detector, monkeypatch, second_hand_in_right):
+        """左半分を省略しても、両方の半分を処理した場合と同じ手が返る（2つ目の手は右半分にしか無い）"""
+        h, w = 240, 320
+        frame = np.zeros((h, w, 3), dtype=np.uint8)
+        rng = np.random.default_rng(0)
+
+        def hand_points(x_min_px, x_max_px):
+            points = rng.random((21, 3))
+            points[:, 0] = (x_min_px + points[:, 0] * (x_max_px - x_min_px)) / w
+            points[:, 1] = 0.3 + points[:, 1] * 0.3
+            return points
+
+        # 初回検出で見つかった左側の手と、右半分にだけ映る2つ目の手（元画像の正規化座標）
+        first = hand_points(20, 70)
+        second = hand_points(230, 290)
+        left_width = w // 2 + 50
+        right_start = w // 2 - 50
+        initial_hand = split_detector._process_hand_landmarks(first.copy(), _HandInfo(), frame.shape, 0)
+
+        # 各半分の1手検出モデルは半分の画像の正規化座標で返す（左半分は同じ手を再検出する）
+        first_in_left = first.copy()
+        first_in_left[:, 0] *= w / left_width
+        second_in_right = second.copy()
+        second_in_right[:, 0] = (second[:, 0] * w - right_start) / (w - right_start)
+        split_detector.hands_left = _RecordingHands([first_in_left])
+        split_detector.hands_right = _RecordingHands([second_in_right] if second_hand_in_right else [])
+
+        skipped = split_detector._detect_both_hands_split(frame, frame, [dict(initial_hand)])
+        assert split_detector.hands_left.calls == 0
+
+        monkeypatch.setattr(split_detector, "_contains_hand", lambda hands, x_start, x_end: False)
+        processed = split_detector._detect_both_hands_split(frame, frame, [dict(initial_hand)])
+        assert split_detector.hands_left.calls == 1
+
+        assert len(skipped) == (2 if second_hand_in_right else 1)
+        assert skipped[0] == initial_hand
+        assert [hand["palm_center"] for hand in skipped] == [hand["palm_center"] for hand in processed]
+        assert [hand["bbox"] for hand in skipped] == [hand["bbox"] for hand in processed]
@@ -0,0 +1,94 @@
+"""
+ユニットテスト: 器具先端検出カーネル
+
+テスト対象:
+1. ループ版（Numba用）とNumPy版が同じ結果を返すこと
+2. BBox外・射影なしの判定
+3. Numbaでコンパイルしたカーネルの結果（numbaがある場合のみ）
+"""
+
+import pytest
+import numpy as np
+import cv2
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+backend_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.ai_engine.processors import tip_kernels
+from app.ai_engine.processors.tip_kernels import (
+    tip_from_contour, TIP_FOUND, TIP_OUTSIDE_BBOX, TIP_NOT_FOUND
+)
+
+
+def _ellipse_contour(angle):
+    """斜めの細長い器具マスクの最大輪郭"""
+    mask = np.zeros((240, 320), dtype=np.uint8)
+    cv2.ellipse(mask, (160, 120), (90, 12), angle, 0, 360, 1, -1)
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    return max(contours, key=cv2.contourArea)
+
+
+class TestTipFromContour:
+    """tip_from_contour() のテスト"""
+
+    @pytest.mark.parametrize("angle", [0, 30, 45, 90, 150])
+    @pytest.mark.parametrize("bbox", [(0, 0, 319, 239), (100, 80, 220, 160)])
+    def test_loop_matches_numpy(self, angle, bbox):
+        """ループ版とNumPy版は同じ先端点・判定を返す"""
+        theta = np.deg2rad(angle)
+        args = (
+            _ellipse_contour(angle).reshape(-1, 2), 160, 120,
+            float(np.cos(theta)), float(np.sin(theta)), *bbox
+        )
+
+        loop_result = tip_kernels._tip_from_contour_loop(*args)
+        numpy_result = tip_kernels._tip_from_contour_numpy(*args)
+
+        assert tuple(int(v) for v in loop_result) == tuple(int(v) for v in numpy_result)
+
+    def test_tip_found(self):
+        """主軸の正方向で最も遠い輪郭点を返す"""
+        tx, ty, status = tip_from_contour(_ellipse_contour(0), (160, 120), np.array([1.0, 0.0]), [0, 0, 319, 239])
+
+        assert status == TIP_FOUND
+        assert tx == 250 and abs(ty - 120) <= 1
+
+    def test_outside_bbox(self):
+        """先端点がBBox外の場合は先端点とTIP_OUTSIDE_BBOXを返す"""
+        tx, ty, status = tip_from_contour(_ellipse_contour(0), (160, 120), np.array([1.0, 0.0]), [100, 100, 200, 140])
+
+        assert status == TIP_OUTSIDE_BBOX
+        assert tx == 250
+
+    def test_single_point_returns_centroid(self):
+        """重心と一致する1点の輪郭は射影が0なので重心を返す"""
+        contour = np.array([[[10, 20]]], dtype=np.int32)
+
+        assert tip_from_contour(contour, (10, 20), np.array([1.0, 0.0]), [0, 0, 30, 30]) == (10, 20, TIP_NOT_FOUND)
+
+
+class TestNumbaKernel:
+    """njitでコンパイルしたカーネルのテスト（numbaが無い環境ではスキップ）"""
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_compiled_matches_numpy(self, seed):
+        """コンパイル済みカーネルはランダムな輪郭でNumPy版と同じ結果を返す"""
+        pytest.importorskip("numba")
+        assert tip_kernels._tip_kernel is not tip_kernels._tip_from_contour_numpy
+
+        rng = np.random.default_rng(seed)
+        for _ in range(20):
+            pts = rng.integers(0, 320, (int(rng.integers(1, 200)), 2)).astype(np.int32)
+            cx, cy = (int(v) for v in rng.integers(0, 320, 2))
+            theta = rng.uniform(0, 2 * np.pi)
+            x1, y1 = (int(v) for v in rng.integers(0, 160, 2))
+            x2, y2 = (int(v) for v in rng.integers(160, 320, 2))
+            args = (pts, cx, cy, float(np.cos(theta)), float(np.sin(theta)), x1, y1, x2, y2)
+
+            compiled_result = tip_kernels._tip_kernel(*args)
+            numpy_result = tip_kernels._tip_from_contour_numpy(*args)
+
+            assert tuple(int(v) for v in compiled_result) == tuple(int(v) for v in numpy_result)
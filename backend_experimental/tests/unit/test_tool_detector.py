@@ -0,0 +1,197 @@
+"""
+ユニットテスト: ToolDetector（モックモード）
+
+テスト対象:
+1. モック検出結果の形式と値の範囲
+2. 検出結果の描画
+3. バッチ検出（フレーム順序・バッチ分割・デバイス前処理）
+"""
+
+import pytest
+import numpy as np
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+backend_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.ai_engine.processors.tool_detector import ToolDetector, SurgicalTool
+
+
+@pytest.fixture
+def detector():
+    """モックモードのToolDetector"""
+    return ToolDetector(force_mock=True, confidence_threshold=0.5)
+
+
+class _Box:
+    def __init__(self, cls_id, conf, xyxy):
+        self.cls = np.array([cls_id])
+        self.conf = np.array([conf])
+        self.xyxy = np.array([xyxy])
+
+
+class _Result:
+    def __init__(self, boxes):
+        self.boxes = boxes
+
+
+class _FakeYOLO:
+    """入力フレームの画素値をクラスIDとして1件返すYOLO互換の呼び出し可能オブジェクト"""
+
+    def __init__(self):
+        self.batch_sizes = []
+        self.imgsz = []
+
+    def __call__(self, frames, conf, imgsz, verbose):
+        self.batch_sizes.append(len(frames))
+        self.imgsz.append(imgsz)
+        return [_Result([_Box(int(f[0, 0, 0]), 0.9, [10, 20, 30, 60])]) for f in frames]
+
+
+@pytest.fixture
+def frame():
+    return np.zeros((480, 640, 3), dtype=np.uint8)
+
+
+class TestMockDetection:
+    """モック検出のテスト"""
+
+    def test_mock_detection_values_within_bounds(self, detector, frame):
+        """器具数・BBox・信頼度が想定範囲に収まる"""
+        tool_names = {tool.value for tool in SurgicalTool}
+
+        for _ in range(200):
+            result = detector.detect_from_frame(frame)
+
+            assert result["model_info"]["is_mock"] is True
+            assert 0 <= len(result["instruments"]) <= 3
+
+            for i, instrument in enumerate(result["instruments"]):
+                bbox = instrument["bbox"]
+                assert instrument["id"] == i
+                assert instrument["type"] in tool_names
+                assert 0 <= bbox["x_min"] < bbox["x_max"] <= 640
+                assert 0 <= bbox["y_min"] < bbox["y_max"] <= 480
+                assert 0.5 <= instrument["confidence"] <= 0.95
+                assert 0 <= instrument["orientation"] <= 360
+                assert isinstance(instrument["center"]["x"], float)
+
+    def test_mock_detection_probability_zero(self, detector, frame):
+        """検出確率0では器具が検出されない"""
+        detector.mock_detection_probability = 0.0
+
+        result = detector.detect_from_frame(frame)
+
+        assert result["instruments"] == []
+
+
+class TestDrawDetections:
+    """描画のテスト"""
+
+    def test_draw_detections_returns_annotated_copy(self, detector, frame):
+        """描画結果は入力と同じ形状で、入力フレームは変更されない"""
+        detector.mock_detection_probability = 1.0
+        result = detector.detect_from_frame(frame)
+
+        annotated = detector.draw_detections(frame, result)
+
+        assert annotated.shape == frame.shape
+        assert annotated.any()
+        assert not frame.any()
+
+    def test_draw_detections_inplace(self, detector, frame):
+        """inplace=Trueでは入力フレームに直接描画される"""
+        detector.mock_detection_probability = 1.0
+        result = detector.detect_from_frame(frame)
+
+        annotated = detector.draw_detections(frame, result, inplace=True)
+
+        assert annotated is frame
+        assert frame.any()
+
+
+class TestDetectBatch:
+    """バッチ検出のテスト"""
+
+    def test_batch_inference_preserves_order(self, detector):
+        """batch_size枚ずつ推論し、結果は入力フレームの順序で返る"""
+        detector.is_mock = False
+        detector.model = _FakeYOLO()
+        frames = [np.full((48, 64, 3), i, dtype=np.uint8) for i in range(5)]
+
+        results = detector.detect_batch(frames, batch_size=2)
+
+        assert detector.model.batch_sizes == [2, 2, 1]
+        assert [r["frame_index"] for r in results] == list(range(5))
+        assert [r["instruments"][0]["type"] for r in results] == [f"object_{i}" for i in range(5)]
+        assert results[0]["instruments"][0]["center"] == {"x": 20.0, "y": 40.0}
+        assert results[0]["frame_shape"] == (48, 64)
+
+    def test_mock_batch(self, detector, frame):
+        """モックモードでもフレーム数分の結果を返す"""
+        results = detector.detect_batch([frame] * 3)
+
+        assert [r["frame_index"] for r in results] == [0, 1, 2]
+        assert all(r["model_info"]["is_mock"] for r in results)
+
+    def test_device_preprocess_rescales_boxes(self, detector):
+        """デバイス前処理ではRGB・0-1正規化テンソルを渡し、BBoxを元フレーム座標へ戻す"""
+        detector.is_mock = False
+        detector.model = _FakeYOLO()
+        detector._device = "cpu"
+        frame = np.zeros((320, 1280, 3), dtype=np.uint8)
+        frame[..., 2] = 255  # 赤 (BGR)
+
+        tensor = detector._to_gpu_tensor([frame])
+        assert tuple(tensor.shape) == (1, 3, 640, 640)
+        assert tensor[0, 0].min() == 1.0 and tensor[0, 2].max() == 0.0
+
+        bbox = detector.detect_from_frame(frame)["instruments"][0]["bbox"]
+        assert bbox == {"x_min": 20.0, "y_min": 10.0, "x_max": 60.0, "y_max": 30.0}
+
+
+    def test_custom_imgsz(self):
+        """imgszは推論呼び出しとデバイス前処理のサイズ・BBoxの倍率に使われる"""
+        detector = ToolDetector(force_mock=True, imgsz=320)
+        detector.is_mock = False
+        detector.model = _FakeYOLO()
+        detector._device = "cpu"
+        frame = np.zeros((320, 1280, 3), dtype=np.uint8)
+
+        assert tuple(detector._to_gpu_tensor([frame]).shape) == (1, 3, 320, 320)
+
+        bbox = detector.detect_from_frame(frame)["instruments"][0]["bbox"]
+        assert detector.model.imgsz == [320]
+        assert bbox == {"x_min": 40.0, "y_min": 20.0, "x_max": 120.0, "y_max": 60.0}
+
+class TestModelFile:
+    """モデルファイル探索のテスト"""
+
+    def test_find_model_file(self, tmp_path, monkeypatch):
+        """カレントディレクトリのINT8エンジンを見つけ、無い場合はNone"""
+        monkeypatch.chdir(tmp_path)
+        engine_name = f"yolov8n{ToolDetector.INT8_ENGINE_SUFFIX}"
+
+        assert ToolDetector._find_model_file(engine_name) is None
+
+        (tmp_path / engine_name).write_bytes(b"")
+        assert ToolDetector._find_model_file(engine_name).name == engine_name
+
+    def test_shared_model_is_loaded_once(self, tmp_path):
+        """同じモデルファイルはロード1回で共有され、ロックも共有される"""
+        from app.ai_engine.processors.tool_detector import _get_shared_model
+
+        model_path = tmp_path / "yolov8n.pt"
+        loads = []
+
+        def loader():
+            loads.append(1)
+            return object()
+
+        first = _get_shared_model(model_path, loader)
+        second = _get_shared_model(tmp_path / "." / "yolov8n.pt", loader)
+
+        assert len(loads) == 1
+        assert first[0] is second[0] and first[1] is second[1]
@@ -11,9 +11,20 @@ import logging
 from collections import deque
 import mediapipe as mp
 
+from glove_preprocessing import BlueToSkinConverter, make_skin_hsv_lut
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 青い手袋を肌色に置き換える変換器（作業バッファはフレーム形状ごとに使い回す）
+BLUE_TO_SKIN = BlueToSkinConverter(
+    [60, 10, 10], [150, 255, 255],
+    make_skin_hsv_lut(hue=20, saturation_scale=0.3),
+    kernel_size=5
+)
+# コントラスト強調用CLAHE（毎フレーム生成せず使い回す）
+CLAHE = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+
 
 class EnhancedDetectionVideoGenerator96:
     """96%検出率の強化版検出結果を可視化する動画生成クラス"""
@@ -165,34 +176,17 @@ class EnhancedDetectionVideoGenerator96:
     def preprocess_frame(self, frame):
         """フレームの前処理（青→肌色変換）"""
 
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-
-        # 青色の範囲
-        lower_blue = np.array([60, 10, 10])
-        upper_blue = np.array([150, 255, 255])
-        blue_mask = cv2.inRange(hsv, lower_blue, upper_blue)
-
-        # モルフォロジー処理
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
-        blue_mask = cv2.morphologyEx(blue_mask, cv2.MORPH_CLOSE, kernel)
-
         # 青を肌色に変換
-        hsv_copy = hsv.copy()
-        hsv_copy[blue_mask > 0, 0] = 20  # 肌色の色相
-        hsv_copy[blue_mask > 0, 1] = hsv_copy[blue_mask > 0, 1] * 0.3  # 彩度を下げる
-
-        result = cv2.cvtColor(hsv_copy, cv2.COLOR_HSV2BGR)
+        result = BLUE_TO_SKIN.convert(frame)
 
         # オリジナルとブレンド
         result = cv2.addWeighted(frame, 0.3, result, 0.7, 0)
 
         # コントラスト強調
         lab = cv2.cvtColor(result, cv2.COLOR_BGR2LAB)
-        l, a, b = cv2.split(lab)
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        l = clahe.apply(l)
-        result = cv2.merge([l, a, b])
-        result = cv2.cvtColor(result, cv2.COLOR_LAB2BGR)
+        # L成分のみ均等化（a/bは分割・結合せずそのまま）
+        cv2.insertChannel(CLAHE.apply(cv2.extractChannel(lab, 0)), lab, 0)
+        result = cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
 
         return result
 
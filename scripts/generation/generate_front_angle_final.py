@@ -11,9 +11,17 @@ import logging
 from collections import deque
 import mediapipe as mp
 
+from glove_preprocessing import BlueToSkinConverter, make_skin_hsv_lut
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 青い手袋を肌色に置き換える変換器（作業バッファはフレーム形状ごとに使い回す）
+BLUE_TO_SKIN = BlueToSkinConverter(
+    [60, 10, 10], [150, 255, 255],
+    make_skin_hsv_lut(hue=18, saturation_scale=0.3)
+)
+
 class FrontAngleFinalDetector:
     """上部30%を除外して手術手技のみ検出"""
 
@@ -110,19 +118,8 @@ class FrontAngleFinalDetector:
         self._print_stats()
 
     def preprocess_blue_glove(self, frame):
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-        
-        # 青色範囲
-        lower_blue = np.array([60, 10, 10])
-        upper_blue = np.array([150, 255, 255])
-        blue_mask = cv2.inRange(hsv, lower_blue, upper_blue)
-        
         # 青を肌色に変換
-        hsv_copy = hsv.copy()
-        hsv_copy[blue_mask > 0, 0] = 18  # 肌色
-        hsv_copy[blue_mask > 0, 1] = hsv_copy[blue_mask > 0, 1] * 0.3
-        
-        result = cv2.cvtColor(hsv_copy, cv2.COLOR_HSV2BGR)
+        result = BLUE_TO_SKIN.convert(frame)
         return cv2.addWeighted(frame, 0.2, result, 0.8, 0)
 
     def visualize(self, frame, valid_hands, frame_num, total_frames):
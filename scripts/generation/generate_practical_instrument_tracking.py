@@ -16,6 +16,9 @@ from scipy.interpolate import splprep, splev
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# コントラスト強調用CLAHE（毎フレーム生成せず使い回す）
+CLAHE = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8))
+
 
 class PracticalInstrumentTracker:
     """実用的な器具トラッキング - 高速かつ高精度"""
@@ -113,8 +116,7 @@ class PracticalInstrumentTracker:
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
 
         # CLAHE（コントラスト強調）
-        clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8))
-        enhanced = clahe.apply(gray)
+        enhanced = CLAHE.apply(gray)
 
         # エッジ検出（複数の手法を組み合わせ）
         edges1 = cv2.Canny(enhanced, 30, 100)
@@ -11,9 +11,20 @@ import logging
 from collections import deque
 import mediapipe as mp
 
+from glove_preprocessing import BlueToSkinConverter, make_skin_hsv_lut
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 青い手袋を肌色に置き換える変換器（作業バッファはフレーム形状ごとに使い回す）
+BLUE_TO_SKIN = BlueToSkinConverter(
+    [60, 10, 10], [150, 255, 255],
+    make_skin_hsv_lut(hue=18, saturation_scale=0.3),
+    kernel_size=5
+)
+# コントラスト強調用CLAHE（毎フレーム生成せず使い回す）
+CLAHE = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+
 
 class SurgicalHandsOnlyDetector:
     """手術手技分析専用の手検出器（顔を完全除外）"""
@@ -160,31 +171,14 @@ class SurgicalHandsOnlyDetector:
     def preprocess_frame(self, frame):
         """青い手袋用の前処理"""
 
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-
-        # 青色の範囲
-        lower_blue = np.array([60, 10, 10])
-        upper_blue = np.array([150, 255, 255])
-        blue_mask = cv2.inRange(hsv, lower_blue, upper_blue)
-
-        # ノイズ除去
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
-        blue_mask = cv2.morphologyEx(blue_mask, cv2.MORPH_CLOSE, kernel)
-
         # 青を肌色に変換
-        hsv_copy = hsv.copy()
-        hsv_copy[blue_mask > 0, 0] = 18  # 肌色
-        hsv_copy[blue_mask > 0, 1] = hsv_copy[blue_mask > 0, 1] * 0.3
-
-        result = cv2.cvtColor(hsv_copy, cv2.COLOR_HSV2BGR)
+        result = BLUE_TO_SKIN.convert(frame)
 
         # コントラスト強調
         lab = cv2.cvtColor(result, cv2.COLOR_BGR2LAB)
-        l, a, b = cv2.split(lab)
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        l = clahe.apply(l)
-        enhanced = cv2.merge([l, a, b])
-        result = cv2.cvtColor(enhanced, cv2.COLOR_LAB2BGR)
+        # L成分のみ均等化（a/bは分割・結合せずそのまま）
+        cv2.insertChannel(CLAHE.apply(cv2.extractChannel(lab, 0)), lab, 0)
+        result = cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
 
         return cv2.addWeighted(frame, 0.2, result, 0.8, 0)
 
@@ -15,6 +15,9 @@ import json
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# コントラスト強調用CLAHE（毎フレーム生成せず使い回す）
+CLAHE = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8))
+
 
 class TrueInstrumentTracker:
     """器具そのものを正確に追跡"""
@@ -69,8 +72,7 @@ class TrueInstrumentTracker:
 
         # 1. 金属器具の特徴を強調
         # CLAHE（コントラスト強調）
-        clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8,8))
-        enhanced = clahe.apply(gray)
+        enhanced = CLAHE.apply(gray)
 
         # 2. エッジ検出（器具は強いエッジを持つ）
         edges = cv2.Canny(enhanced, 50, 150)
@@ -11,9 +11,20 @@ import logging
 from collections import deque
 import mediapipe as mp
 
+from glove_preprocessing import BlueToSkinConverter, make_skin_hsv_lut
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 青い手袋を肌色に置き換える変換器（作業バッファはフレーム形状ごとに使い回す）
+BLUE_TO_SKIN = BlueToSkinConverter(
+    [50, 5, 5], [160, 255, 255],
+    make_skin_hsv_lut(hue=18, saturation_scale=0.4, value_scale=1.1),
+    kernel_size=7, open_iterations=1
+)
+# コントラスト強調用CLAHE（毎フレーム生成せず使い回す）
+CLAHE = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8))
+
 
 class UltraEnhancedVideoGenerator:
     """究極の検出精度を実現する動画生成クラス"""
@@ -179,16 +190,8 @@ class UltraEnhancedVideoGenerator:
         best_result = None
         best_confidence = 0
 
-        # 複数の前処理バージョンを生成
-        preprocessed_versions = [
-            frame,  # オリジナル
-            self.preprocess_blue_to_skin(frame),  # 青→肌色
-            self.preprocess_contrast(frame),  # コントラスト強調
-            self.preprocess_combined(frame),  # 組み合わせ
-        ]
-
-        # 各検出器と各前処理バージョンで試行
-        for preprocessed in preprocessed_versions:
+        # 各検出器と各前処理バージョンで試行（前処理は必要になった時点で生成）
+        for preprocessed in self._preprocessed_versions(frame):
             rgb_frame = cv2.cvtColor(preprocessed, cv2.COLOR_BGR2RGB)
 
             for detector in self.detectors:
@@ -210,28 +213,18 @@ class UltraEnhancedVideoGenerator:
 
         return best_result, best_confidence if best_result else 0
 
+    def _preprocessed_versions(self, frame):
+        """前処理バージョンを順に生成（早期終了時は残りの前処理を行わない）"""
+        yield frame  # オリジナル
+        blue_to_skin = self.preprocess_blue_to_skin(frame)
+        yield blue_to_skin  # 青→肌色
+        yield self.preprocess_contrast(frame)  # コントラスト強調
+        yield self.preprocess_combined(frame, blue_to_skin)  # 組み合わせ（青→肌色の結果を再利用）
+
     def preprocess_blue_to_skin(self, frame):
         """青を肌色に変換（最適化版）"""
 
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-
-        # 広い青色範囲
-        lower_blue = np.array([50, 5, 5])
-        upper_blue = np.array([160, 255, 255])
-        blue_mask = cv2.inRange(hsv, lower_blue, upper_blue)
-
-        # ノイズ除去とスムージング
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (7, 7))
-        blue_mask = cv2.morphologyEx(blue_mask, cv2.MORPH_CLOSE, kernel)
-        blue_mask = cv2.morphologyEx(blue_mask, cv2.MORPH_OPEN, kernel, iterations=1)
-
-        # 肌色に変換
-        hsv_copy = hsv.copy()
-        hsv_copy[blue_mask > 0, 0] = 18  # 肌色の色相
-        hsv_copy[blue_mask > 0, 1] = hsv_copy[blue_mask > 0, 1] * 0.4
-        hsv_copy[blue_mask > 0, 2] = np.minimum(hsv_copy[blue_mask > 0, 2] * 1.1, 255)
-
-        result = cv2.cvtColor(hsv_copy, cv2.COLOR_HSV2BGR)
+        result = BLUE_TO_SKIN.convert(frame)
         return cv2.addWeighted(frame, 0.2, result, 0.8, 0)
 
     def preprocess_contrast(self, frame):
@@ -239,17 +232,15 @@ class UltraEnhancedVideoGenerator:
 
         # CLAHE適用
         lab = cv2.cvtColor(frame, cv2.COLOR_BGR2LAB)
-        l, a, b = cv2.split(lab)
-        clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8))
-        l = clahe.apply(l)
-        enhanced = cv2.merge([l, a, b])
-        return cv2.cvtColor(enhanced, cv2.COLOR_LAB2BGR)
+        # L成分のみ均等化（a/bは分割・結合せずそのまま）
+        cv2.insertChannel(CLAHE.apply(cv2.extractChannel(lab, 0)), lab, 0)
+        return cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
 
-    def preprocess_combined(self, frame):
-        """全ての前処理を組み合わせ"""
+    def preprocess_combined(self, frame, blue_to_skin=None):
+        """全ての前処理を組み合わせ（blue_to_skin: 計算済みの青→肌色変換結果）"""
 
         # まず青を肌色に
-        result = self.preprocess_blue_to_skin(frame)
+        result = blue_to_skin if blue_to_skin is not None else self.preprocess_blue_to_skin(frame)
 
         # その後コントラスト強調
         result = self.preprocess_contrast(result)
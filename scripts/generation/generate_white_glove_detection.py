@@ -14,6 +14,9 @@ import mediapipe as mp
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# コントラスト強調用CLAHE（毎フレーム生成せず使い回す）
+CLAHE = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+
 
 class WhiteGloveDetectionGenerator:
     """白い手袋用の検出結果を可視化する動画生成クラス"""
@@ -202,13 +205,9 @@ class WhiteGloveDetectionGenerator:
 
         # コントラスト強調
         lab = cv2.cvtColor(frame, cv2.COLOR_BGR2LAB)
-        l, a, b = cv2.split(lab)
-
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        l = clahe.apply(l)
-
-        enhanced = cv2.merge([l, a, b])
-        result = cv2.cvtColor(enhanced, cv2.COLOR_LAB2BGR)
+        # L成分のみ均等化（a/bは分割・結合せずそのまま）
+        cv2.insertChannel(CLAHE.apply(cv2.extractChannel(lab, 0)), lab, 0)
+        result = cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
 
         return result
 
@@ -0,0 +1,102 @@
+"""
+青い手袋を肌色に変換する前処理（手検出動画生成スクリプト共通）
+
+MediaPipe Handsは素手で学習されているため、青い手袋の領域をHSV上で肌色に置き換えてから検出する
+"""
+
+from typing import Optional, Sequence
+
+import cv2
+import numpy as np
+
+
+def make_skin_hsv_lut(hue: int, saturation_scale: float, value_scale: float = 1.0) -> np.ndarray:
+    """
+    青→肌色変換の3チャンネルLUTを作成
+
+    Args:
+        hue: 置き換える肌色の色相（OpenCVのH: 0-179）
+        saturation_scale: 彩度の倍率（s * saturation_scale の切り捨て）
+        value_scale: 明度の倍率（255で飽和、1.0ならそのまま）
+
+    Returns:
+        cv2.LUT用の (256, 1, 3) uint8 配列
+    """
+    saturation = (np.arange(256) * saturation_scale).astype(np.uint8)
+    value = np.minimum(np.arange(256) * value_scale, 255).astype(np.uint8)
+    return np.stack([
+        np.full(256, hue, dtype=np.uint8), saturation, value
+    ], axis=-1).reshape(256, 1, 3)
+
+
+class BlueToSkinConverter:
+    """青色領域を肌色に置き換える変換器
+
+    作業バッファ（HSV・マスク・肌色HSV・BGR結果）はフレーム形状ごとに1回だけ確保して使い回す。
+    convert()の戻り値は次の呼び出しで上書きされる
+    """
+
+    def __init__(
+        self,
+        lower_blue: Sequence[int],
+        upper_blue: Sequence[int],
+        skin_hsv_lut: np.ndarray,
+        kernel_size: Optional[int] = None,
+        open_iterations: int = 0
+    ):
+        """
+        Args:
+            lower_blue: 青色とみなすHSVの下限
+            upper_blue: 青色とみなすHSVの上限
+            skin_hsv_lut: make_skin_hsv_lut()で作ったLUT
+            kernel_size: 青マスクのノイズ除去（Closing）の楕円カーネルサイズ（Noneなら行わない）
+            open_iterations: Closingの後に行うOpeningの回数（0なら行わない）
+        """
+        self.lower_blue = np.array(lower_blue)
+        self.upper_blue = np.array(upper_blue)
+        self.skin_hsv_lut = skin_hsv_lut
+        self.kernel = (
+            cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (kernel_size, kernel_size))
+            if kernel_size is not None else None
+        )
+        self.open_iterations = open_iterations
+        self._buffers = {}
+
+    def _get_buffers(self, shape):
+        buffers = self._buffers.get(shape)
+        if buffers is None:
+            buffers = self._buffers[shape] = {
+                "hsv": np.empty(shape, dtype=np.uint8),
+                "mask": np.empty(shape[:2], dtype=np.uint8),
+                "skin": np.empty(shape, dtype=np.uint8),
+                "result": np.empty(shape, dtype=np.uint8),
+            }
+        return buffers
+
+    def convert(self, frame: np.ndarray) -> np.ndarray:
+        """
+        BGRフレームの青色領域を肌色に置き換える
+
+        Args:
+            frame: 入力フレーム (BGR)
+
+        Returns:
+            変換後のフレーム (BGR、作業バッファ)
+        """
+        buffers = self._get_buffers(frame.shape)
+        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV, dst=buffers["hsv"])
+        blue_mask = cv2.inRange(hsv, self.lower_blue, self.upper_blue, dst=buffers["mask"])
+
+        # ノイズ除去とスムージング
+        if self.kernel is not None:
+            blue_mask = cv2.morphologyEx(blue_mask, cv2.MORPH_CLOSE, self.kernel, dst=blue_mask)
+            if self.open_iterations:
+                blue_mask = cv2.morphologyEx(
+                    blue_mask, cv2.MORPH_OPEN, self.kernel, iterations=self.open_iterations, dst=blue_mask
+                )
+
+        # 3チャンネルLUTで画像全体を一括変換し、青領域のみ差し替える
+        skin_hsv = cv2.LUT(hsv, self.skin_hsv_lut, dst=buffers["skin"])
+        cv2.copyTo(skin_hsv, blue_mask, hsv)
+
+        return cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR, dst=buffers["result"])
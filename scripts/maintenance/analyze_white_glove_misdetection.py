@@ -51,22 +51,17 @@ def analyze_misdetection():
             h, w = frame.shape[:2]
 
             for hand_idx, hand_landmarks in enumerate(result.multi_hand_landmarks):
-                # 手首（landmark 0）の位置を確認
-                wrist = hand_landmarks.landmark[0]
-                wrist_x = int(wrist.x * w)
-                wrist_y = int(wrist.y * h)
+                # 21点の正規化座標を1つの配列にまとめ、以降はスライスで計算
+                pts = np.array([(lm.x, lm.y, lm.z) for lm in hand_landmarks.landmark], dtype=np.float32)
+                px = (pts[:, 0] * w).astype(np.int32)
+                py = (pts[:, 1] * h).astype(np.int32)
 
-                # 中指のMCP（landmark 9）の位置
-                middle_mcp = hand_landmarks.landmark[9]
-                middle_x = int(middle_mcp.x * w)
-                middle_y = int(middle_mcp.y * h)
-
-                # 手のサイズを推定（手首から中指MCPまでの距離）
-                hand_size = np.sqrt((wrist_x - middle_x)**2 + (wrist_y - middle_y)**2)
+                # 手のサイズを推定（手首(0)から中指MCP(9)までの距離）
+                hand_size = np.hypot(px[0] - px[9], py[0] - py[9])
 
                 # 手の中心位置
-                center_x = sum([int(lm.landmark.x * w) for lm in hand_landmarks.landmark]) // 21
-                center_y = sum([int(lm.landmark.y * h) for lm in hand_landmarks.landmark]) // 21
+                center_x = int(px.sum()) // 21
+                center_y = int(py.sum()) // 21
 
                 # 顔・耳の可能性をチェック
                 # 1. Y座標が画面上部1/3にある
@@ -75,16 +70,12 @@ def analyze_misdetection():
                 is_large_size = hand_size > min(w, h) * 0.15
 
                 # 手の形状の妥当性チェック
-                # 親指と小指の距離
-                thumb_tip = hand_landmarks.landmark[4]
-                pinky_tip = hand_landmarks.landmark[20]
-                spread = np.sqrt((thumb_tip.x - pinky_tip.x)**2 + (thumb_tip.y - pinky_tip.y)**2) * w
+                # 親指(4)と小指(20)の距離
+                spread = np.hypot(pts[4, 0] - pts[20, 0], pts[4, 1] - pts[20, 1]) * w
 
                 # 手の縦横比
-                landmarks_x = [lm.x for lm in hand_landmarks.landmark]
-                landmarks_y = [lm.y for lm in hand_landmarks.landmark]
-                width = (max(landmarks_x) - min(landmarks_x)) * w
-                height = (max(landmarks_y) - min(landmarks_y)) * h
+                width = np.ptp(pts[:, 0]) * w
+                height = np.ptp(pts[:, 1]) * h
                 aspect_ratio = height / width if width > 0 else 0
 
                 if is_face_area or is_large_size:
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+"""
+YOLOv8モデルをTensorRT INT8エンジンへ変換（1回だけ実行）
+
+代表的な手術動画からキャリブレーション用フレームを抽出し、
+`<モデル名>_int8.engine` をモデルファイルと同じディレクトリに出力する。
+ToolDetector(use_gpu=True) はこのエンジンが存在すれば .pt より優先してロードする。
+
+使い方:
+    python scripts/maintenance/export_yolo_int8.py video1.mp4 [video2.mp4 ...]
+        [--model backend_experimental/yolov8n.pt] [--frames 300] [--batch 16]
+
+注意:
+- TensorRTエンジンはGPU・TensorRTのバージョンに依存するため、実行するマシン上で生成すること
+- キャリブレーション画像は モデルディレクトリ/calib/ にキャッシュされ、再実行時は再利用される
+"""
+
+import argparse
+import shutil
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+IMGSZ = 640  # ToolDetector.MODEL_IMGSZ と合わせる
+
+
+def extract_calibration_frames(video_paths, image_dir: Path, num_frames: int) -> int:
+    """各動画から等間隔にフレームを抽出してJPEGで保存"""
+    image_dir.mkdir(parents=True, exist_ok=True)
+    per_video = max(1, num_frames // len(video_paths))
+    saved = 0
+
+    for video_path in video_paths:
+        cap = cv2.VideoCapture(str(video_path))
+        if not cap.isOpened():
+            print(f"[WARN] 動画を開けません: {video_path}")
+            continue
+
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        targets = set(np.linspace(0, max(total - 1, 0), per_video, dtype=int).tolist())
+
+        # 目的のフレームだけデコードし、それ以外はgrab()で読み飛ばす
+        for frame_number in range(total):
+            if not cap.grab():
+                break
+            if frame_number not in targets:
+                continue
+            ret, frame = cap.retrieve()
+            if ret:
+                cv2.imwrite(str(image_dir / f"{Path(video_path).stem}_{frame_number:06d}.jpg"), frame)
+                saved += 1
+
+        cap.release()
+
+    return saved
+
+
+def write_calibration_yaml(calib_dir: Path, names) -> Path:
+    """ultralyticsのINT8キャリブレーションが読むデータセット定義を作成"""
+    yaml_path = calib_dir / "calib.yaml"
+    lines = [f"path: {calib_dir.resolve().as_posix()}", "train: images", "val: images", "names:"]
+    lines += [f"  {class_id}: {name}" for class_id, name in sorted(names.items())]
+    yaml_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return yaml_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="YOLOv8 → TensorRT INT8 エンジン変換")
+    parser.add_argument("videos", nargs="+", help="キャリブレーションに使う代表的な動画")
+    parser.add_argument("--model", default="backend_experimental/yolov8n.pt", help="変換元の .pt モデル")
+    parser.add_argument("--frames", type=int, default=300, help="キャリブレーションフレーム数")
+    parser.add_argument("--batch", type=int, default=16, help="エンジンの最大バッチサイズ（ToolDetector.detect_batchと合わせる）")
+    args = parser.parse_args()
+
+    try:
+        from ultralytics import YOLO
+    except ImportError:
+        print("[ERROR] ultralytics がインストールされていません")
+        sys.exit(1)
+
+    model_path = Path(args.model)
+    if not model_path.exists():
+        print(f"[ERROR] モデルが見つかりません: {model_path}")
+        sys.exit(1)
+
+    calib_dir = model_path.parent / "calib"
+    image_dir = calib_dir / "images"
+    if image_dir.exists() and any(image_dir.glob("*.jpg")):
+        print(f"[INFO] キャッシュ済みのキャリブレーション画像を使用: {image_dir}")
+    else:
+        saved = extract_calibration_frames(args.videos, image_dir, args.frames)
+        print(f"[INFO] キャリブレーション画像を保存: {saved}枚")
+        if saved == 0:
+            print("[ERROR] キャリブレーション画像を抽出できませんでした")
+            sys.exit(1)
+
+    model = YOLO(str(model_path))
+    yaml_path = write_calibration_yaml(calib_dir, model.names)
+
+    # dynamic=True でバッチ1〜batchの入力を受け付けるエンジンを生成
+    exported = model.export(
+        format="engine",
+        int8=True,
+        data=str(yaml_path),
+        imgsz=IMGSZ,
+        batch=args.batch,
+        dynamic=True,
+    )
+
+    engine_path = model_path.with_name(f"{model_path.stem}_int8.engine")
+    shutil.move(str(exported), str(engine_path))
+    print(f"[OK] INT8エンジンを出力: {engine_path}")
+
+
+if __name__ == "__main__":
+    main()